@@ -0,0 +1,266 @@
+"""
+Полнотекстовый индекс содержимого файлов проекта для поиска "Искать в содержимом".
+
+Текст файлов хранится в SQLite (FTS5 с триграммным токенизатором) в папке
+кэша рядом с каталогом библиотеки, отдельная база на каждый проект.
+Индексируются только текстоподобные файлы по расширению; двоичные файлы
+с таким расширением распознаются по первым байтам и запоминаются как
+двоичные, чтобы не читать их снова. Файл перечитывается, только если
+изменились его mtime или размер.
+
+Триграммы позволяют искать произвольную подстроку (от трех символов)
+без перечитывания проекта; более короткие строки ищутся instr по тексту
+в самой базе, без загрузки текста в Python. Файлы, которых в индексе еще нет, просматриваются file_contains
+порциями, не загружая файл в память целиком. Соединения с базой, как в ProjectCatalog, у каждого потока свои.
+"""
+import os
+import codecs
+import sqlite3
+import threading
+from itertools import product
+from project_catalog import CACHE_DIR, library_key
+
+# Расширения текстоподобных файлов, содержимое которых индексируется
+TEXT_EXTENSIONS = {
+    '.txt', '.md', '.log', '.json', '.xml', '.csv', '.ini', '.cfg', '.yaml', '.yml',
+    '.py', '.bat', '.cmd', '.sh', '.glsl', '.osl', '.mtl', '.obj', '.usda',
+}
+
+# Сколько текста индексировать из одного файла (байт)
+MAX_TEXT_BYTES = 4 * 1024 * 1024
+# У файлов геометрии интересен только заголовок (комментарии, mtllib, имена объектов)
+HEADER_ONLY_BYTES = {'.obj': 64 * 1024}
+
+# Поиск в файлах, которых нет в индексе: размер порции чтения и файлы,
+# которые больше этого размера, пропускаются
+GREP_CHUNK_BYTES = 256 * 1024
+GREP_MAX_SIZE = 256 * 1024 * 1024
+
+# По скольким первым байтам файл распознается как двоичный
+SNIFF_BYTES = 8192
+# Доля управляющих символов, начиная с которой файл считается двоичным
+BINARY_CONTROL_RATIO = 0.3
+_TEXT_CONTROLS = set(b'\t\n\r\f\b\x1b')
+
+# Сколько файлов записывать в базу одной транзакцией
+COMMIT_EVERY = 200
+
+# Короче триграммы подстроку нельзя искать по индексу
+MIN_INDEXED_NEEDLE = 3
+
+# Версия схемы: индекс - это кэш, поэтому при смене схемы он просто пересоздается
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS files (
+        id INTEGER PRIMARY KEY,
+        path TEXT NOT NULL UNIQUE,
+        mtime REAL NOT NULL,
+        size INTEGER NOT NULL,
+        is_text INTEGER NOT NULL
+    );
+    CREATE VIRTUAL TABLE IF NOT EXISTS contents USING fts5(text, tokenize='trigram');
+"""
+
+
+def is_text_candidate(path):
+    """Индексируется ли содержимое файла (по расширению)"""
+    return os.path.splitext(path)[1].lower() in TEXT_EXTENSIONS
+
+
+def looks_binary(data):
+    """Двоичные ли данные: нулевые байты или много управляющих символов"""
+    if b'\x00' in data:
+        return True
+    if not data:
+        return False
+    controls = sum(1 for byte in data if byte < 32 and byte not in _TEXT_CONTROLS)
+    return controls / len(data) > BINARY_CONTROL_RATIO
+
+
+def text_limit(path):
+    """Сколько байт файла индексируется и просматривается поиском"""
+    return HEADER_ONLY_BYTES.get(os.path.splitext(path)[1].lower(), MAX_TEXT_BYTES)
+
+
+def read_text(path):
+    """Текст файла для индекса или None, если файл двоичный"""
+    limit = text_limit(path)
+    with open(path, 'rb') as f:
+        data = f.read(min(SNIFF_BYTES, limit))
+        if looks_binary(data):
+            return None
+        data += f.read(limit - len(data))
+    return data.decode('utf-8', errors='replace')
+
+
+def file_contains(path, needle, case_sensitive=False, is_cancelled=lambda: False):
+    """Есть ли needle в файле. Файл читается порциями до первого совпадения.
+
+    Порции перекрываются на длину needle, чтобы не пропустить совпадение
+    на границе; двоичный файл (по первой порции) и отмена дают False.
+    У файлов геометрии, как и в индексе, просматривается только заголовок.
+    """
+    if not case_sensitive:
+        needle = needle.lower()
+    limit = HEADER_ONLY_BYTES.get(os.path.splitext(path)[1].lower())
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    overlap = len(needle) - 1
+    tail = ''
+    read = 0
+    with open(path, 'rb') as f:
+        while True:
+            if is_cancelled():
+                return False
+            data = f.read(GREP_CHUNK_BYTES if limit is None else min(GREP_CHUNK_BYTES, limit - read))
+            if read == 0 and looks_binary(data[:SNIFF_BYTES]):
+                return False
+            read += len(data)
+            text = decoder.decode(data, final=not data)
+            if not case_sensitive:
+                text = text.lower()
+            window = tail + text
+            if needle in window:
+                return True
+            if not data:
+                return False
+            tail = window[-overlap:] if overlap else ''
+
+
+class ContentIndex:
+    """Индекс содержимого текстовых файлов одного проекта"""
+
+    def __init__(self, project_path, db_path=None):
+        self.project_path = project_path
+        self.db_path = db_path or self.default_db_path(project_path)
+        self._local = threading.local()
+
+    @staticmethod
+    def default_db_path(project_path):
+        """Путь к файлу индекса для указанного проекта"""
+        return os.path.join(CACHE_DIR, f"content_{library_key(project_path)}.sqlite")
+
+    def connection(self):
+        """Возвращает соединение с базой для текущего потока"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self._reset_schema(conn)
+            self._local.conn = conn
+        return conn
+
+    def _reset_schema(self, conn):
+        """Пересоздает таблицы индекса под текущую версию схемы"""
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name NOT LIKE 'sqlite_%' AND name NOT GLOB 'contents_*'")]
+        with conn:
+            for table in tables:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.executescript(SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        """Закрывает соединение текущего потока"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ============= ОБНОВЛЕНИЕ =============
+
+    def indexed_files(self):
+        """{путь: (mtime, размер)} файлов, уже внесенных в индекс (и текстовых, и двоичных)"""
+        return {path: (mtime, size) for path, mtime, size in
+                self.connection().execute("SELECT path, mtime, size FROM files")}
+
+    def update(self, files, is_cancelled=lambda: False):
+        """Сверяет индекс с файлами проекта [(путь, mtime, размер)].
+
+        Перечитываются только новые и измененные файлы, записи исчезнувших
+        файлов удаляются. Возвращает число перечитанных файлов.
+        """
+        conn = self.connection()
+        known = {path: (file_id, mtime, size) for file_id, path, mtime, size in
+                 conn.execute("SELECT id, path, mtime, size FROM files")}
+        changed = 0
+        pending = 0
+        try:
+            for path, mtime, size in files:
+                if not is_text_candidate(path):
+                    continue
+                row = known.pop(path, None)
+                if row is not None and row[1:] == (mtime, size):
+                    continue
+                if is_cancelled():
+                    break
+                try:
+                    text = read_text(path)
+                except OSError:
+                    continue
+                if row is not None:
+                    self._delete(conn, row[0])
+                cursor = conn.execute(
+                    "INSERT INTO files (path, mtime, size, is_text) VALUES (?, ?, ?, ?)",
+                    (path, mtime, size, text is not None))
+                if text is not None:
+                    conn.execute("INSERT INTO contents (rowid, text) VALUES (?, ?)",
+                                 (cursor.lastrowid, text))
+                changed += 1
+                pending += 1
+                if pending >= COMMIT_EVERY:
+                    conn.commit()
+                    pending = 0
+            else:
+                # Обход дошел до конца - оставшиеся записи относятся к удаленным файлам
+                for file_id, _, _ in known.values():
+                    self._delete(conn, file_id)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return changed
+
+    @staticmethod
+    def _delete(conn, file_id):
+        conn.execute("DELETE FROM contents WHERE rowid = ?", (file_id,))
+        conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    # ============= ПОИСК =============
+
+    @staticmethod
+    def _case_variants(needle):
+        """Все написания короткой строки в разных регистрах (для instr без учета регистра)"""
+        return {''.join(chars) for chars in product(*({c, c.lower(), c.upper()} for c in needle))}
+
+    def search(self, needle, case_sensitive=False):
+        """{путь: (mtime, размер)} проиндексированных файлов, содержащих needle.
+
+        mtime и размер - те, с которыми файл был прочитан: по ним
+        вызывающий отличает устаревшие записи.
+        """
+        conn = self.connection()
+        if len(needle) < MIN_INDEXED_NEEDLE:
+            # Короткая строка не дает ни одной триграммы - ищем instr в самой базе;
+            # без учета регистра - любое из написаний (у двух символов их не больше четырех)
+            variants = [needle] if case_sensitive else sorted(self._case_variants(needle))
+            condition = " OR ".join(["instr(c.text, ?) > 0"] * len(variants))
+            rows = conn.execute(
+                "SELECT f.path, f.mtime, f.size FROM contents c JOIN files f ON f.id = c.rowid "
+                f"WHERE {condition}", variants)
+            return {path: (mtime, size) for path, mtime, size in rows}
+        # Фраза из триграмм ищет подстроку без учета регистра; с учетом - уточняем instr
+        phrase = '"' + needle.replace('"', '""') + '"'
+        query = ("SELECT f.path, f.mtime, f.size FROM contents c JOIN files f ON f.id = c.rowid "
+                 "WHERE contents MATCH ?")
+        if case_sensitive:
+            query += " AND instr(c.text, ?) > 0"
+            rows = conn.execute(query, (phrase, needle))
+        else:
+            rows = conn.execute(query, (phrase,))
+        return {path: (mtime, size) for path, mtime, size in rows}
+
@@ -0,0 +1,587 @@
+"""
+Индекс файлов проекта для фильтров окна проекта.
+
+ProjectFileIndex один раз обходит проект в фоне и держит в памяти для
+каждой записи имя, класс расширения, время изменения и размер. Фильтр
+проверяет записи индекса за один проход и добавляет к найденным их
+родительские папки, не обращаясь к диску, поэтому время ответа не зависит
+от скорости диска. Запрос выполняется в пуле потоков; новый запрос
+отменяет предыдущий, а запрос, который лишь дописывает текст предыдущего,
+проверяет только найденное им. Индекс обновляется по записям папок, которые
+перечитало дерево файлов по сообщению наблюдателя, и по путям, которые
+изменили операции с файлами; содержимое новых папок обходится в фоне.
+
+Поиск в содержимом идет по ContentIndex (content_index.py), который
+после каждого изменения индекса дописывается в фоне; файлы, которые в
+него еще не попали или изменились, читаются с диска.
+"""
+import os
+import traceback
+from datetime import datetime, timedelta
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from content_index import GREP_MAX_SIZE, ContentIndex, file_contains, is_text_candidate, text_limit
+from file_tree import scan_folder, stat_path
+
+ALL_FILES = "Все файлы"
+
+# Классы расширений для фильтра "Тип файла" (названия как в SearchPanel)
+FILE_KINDS = {
+    "Изображения": ['.png', '.jpg', '.jpeg', '.tga', '.psd'],
+    "Документы": ['.txt', '.doc', '.docx', '.pdf'],
+    "3D модели": ['.blend', '.fbx', '.obj', '.3ds'],
+    "Архивы": ['.zip', '.rar', '.7z'],
+}
+_KIND_BY_EXT = {ext: kind for kind, exts in FILE_KINDS.items() for ext in exts}
+
+# Как часто запрос проверяет, не отменен ли он (записей)
+CANCEL_CHECK_EVERY = 2000
+
+# Потоков и файлов на задачу для поиска в файлах, которых нет в индексе содержимого
+GREP_THREADS = 4
+GREP_BATCH = 32
+
+
+class FileRecord:
+    """Запись индекса: метаданные одного файла или папки"""
+    __slots__ = ("name", "name_lower", "path", "folder", "is_dir", "kind", "mtime", "size")
+
+    def __init__(self, name, path, is_dir, mtime, size):
+        self.name = name
+        self.name_lower = name.lower()
+        self.path = path
+        self.folder = os.path.dirname(path)
+        self.is_dir = is_dir
+        self.kind = None if is_dir else _KIND_BY_EXT.get(os.path.splitext(name)[1].lower())
+        self.mtime = mtime
+        self.size = size
+
+    def entry(self):
+        """Запись в формате file_tree.scan_folder"""
+        return self.name, self.path, self.is_dir, self.mtime, self.size
+
+
+def walk_project(root_path, is_cancelled=lambda: False):
+    """Обходит проект и возвращает [FileRecord] (None, если обход отменен)"""
+    records = []
+    stack = [root_path]
+    while stack:
+        if is_cancelled():
+            return None
+        folder = stack.pop()
+        try:
+            entries = scan_folder(folder)
+        except OSError:
+            if folder == root_path:
+                raise
+            continue
+        for entry in entries:
+            records.append(FileRecord(*entry))
+            if entry[2]:
+                stack.append(entry[1])
+    return records
+
+
+def _content_match(record, content, max_size):
+    """Ответ индекса содержимого: True/False или None, если файл нужно прочитать"""
+    indexed, found = content
+    if indexed.get(record.path) == (record.mtime, record.size):
+        if record.path in found or record.size <= text_limit(record.path):
+            return record.path in found
+        # В индекс попало только начало большого файла
+    if not is_text_candidate(record.path) or record.size > max_size:
+        return False
+    return None
+
+
+def is_empty_query(params):
+    """Ничего не отбирает ли запрос: нет текста и выбраны все типы файлов.
+
+    Флажки уточняют только поиск текста, а период сам по себе фильтр не
+    включает, поэтому без текста и типа показываются все файлы.
+    """
+    return not params.get("text") and params.get("file_type", ALL_FILES) == ALL_FILES
+
+
+def refines(params, previous):
+    """Только ли дописан текст запроса previous (остальные параметры те же)"""
+    if any(params[key] != previous.get(key) for key in params if key != "text"):
+        return False
+    if params["case_sensitive"]:
+        return previous["text"] in params["text"]
+    return previous["text"].lower() in params["text"].lower()
+
+
+def ancestors_of(paths, folders):
+    """Папки из folders, которые нужно показать и раскрыть, чтобы были видны paths"""
+    ancestors = set()
+    for path in paths:
+        folder = os.path.dirname(path)
+        while folder not in ancestors and folder in folders:
+            ancestors.add(folder)
+            folder = os.path.dirname(folder)
+    return ancestors
+
+
+def match_records(records, params, is_cancelled=lambda: False, content=None, max_size=GREP_MAX_SIZE):
+    """Один проход по записям: (найденные пути, их папки-предки, файлы для чтения)
+    или None при отмене.
+
+    Дешевые проверки (тип, дата) выполняются раньше поиска в содержимом.
+    content - ({путь: (mtime, размер)} файлов индекса содержимого,
+    {путь: ...} тех из них, где найден текст); None - не искать в содержимом.
+    Файлы, которых нет в индексе содержимого (не больше max_size), не
+    читаются здесь, а возвращаются списком для file_contains.
+    """
+    text = params["text"]
+    case_sensitive = params["case_sensitive"]
+    needle = text if case_sensitive else text.lower()
+    file_type = params["file_type"]
+    # Границы дат как метки времени: без datetime на каждую запись
+    date_from = datetime.combine(params["date_from"], datetime.min.time()).timestamp()
+    date_to = datetime.combine(params["date_to"] + timedelta(days=1), datetime.min.time()).timestamp()
+
+    matches = set()
+    unindexed = []
+    for number, record in enumerate(records):
+        if number % CANCEL_CHECK_EVERY == 0 and is_cancelled():
+            return None
+        if file_type != ALL_FILES and record.kind != file_type:
+            continue
+        if not date_from <= record.mtime < date_to:
+            continue
+        if needle and needle not in (record.name if case_sensitive else record.name_lower):
+            if record.is_dir or content is None:
+                continue
+            found = _content_match(record, content, max_size)
+            if found is None:
+                unindexed.append(record.path)
+            if not found:
+                continue
+        matches.add(record.path)
+    return matches, ancestors_of(matches, params["folders"]), unindexed
+
+
+class _IndexSignals(QObject):
+    built = pyqtSignal(int, object)  # номер обхода, [FileRecord] или None
+    walked = pyqtSignal(int, object)  # номер обхода новых папок, [FileRecord]
+    matched = pyqtSignal(int, object)  # номер запроса, (найденные пути, папки-предки, файлы для чтения)
+    grepped = pyqtSignal(int, object)  # номер запроса, пути файлов, где найден текст
+    content_updated = pyqtSignal()
+
+
+class _BuildTask(QRunnable):
+    def __init__(self, root_path, token, signals):
+        super().__init__()
+        self.root_path = root_path
+        self.token = token
+        self.signals = signals
+        self.cancelled = False
+
+    def run(self):
+        if self.cancelled:
+            return
+        records = None
+        try:
+            records = walk_project(self.root_path, lambda: self.cancelled)
+        except Exception as e:
+            print(f"Ошибка индексации проекта {self.root_path}: {e}")
+            traceback.print_exc()
+        if not self.cancelled:
+            self.signals.built.emit(self.token, records)
+
+
+class _WalkTask(QRunnable):
+    """Обходит новые папки (созданные или перенесенные в проект)"""
+
+    def __init__(self, folders, token, signals):
+        super().__init__()
+        self.folders = folders
+        self.token = token
+        self.signals = signals
+        self.cancelled = False
+
+    def run(self):
+        if self.cancelled:
+            return
+        records = []
+        for folder in self.folders:
+            try:
+                walked = walk_project(folder, lambda: self.cancelled)
+            except OSError:
+                continue
+            except Exception as e:
+                print(f"Ошибка индексации папки {folder}: {e}")
+                traceback.print_exc()
+                continue
+            if walked is None:
+                return
+            records.extend(walked)
+        if not self.cancelled:
+            self.signals.walked.emit(self.token, records)
+
+
+class _ContentTask(QRunnable):
+    def __init__(self, content_index, files, signals):
+        super().__init__()
+        self.content_index = content_index
+        self.files = files
+        self.signals = signals
+        self.cancelled = False
+
+    def run(self):
+        try:
+            self.content_index.update(self.files, lambda: self.cancelled)
+        except Exception as e:
+            print(f"Ошибка индексации содержимого {self.content_index.project_path}: {e}")
+            traceback.print_exc()
+        finally:
+            self.content_index.close()
+        self.signals.content_updated.emit()
+
+
+class _QueryTask(QRunnable):
+    def __init__(self, records, params, content_index, max_size, token, signals):
+        super().__init__()
+        self.records = records
+        self.params = params
+        self.content_index = content_index
+        self.max_size = max_size
+        self.token = token
+        self.signals = signals
+        self.cancelled = False
+
+    def run(self):
+        if self.cancelled:
+            return
+        result = None
+        try:
+            result = match_records(self.records, self.params, lambda: self.cancelled,
+                                   self._content(), self.max_size)
+        except Exception as e:
+            print(f"Ошибка фильтрации файлов: {e}")
+            traceback.print_exc()
+        if result is not None and not self.cancelled:
+            self.signals.matched.emit(self.token, result)
+
+    def _content(self):
+        """Ответ индекса содержимого для match_records (None - не искать в содержимом)"""
+        if not (self.params["search_content"] and self.params["text"]):
+            return None
+        try:
+            return (self.content_index.indexed_files(),
+                    self.content_index.search(self.params["text"], self.params["case_sensitive"]))
+        except Exception as e:
+            # Без индекса файлы будут прочитаны с диска
+            print(f"Ошибка поиска в индексе содержимого: {e}")
+            traceback.print_exc()
+            return {}, {}
+        finally:
+            self.content_index.close()
+
+
+class _GrepTask(QRunnable):
+    """Ищет текст в части файлов запроса; отменяется вместе с запросом"""
+
+    def __init__(self, query, paths, signals):
+        super().__init__()
+        self.query = query
+        self.paths = paths
+        self.signals = signals
+
+    def run(self):
+        found = []
+        text = self.query.params["text"]
+        case_sensitive = self.query.params["case_sensitive"]
+        is_cancelled = lambda: self.query.cancelled
+        for path in self.paths:
+            if is_cancelled():
+                return
+            try:
+                if file_contains(path, text, case_sensitive, is_cancelled):
+                    found.append(path)
+            except OSError:
+                continue
+            except Exception as e:
+                print(f"Ошибка поиска в файле {path}: {e}")
+                traceback.print_exc()
+        if not is_cancelled():
+            self.signals.grepped.emit(self.query.token, found)
+
+
+class ProjectFileIndex(QObject):
+    """Метаданные всех файлов проекта в памяти и фоновые запросы к ним.
+
+    Пока индекс строится, последний запрос ждет и выполняется сразу после
+    построения. Результат запроса приходит сигналом matched; файлы, которых
+    нет в индексе содержимого, просматриваются после этого пулом потоков,
+    и найденное в них приходит порциями сигналом matched_more.
+    """
+    ready = pyqtSignal()
+    matched = pyqtSignal(object, object)  # найденные пути, папки-предки для раскрытия
+    matched_more = pyqtSignal(object, object)  # то же для очередной порции прочитанных файлов
+
+    def __init__(self, root_path, parent=None, grep_max_size=GREP_MAX_SIZE):
+        super().__init__(parent)
+        self.root_path = root_path
+        self.grep_max_size = grep_max_size  # файлы больше этого не читаются при поиске
+        self.records = {}  # {путь: FileRecord}
+        self.folders = {root_path: set()}  # {папка: пути ее записей}
+        self.is_ready = False
+
+        self.next_token = 0
+        self.build_task = None
+        self.walk_tasks = {}  # {номер: обход новых папок}
+        self.query_task = None  # текущий запрос, пока не прочитаны все его файлы
+        self.grep_left = 0  # незавершенных задач чтения текущего запроса
+        self.query_found = set()  # найденное текущим запросом
+        self.last_query = None  # (параметры, найденные пути) последнего завершенного запроса
+        self.waiting_params = None  # запрос, пришедший до построения индекса
+
+        self.content_index = ContentIndex(root_path)
+        self.content_task = None
+        self.content_dirty = False  # индекс менялся, пока дописывалось содержимое
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        # Содержимое индексируется в своем потоке, чтобы не задерживать запросы
+        self.content_pool = QThreadPool(self)
+        self.content_pool.setMaxThreadCount(1)
+        self.grep_pool = QThreadPool(self)
+        self.grep_pool.setMaxThreadCount(GREP_THREADS)
+        self.signals = _IndexSignals()
+        self.signals.built.connect(self._on_built)
+        self.signals.walked.connect(self._on_walked)
+        self.signals.matched.connect(self._on_matched)
+        self.signals.content_updated.connect(self._on_content_updated)
+        self.signals.grepped.connect(self._on_grepped)
+
+    # ============= ПОСТРОЕНИЕ И ОБНОВЛЕНИЕ =============
+
+    def build(self):
+        """Обходит проект в фоне (повторный вызов перестраивает индекс)"""
+        if self.build_task is not None:
+            self.build_task.cancelled = True
+        self._cancel_walks()
+        self.next_token += 1
+        self.build_task = _BuildTask(self.root_path, self.next_token, self.signals)
+        self.pool.start(self.build_task)
+
+    def entries(self, folder_path, paths=None):
+        """Записи папки в формате file_tree.scan_folder (без обращения к диску).
+
+        paths - взять только эти пути папки (например, найденные фильтром).
+        """
+        if paths is None:
+            paths = self.folders.get(folder_path, ())
+        return [self.records[path].entry() for path in paths if path in self.records]
+
+    def has_folder(self, folder_path):
+        return folder_path in self.folders
+
+    def refresh_folders(self, listings):
+        """Сверяет папки с их записями на диске {папка: [записи scan_folder]}.
+
+        Записи уже прочитаны (деревом файлов); новые вложенные папки
+        обходятся в фоне.
+        """
+        if not self.is_ready:
+            return
+        new_folders = []
+        for folder_path, records in listings.items():
+            if folder_path not in self.folders:
+                continue
+            entries = {entry[1]: entry for entry in records}
+            for path in list(self.folders[folder_path]):
+                entry = entries.pop(path, None)
+                record = self.records[path]
+                if entry is None or entry[2] != record.is_dir:
+                    self._remove(path)
+                    if entry is not None:
+                        entries[path] = entry
+                else:
+                    record.mtime, record.size = entry[3], entry[4]
+            for entry in entries.values():
+                self._add(FileRecord(*entry))
+                if entry[2]:
+                    new_folders.append(entry[1])
+        self._walk(new_folders)
+        self._changed()
+
+    def add_paths(self, paths):
+        """Вносит созданные файлы и папки (папки - вместе с содержимым)"""
+        if not self.is_ready:
+            return
+        new_folders = []
+        for path in paths:
+            if os.path.dirname(path) not in self.folders:
+                continue
+            try:
+                entry = stat_path(path)
+            except OSError:
+                continue
+            if path in self.records:
+                self._remove(path)
+            self._add(FileRecord(*entry))
+            if entry[2]:
+                new_folders.append(path)
+        self._walk(new_folders)
+        self._changed()
+
+    def remove_paths(self, paths):
+        if not self.is_ready:
+            return
+        for path in paths:
+            if path in self.records:
+                self._remove(path)
+        self._changed()
+
+    def _changed(self):
+        """Записи изменились: прежний результат нельзя уточнять, содержимое нужно дописать"""
+        self.last_query = None
+        self.update_content()
+
+    def _add(self, record):
+        self.records[record.path] = record
+        self.folders.setdefault(record.folder, set()).add(record.path)
+        if record.is_dir:
+            self.folders.setdefault(record.path, set())
+
+    def _walk(self, folders):
+        """Обходит содержимое новых папок в фоне"""
+        if not folders:
+            return
+        self.next_token += 1
+        task = _WalkTask(folders, self.next_token, self.signals)
+        self.walk_tasks[task.token] = task
+        self.pool.start(task)
+
+    def _cancel_walks(self):
+        for task in self.walk_tasks.values():
+            task.cancelled = True
+        self.walk_tasks.clear()
+
+    def _on_walked(self, token, records):
+        if self.walk_tasks.pop(token, None) is None:
+            return
+        added = False
+        for record in records:
+            # Папку могли удалить, пока шел обход
+            if record.folder in self.folders:
+                self._add(record)
+                added = True
+        if added:
+            self._changed()
+
+    def _remove(self, path):
+        """Убирает запись; у папки - вместе со всем содержимым"""
+        record = self.records.pop(path)
+        self.folders.get(record.folder, set()).discard(path)
+        stack = [path] if record.is_dir else []
+        while stack:
+            for child in self.folders.pop(stack.pop(), ()):
+                child_record = self.records.pop(child, None)
+                if child_record is not None and child_record.is_dir:
+                    stack.append(child)
+
+    def _on_built(self, token, records):
+        if self.build_task is None or self.build_task.token != token:
+            return
+        self.build_task = None
+        if records is None:
+            return
+        self.records = {}
+        self.folders = {self.root_path: set()}
+        for record in records:
+            self._add(record)
+        self.is_ready = True
+        self.ready.emit()
+        self._changed()
+        if self.waiting_params is not None:
+            params, self.waiting_params = self.waiting_params, None
+            self.query(params)
+
+    def update_content(self):
+        """Дописывает в фоне индекс содержимого (только новые и измененные файлы)"""
+        if self.content_task is not None:
+            self.content_dirty = True
+            return
+        self.content_dirty = False
+        files = [(record.path, record.mtime, record.size)
+                 for record in self.records.values() if not record.is_dir]
+        self.content_task = _ContentTask(self.content_index, files, self.signals)
+        self.content_pool.start(self.content_task)
+
+    def _on_content_updated(self):
+        cancelled = self.content_task is None or self.content_task.cancelled
+        self.content_task = None
+        if self.content_dirty and not cancelled:
+            self.update_content()
+
+    # ============= ЗАПРОСЫ =============
+
+    def query(self, params):
+        """Запускает фильтр в фоне; незавершенный предыдущий запрос отменяется.
+
+        Если запрос только дописывает текст завершенного предыдущего,
+        проверяются лишь найденные им записи.
+        """
+        self.cancel_query()
+        if not self.is_ready:
+            self.waiting_params = params
+            return
+        self.next_token += 1
+        # Задача получает свой снимок записей: индекс может меняться, пока она идет
+        if self.last_query is not None and refines(params, self.last_query[0]):
+            records = [self.records[path] for path in self.last_query[1] if path in self.records]
+        else:
+            records = list(self.records.values())
+        params = dict(params, folders=set(self.folders))
+        self.query_task = _QueryTask(records, params, self.content_index,
+                                     self.grep_max_size, self.next_token, self.signals)
+        self.pool.start(self.query_task)
+
+    def cancel_query(self):
+        self.waiting_params = None
+        if self.query_task is not None:
+            self.query_task.cancelled = True
+            self.query_task = None
+
+    def stop(self):
+        """Останавливает построение и запросы (при закрытии окна)"""
+        self.cancel_query()
+        if self.build_task is not None:
+            self.build_task.cancelled = True
+            self.build_task = None
+        self._cancel_walks()
+        if self.content_task is not None:
+            self.content_task.cancelled = True
+
+    def _on_matched(self, token, result):
+        if self.query_task is None or self.query_task.token != token:
+            return
+        matches, ancestors, unindexed = result
+        self.query_task.records = None  # снимок записей больше не нужен
+        self.query_found = set(matches)
+        self.matched.emit(matches, ancestors)
+        if not unindexed:
+            self._finish_query()
+            return
+        # Остальное найдется в файлах, которые придется прочитать
+        batches = [unindexed[i:i + GREP_BATCH] for i in range(0, len(unindexed), GREP_BATCH)]
+        self.grep_left = len(batches)
+        for batch in batches:
+            self.grep_pool.start(_GrepTask(self.query_task, batch, self.signals))
+
+    def _on_grepped(self, token, found):
+        if self.query_task is None or self.query_task.token != token:
+            return
+        self.query_found.update(found)
+        self.grep_left -= 1
+        if self.grep_left == 0:
+            self._finish_query()
+        if found:
+            self.matched_more.emit(set(found), ancestors_of(found, self.folders))
+
+    def _finish_query(self):
+        self.last_query = (self.query_task.params, self.query_found)
+        self.query_task = None
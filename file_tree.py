@@ -0,0 +1,915 @@
+"""
+Дерево файлов проекта на основе модели и представления.
+
+FileTreeModel читает содержимое папки только когда ее раскрывают
+(canFetchMore/fetchMore), а не весь проект при открытии окна. Папка
+перечисляется в пуле потоков: записи приходят в модель порциями, пока
+чтение не закончено, в конце папки стоит строка "Загрузка…". Чтение
+отменяется, если папку свернули или окно закрыли. Папки, о изменении
+которых сообщил наблюдатель, перечитываются в том же пуле, и дерево
+сверяется с результатом, когда он придет. Для каждой записи один
+раз запоминаются признак папки, время изменения и размер; дата и размер
+форматируются только для отрисовываемых строк. Кнопку "+" у папок рисует
+FileTreeDelegate, поэтому на строку не создается ни одного виджета.
+"""
+import os
+import stat
+import time
+import traceback
+from datetime import datetime
+from operator import attrgetter
+from PyQt6.QtWidgets import QTreeView, QStyledItemDelegate, QStyle, QStyleOptionViewItem
+from PyQt6.QtCore import (Qt, QAbstractItemModel, QModelIndex, QRect, QObject,
+                          QPersistentModelIndex, QRunnable, QThreadPool, pyqtSignal)
+from PyQt6.QtGui import QColor
+import resources
+
+COLUMNS = ["Имя", "Дата изменения", "Размер"]
+
+# Потоков чтения папок: чтение упирается в диск
+SCAN_THREADS = 2
+
+# Первая порция записей, которую поток чтения отдает модели, и пауза, после
+# которой она отдается неполной (с): первые строки большой папки появляются сразу
+SCAN_CHUNK = 1000
+SCAN_CHUNK_INTERVAL = 0.1
+
+LOADING_TEXT = "Загрузка…"
+# Сколько записей одной папки вставляется и удаляется по одной; больше -
+# одной порцией с сортировкой или одной перестройкой папки
+POPULATE_INSERT_LIMIT = 100
+
+# Ключи сортировки по колонкам: только поля узла, без обращений к диску.
+# Сортировка устойчивая, поэтому записи с равной датой или размером
+# остаются в прежнем порядке (обычно по имени)
+SORT_KEYS = {
+    0: attrgetter("sort_name"),
+    1: attrgetter("mtime"),
+    2: attrgetter("size"),
+}
+_is_dir = attrgetter("is_dir")
+
+# Представление запрашивает флаги каждой строки при раскладке: собираем их заранее
+_FILE_FLAGS = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsDragEnabled
+_FOLDER_FLAGS = _FILE_FLAGS | Qt.ItemFlag.ItemIsDropEnabled
+
+# Иконки по расширению файла
+FILE_ICONS = {
+    '.blend': 'icons/blend.png',
+    '.spp': 'icons/substance.png',
+    '.fbx': 'icons/model.png',
+    '.obj': 'icons/model.png',
+    '.3ds': 'icons/model.png',
+    '.png': 'icons/image.png',
+    '.jpg': 'icons/image.png',
+    '.jpeg': 'icons/image.png',
+    '.tga': 'icons/image.png',
+    '.psd': 'icons/image.png',
+    '.txt': 'icons/text.png',
+    '.doc': 'icons/document.png',
+    '.docx': 'icons/document.png',
+    '.pdf': 'icons/pdf.png',
+    '.zip': 'icons/archive.png',
+    '.rar': 'icons/archive.png',
+    '.7z': 'icons/archive.png',
+}
+FOLDER_ICON = 'icons/folder.png'
+FILE_ICON = 'icons/file.png'
+ADD_ICON = 'icons/add.png'
+
+# Кнопка "+" справа от имени папки
+ADD_BUTTON_SIZE = 16
+ADD_BUTTON_SPACING = 9
+
+
+def format_size(size):
+    for unit in ['б', 'Кб', 'Мб', 'Гб']:
+        if size < 1024:
+            return f"{size:.0f}{unit}"
+        size /= 1024
+    return f"{size:.0f}Тб"
+
+
+def _entry_record(entry):
+    """(имя, путь, папка ли, mtime, размер) для записи os.scandir или None"""
+    try:
+        is_dir = entry.is_dir()
+        stat = entry.stat()
+    except OSError:
+        return None
+    return entry.name, entry.path, is_dir, stat.st_mtime, 0 if is_dir else stat.st_size
+
+
+def stat_path(path):
+    """(имя, путь, папка ли, mtime, размер) для одного пути; OSError, если его нет"""
+    st = os.stat(path)
+    is_dir = stat.S_ISDIR(st.st_mode)
+    return os.path.basename(path), path, is_dir, st.st_mtime, 0 if is_dir else st.st_size
+
+
+def scan_folder(path):
+    """Читает одну папку: [(имя, путь, папка ли, mtime, размер)].
+
+    Записи, которые не удалось прочитать (удалены во время обхода, нет
+    прав), пропускаются; ошибка чтения самой папки пробрасывается.
+    """
+    with os.scandir(path) as entries:
+        return [record for record in map(_entry_record, entries) if record is not None]
+
+
+class FileNode:
+    """Запись дерева файлов: метаданные читаются один раз при перечислении папки"""
+    __slots__ = ("name", "sort_name", "path", "is_dir", "mtime", "size", "parent", "children",
+                 "row", "loaded", "loading", "partial")
+
+    def __init__(self, name, path, is_dir, mtime=0.0, size=0, parent=None):
+        self.name = name
+        self.sort_name = name.lower()  # ключ сортировки по имени считается один раз
+        self.path = path
+        self.is_dir = is_dir
+        self.mtime = mtime
+        self.size = size
+        self.parent = parent
+        self.children = []
+        self.row = 0
+        self.loaded = not is_dir  # у файла нечего загружать
+        self.loading = None  # задача чтения папки, пока оно идет
+        self.partial = False  # папка заполнена только частью записей (найденными фильтром)
+
+
+class _ScanSignals(QObject):
+    chunk = pyqtSignal(int, list)  # номер задачи, записи
+    finished = pyqtSignal(int, str)  # номер задачи, текст ошибки ("" - без ошибок)
+    listed = pyqtSignal(int, dict)  # номер задачи, {папка: записи} прочитанных папок
+
+
+class _ScanTask(QRunnable):
+    """Перечисляет одну папку и отдает записи порциями"""
+
+    def __init__(self, path, token, signals):
+        super().__init__()
+        self.path = path
+        self.token = token
+        self.signals = signals
+        self.cancelled = False
+        # Строка "Загрузка…" в конце папки, пока идет чтение (создается в GUI-потоке)
+        self.placeholder = None
+
+    def run(self):
+        if self.cancelled:
+            return
+        error = ""
+        chunk = []
+        # Каждая порция заставляет дерево заново разложить уже показанные
+        # строки, поэтому порции растут вместе с папкой: раскладок выходит
+        # O(log n), а не O(n / SCAN_CHUNK)
+        limit = SCAN_CHUNK
+        interval = SCAN_CHUNK_INTERVAL
+        sent = 0
+        try:
+            last_emit = time.monotonic()
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    if self.cancelled:
+                        return
+                    record = _entry_record(entry)
+                    if record is not None:
+                        chunk.append(record)
+                    if len(chunk) >= limit or (
+                            chunk and time.monotonic() - last_emit >= interval):
+                        self.signals.chunk.emit(self.token, chunk)
+                        sent += len(chunk)
+                        chunk = []
+                        limit = max(SCAN_CHUNK, sent)
+                        interval *= 2
+                        last_emit = time.monotonic()
+        except OSError as e:
+            error = str(e) or e.__class__.__name__
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            print(f"Ошибка чтения папки {self.path}: {e}")
+            traceback.print_exc()
+        if self.cancelled:
+            return
+        if chunk:
+            self.signals.chunk.emit(self.token, chunk)
+        self.signals.finished.emit(self.token, error)
+
+
+class _ListTask(QRunnable):
+    """Перечитывает папки целиком (о их изменении сообщил наблюдатель)"""
+
+    def __init__(self, paths, token, signals):
+        super().__init__()
+        self.paths = paths
+        self.token = token
+        self.signals = signals
+
+    def run(self):
+        listings = {}
+        for path in self.paths:
+            try:
+                listings[path] = scan_folder(path)
+            except FileNotFoundError:
+                # Папка удалена - ее запись уберет обновление родителя
+                continue
+            except OSError as e:
+                print(f"Ошибка обновления папки {path}: {e}")
+            except Exception as e:
+                print(f"Ошибка обновления папки {path}: {e}")
+                traceback.print_exc()
+        self.signals.listed.emit(self.token, listings)
+
+
+class FileTreeModel(QAbstractItemModel):
+    """Файлы и папки проекта; содержимое папки читается в фоне при ее раскрытии"""
+    folder_loaded = pyqtSignal(str)  # содержимое папки прочитано (для наблюдения за ней)
+    folders_removed = pyqtSignal(list)  # загруженные папки убраны из дерева
+    load_failed = pyqtSignal(str, str)  # путь, текст ошибки
+    folders_listed = pyqtSignal(dict)  # {папка: записи} после сверки с диском
+
+    def __init__(self, root_path, parent=None):
+        super().__init__(parent)
+        self.root = FileNode(os.path.basename(root_path), root_path, True)
+        self.nodes = {root_path: self.root}  # {путь: узел} для загруженных записей
+        self.sort_column = 0
+        self.sort_order = Qt.SortOrder.AscendingOrder
+
+        self.loading = {}  # {номер задачи: папка, которая читается}
+        self.listing = {}  # {папка: номер последней задачи, которая ее перечитывает}
+        self.next_token = 0
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(SCAN_THREADS)
+        self.signals = _ScanSignals()
+        self.signals.chunk.connect(self._on_chunk)
+        self.signals.finished.connect(self._on_finished)
+        self.signals.listed.connect(self._on_listed)
+
+    # ============= QAbstractItemModel =============
+
+    def node(self, index):
+        return index.internalPointer() if index.isValid() else self.root
+
+    def index(self, row, column, parent=QModelIndex()):
+        # Вызывается для каждой строки при раскладке дерева - без лишних вызовов
+        node = parent.internalPointer() if parent.isValid() else self.root
+        if not 0 <= column < len(COLUMNS):
+            return QModelIndex()
+        if 0 <= row < len(node.children):
+            return self.createIndex(row, column, node.children[row])
+        if row == len(node.children) and node.loading is not None:
+            return self.createIndex(row, column, node.loading.placeholder)
+        return QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self.root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() and parent.column() != 0:
+            return 0
+        node = self.node(parent)
+        return len(node.children) + (node.loading is not None)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            node = self.root
+        elif parent.column() != 0:
+            return False
+        else:
+            node = parent.internalPointer()
+        # Непрочитанная папка показывает стрелку раскрытия
+        return node.is_dir and (not node.loaded or bool(node.children))
+
+    def canFetchMore(self, parent):
+        node = self.node(parent)
+        return node.is_dir and not node.loaded and node.loading is None
+
+    def fetchMore(self, parent):
+        node = self.node(parent)
+        if node.is_dir and not node.loaded and node.loading is None:
+            self._start_loading(node)
+
+    def supportedDropActions(self):
+        return Qt.DropAction.CopyAction | Qt.DropAction.MoveAction
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.ItemIsDropEnabled
+        node = index.internalPointer()
+        if node.path is None:
+            # Строку "Загрузка…" нельзя выделить и сделать текущей
+            return Qt.ItemFlag.NoItemFlags
+        return _FOLDER_FLAGS if node.is_dir else _FILE_FLAGS
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        column = index.column()
+        if node.path is None:
+            if role == Qt.ItemDataRole.DisplayRole and column == 0:
+                return LOADING_TEXT
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return QColor("#888888")
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return node.name
+            if node.is_dir:
+                return None
+            if column == 1:
+                return datetime.fromtimestamp(node.mtime).strftime("%d.%m.%y %H:%M:%S")
+            return format_size(node.size)
+        if role == Qt.ItemDataRole.DecorationRole and column == 0:
+            if node.is_dir:
+                return resources.icon(FOLDER_ICON)
+            return resources.icon(FILE_ICONS.get(os.path.splitext(node.name)[1].lower(), FILE_ICON))
+        if role == Qt.ItemDataRole.TextAlignmentRole and column > 0:
+            return Qt.AlignmentFlag.AlignCenter
+        if role == Qt.ItemDataRole.UserRole:
+            return node.path
+        return None
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """Сортирует прочитанные папки; папки всегда выше файлов"""
+        self.sort_column = column
+        self.sort_order = order
+        folders = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if len(node.children) > 1:
+                folders.append(node)
+            # Папки идут первыми: дальше первого файла искать нечего
+            for child in node.children:
+                if not child.is_dir:
+                    break
+                if child.children:
+                    stack.append(child)
+        self._sort_folders(folders)
+
+    # ============= ДОСТУП К ЗАПИСЯМ =============
+
+    def path(self, index):
+        return self.node(index).path
+
+    def is_dir(self, index):
+        return self.node(index).is_dir
+
+    def index_of(self, path, column=0):
+        """Индекс прочитанной записи по пути (пустой, если ее папка еще не прочитана)"""
+        node = self.nodes.get(path)
+        if node is None or node is self.root:
+            return QModelIndex()
+        return self.createIndex(node.row, column, node)
+
+    def walk(self, node=None):
+        """Обходит прочитанные записи (без корня) в порядке дерева"""
+        stack = list(reversed((node or self.root).children))
+        while stack:
+            current = stack.pop()
+            yield current
+            stack.extend(reversed(current.children))
+
+    def reload(self):
+        """Забывает прочитанное: папки будут прочитаны заново при раскрытии"""
+        self.cancel_all()
+        removed = [path for path, node in self.nodes.items() if node.is_dir and node.loaded]
+        self.beginResetModel()
+        self.root.children = []
+        self.root.loaded = False
+        self.root.loading = None
+        self.nodes = {self.root.path: self.root}
+        self.endResetModel()
+        self.folders_removed.emit(removed)
+
+    # ============= ФОНОВОЕ ЧТЕНИЕ =============
+
+    def _start_loading(self, node):
+        self.next_token += 1
+        task = _ScanTask(node.path, self.next_token, self.signals)
+        task.placeholder = FileNode(LOADING_TEXT, None, False, parent=node)
+        task.placeholder.row = len(node.children)
+        self.beginInsertRows(self._index_of_node(node), task.placeholder.row, task.placeholder.row)
+        node.loading = task
+        self.loading[task.token] = node
+        self.endInsertRows()
+        self.pool.start(task)
+
+    def cancel_loading(self, index):
+        """Отменяет чтение папки и ее вложенных папок (например, при сворачивании).
+
+        Уже пришедшие записи убираются, папка будет прочитана заново при
+        следующем раскрытии.
+        """
+        node = self.node(index)
+        if node.loading is None:
+            # Папка прочитана, но могут читаться вложенные
+            for child in node.children:
+                if child.is_dir and (child.loading is not None or child.children):
+                    self.cancel_loading(self._index_of_node(child))
+            return
+        self._stop_task(node)
+        parent_index = self._index_of_node(node)
+        self.beginRemoveRows(parent_index, 0, len(node.children))
+        removed = self._forget_children(node)
+        node.loading = None
+        node.loaded = False
+        self.endRemoveRows()
+        if removed:
+            self.folders_removed.emit(removed)
+
+    def cancel_all(self):
+        """Отменяет все чтения (при закрытии окна)"""
+        self.listing.clear()
+        for node in list(self.loading.values()):
+            # Папка могла уйти из дерева вместе с отмененным родителем
+            if node.loading is not None:
+                self.cancel_loading(self._index_of_node(node))
+
+    def _stop_task(self, node):
+        node.loading.cancelled = True
+        self.loading.pop(node.loading.token, None)
+
+    def _on_chunk(self, token, records):
+        node = self.loading.get(token)
+        if node is not None:
+            self._append(node, records)
+
+    def _on_finished(self, token, error):
+        node = self.loading.pop(token, None)
+        if node is None:
+            return
+        row = len(node.children)
+        self.beginRemoveRows(self._index_of_node(node), row, row)
+        node.loading = None
+        self.endRemoveRows()
+        self._finish(node, error)
+
+    def populate(self, folder_path, records, partial=False):
+        """Заполняет папку готовыми записями (например, из индекса файлов).
+
+        С partial=True в records только часть записей папки (найденные
+        фильтром): папка помечается неполной, и следующие вызовы дописывают
+        в нее недостающие записи. Вызов без partial дополняет папку до полной.
+        Фоновое чтение этой папки, если оно идет, отменяется.
+        """
+        node = self.nodes.get(folder_path)
+        if node is None or not node.is_dir or (node.loaded and not node.partial):
+            return
+        if node.loading is not None:
+            self.cancel_loading(self._index_of_node(node))
+        if not node.loaded:
+            node.partial = partial
+            self._append(node, records)
+            self._finish(node, "")
+            return
+        node.partial = partial
+        self._insert_records(node, [record for record in records if record[1] not in self.nodes])
+
+    def partial_folders(self):
+        """Пути папок, заполненных только частью записей"""
+        return [path for path, node in self.nodes.items() if node.partial]
+
+    def _append(self, node, records):
+        """Добавляет порцию записей в конец папки (перед строкой "Загрузка…")"""
+        if not records:
+            return
+        first = len(node.children)
+        self.beginInsertRows(self._index_of_node(node), first, first + len(records) - 1)
+        children = [FileNode(*record, parent=node) for record in records]
+        node.children.extend(children)
+        self._renumber(node, first)
+        for child in children:
+            self.nodes[child.path] = child
+        self.endInsertRows()
+
+    def _finish(self, node, error):
+        node.loaded = True
+        if error:
+            self.load_failed.emit(node.path, error)
+        # Записи приходили в порядке диска - сортируем папку один раз в конце
+        if len(node.children) > 1:
+            self._sort_folders([node])
+        self.folder_loaded.emit(node.path)
+
+    def _forget_children(self, node):
+        """Убирает записи папки из индекса путей; возвращает прочитанные вложенные папки"""
+        removed = []
+        stack = list(node.children)
+        node.children = []
+        while stack:
+            current = stack.pop()
+            self.nodes.pop(current.path, None)
+            if current.loading is not None:
+                self._stop_task(current)
+                current.loading = None
+            if current.is_dir and current.loaded:
+                removed.append(current.path)
+            stack.extend(current.children)
+        return removed
+
+    # ============= ОБНОВЛЕНИЕ =============
+
+    def refresh_folders(self, paths):
+        """Перечитывает папки в фоне; результат сверяется с деревом в _on_listed.
+
+        Перечитанные записи испускаются сигналом folders_listed, чтобы их
+        не читать с диска второй раз (например, для индекса файлов).
+        """
+        paths = list(paths)
+        if not paths:
+            return
+        self.next_token += 1
+        for path in paths:
+            self.listing[path] = self.next_token
+        self.pool.start(_ListTask(paths, self.next_token, self.signals))
+
+    def _on_listed(self, token, listings):
+        # Папка, которую за это время перечитали снова, ждет более свежий ответ
+        current = {}
+        for path, records in listings.items():
+            if self.listing.get(path) == token:
+                del self.listing[path]
+                current[path] = records
+        for path in [path for path, latest in self.listing.items() if latest == token]:
+            del self.listing[path]
+        for path, records in current.items():
+            self.refresh_folder(path, records)
+        if current:
+            self.folders_listed.emit(current)
+
+    def refresh_folder(self, folder_path, records):
+        """Сверяет прочитанную папку с ее записями на диске: убирает, добавляет и обновляет"""
+        node = self.nodes.get(folder_path)
+        if node is None or not node.is_dir or not node.loaded:
+            return
+        entries = {entry[1]: entry for entry in records}
+
+        parent_index = self._index_of_node(node)
+        changed = False
+        removed = []
+        for child in node.children:
+            entry = entries.pop(child.path, None)
+            if entry is None or entry[2] != child.is_dir:
+                removed.append(child)
+                if entry is not None:
+                    entries[child.path] = entry
+            elif (child.mtime, child.size) != (entry[3], entry[4]):
+                child.mtime, child.size = entry[3], entry[4]
+                changed = True
+                self.dataChanged.emit(self.index(child.row, 1, parent_index),
+                                      self.index(child.row, 2, parent_index))
+        self._remove_nodes(removed)
+        # В неполную папку новые записи не добавляются целиком: найденные
+        # фильтром допишет populate при повторе запроса, остальные - когда
+        # фильтр сбросят
+        if not node.partial:
+            self._insert_records(node, list(entries.values()))
+        # Изменившаяся дата или размер могут сдвинуть запись при сортировке по ним
+        if changed and self.sort_column != 0:
+            self._sort_folders([node])
+
+    def add_paths(self, paths):
+        """Вносит в дерево созданные файлы и папки (например, после вставки).
+
+        Пути в папках, которые еще не прочитаны, пропускаются: они появятся
+        при раскрытии. Уже известные пути только обновляют метаданные.
+        """
+        changed = []
+        retyped = []
+        added = {}  # {папка: [новые записи]}
+        for path in paths:
+            parent = self.nodes.get(os.path.dirname(path))
+            if parent is None or not parent.loaded:
+                continue
+            try:
+                record = stat_path(path)
+            except OSError:
+                continue
+            node = self.nodes.get(path)
+            if node is not None and node.is_dir != record[2]:
+                retyped.append(node)
+                node = None
+            if node is None:
+                added.setdefault(parent, []).append(record)
+            elif (node.mtime, node.size) != (record[3], record[4]):
+                node.mtime, node.size = record[3], record[4]
+                self.dataChanged.emit(self.index_of(path, 1), self.index_of(path, 2))
+                if parent not in changed:
+                    changed.append(parent)
+        self._remove_nodes(retyped)
+        for parent, records in added.items():
+            self._insert_records(parent, records)
+        if changed and self.sort_column != 0:
+            self._sort_folders(changed)
+
+    def remove_paths(self, paths):
+        """Убирает из дерева удаленные или перемещенные файлы и папки"""
+        nodes = self.nodes
+        self._remove_nodes([nodes[path] for path in dict.fromkeys(paths)
+                            if path in nodes and nodes[path] is not self.root])
+
+    def _insert_records(self, node, records):
+        """Вставляет записи в папку на их места по текущей сортировке"""
+        if len(records) > POPULATE_INSERT_LIMIT:
+            # Много записей - одна вставка и одна сортировка вместо поиска места для каждой
+            self._append(node, records)
+            self._sort_folders([node])
+        else:
+            for record in records:
+                self._insert(node, FileNode(*record, parent=node))
+
+    def _remove_nodes(self, nodes):
+        """Убирает записи; много записей одной папки - одной перестройкой папки"""
+        by_parent = {}
+        for node in nodes:
+            by_parent.setdefault(node.parent, []).append(node)
+        for parent, children in by_parent.items():
+            # Запись могла уйти из дерева вместе с убранной раньше папкой
+            children = [child for child in children if self.nodes.get(child.path) is child]
+            if len(children) > POPULATE_INSERT_LIMIT:
+                self._remove_many(parent, children)
+            else:
+                for child in children:
+                    self._remove(child)
+
+    def _remove_many(self, parent, children):
+        """Убирает много записей одной папки: одна перестройка вместо сдвига строк на каждую"""
+        parents = [QPersistentModelIndex(self._index_of_node(parent))]
+        self.layoutAboutToBeChanged.emit(parents)
+        old_indexes = self.persistentIndexList()
+        old_nodes = [(index.internalPointer(), index.column()) for index in old_indexes]
+        removed = []
+        for child in children:
+            self.nodes.pop(child.path, None)
+            if child.is_dir and child.loaded:
+                removed.append(child.path)
+            if child.loading is not None:
+                self._stop_task(child)
+                child.loading = None
+            removed += self._forget_children(child)
+        gone = set(children)
+        parent.children = [child for child in parent.children if child not in gone]
+        self._renumber(parent)
+        # Индексы убранных записей (и всего, что было внутри них) становятся недействительными
+        new_indexes = []
+        for node, column in old_nodes:
+            owner = node if node.path is not None else node.parent
+            if self.nodes.get(owner.path) is owner:
+                new_indexes.append(self.createIndex(node.row, column, node))
+            else:
+                new_indexes.append(QModelIndex())
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit(parents)
+        if removed:
+            self.folders_removed.emit(removed)
+
+    def _insert(self, parent, child):
+        """Вставляет запись на ее место по текущей сортировке (двоичным поиском)"""
+        key = SORT_KEYS[self.sort_column]
+        child_key = key(child)
+        descending = self.sort_order == Qt.SortOrder.DescendingOrder
+        children = parent.children
+        low, high = 0, len(children)
+        while low < high:
+            middle = (low + high) // 2
+            sibling = children[middle]
+            if child.is_dir != sibling.is_dir:
+                before = child.is_dir
+            elif descending:
+                before = child_key > key(sibling)
+            else:
+                before = child_key < key(sibling)
+            if before:
+                high = middle
+            else:
+                low = middle + 1
+        row = low
+        self.beginInsertRows(self._index_of_node(parent), row, row)
+        parent.children.insert(row, child)
+        self._renumber(parent, row)
+        self.nodes[child.path] = child
+        self.endInsertRows()
+
+    def _remove(self, child):
+        parent = child.parent
+        self.beginRemoveRows(self._index_of_node(parent), child.row, child.row)
+        del parent.children[child.row]
+        self._renumber(parent, child.row)
+        self.nodes.pop(child.path, None)
+        removed = [child.path] if child.is_dir and child.loaded else []
+        if child.loading is not None:
+            self._stop_task(child)
+            child.loading = None
+        removed += self._forget_children(child)
+        self.endRemoveRows()
+        if removed:
+            self.folders_removed.emit(removed)
+
+    def _index_of_node(self, node):
+        if node is self.root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    @staticmethod
+    def _renumber(node, start=0):
+        children = node.children
+        for row, child in enumerate(children[start:], start):
+            child.row = row
+        if node.loading is not None:
+            node.loading.placeholder.row = len(children)
+
+    # ============= СОРТИРОВКА =============
+
+    def _sort_folders(self, folders):
+        """Сортирует детей папок, сохраняя выделение и раскрытые ветки"""
+        parents = [QPersistentModelIndex(self._index_of_node(node)) for node in folders]
+        self.layoutAboutToBeChanged.emit(parents, QAbstractItemModel.LayoutChangeHint.VerticalSortHint)
+        old_indexes = self.persistentIndexList()
+        old_nodes = [(index.internalPointer(), index.column()) for index in old_indexes]
+        for node in folders:
+            node.children = self._sorted(node.children)
+            self._renumber(node)
+        self.changePersistentIndexList(
+            old_indexes, [self.createIndex(node.row, column, node) for node, column in old_nodes])
+        self.layoutChanged.emit(parents, QAbstractItemModel.LayoutChangeHint.VerticalSortHint)
+
+    def _sorted(self, nodes):
+        """Папки выше файлов; внутри - по ключу текущей колонки"""
+        key = SORT_KEYS[self.sort_column]
+        reverse = self.sort_order == Qt.SortOrder.DescendingOrder
+        split = 0
+        while split < len(nodes) and nodes[split].is_dir:
+            split += 1
+        if any(map(_is_dir, nodes[split:])):
+            # Порядок диска (папка только что прочитана) - разделяем явно
+            folders = [node for node in nodes if node.is_dir]
+            files = [node for node in nodes if not node.is_dir]
+        else:
+            folders, files = nodes[:split], nodes[split:]
+        folders.sort(key=key, reverse=reverse)
+        files.sort(key=key, reverse=reverse)
+        return folders + files
+
+
+class FileTreeDelegate(QStyledItemDelegate):
+    """Рисует строку дерева и кнопку "+" справа от имени папки"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.hover_path = None  # папка, над кнопкой которой находится курсор
+
+    def add_button_rect(self, option, index):
+        """Прямоугольник кнопки "+" для строки папки (пустой для файлов)"""
+        if index.column() != 0 or not index.model().is_dir(index):
+            return QRect()
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        widget = opt.widget
+        style = widget.style() if widget is not None else None
+        if style is not None:
+            text_rect = style.subElementRect(QStyle.SubElement.SE_ItemViewItemText, opt, widget)
+        else:
+            text_rect = opt.rect
+        x = text_rect.left() + opt.fontMetrics.horizontalAdvance(opt.text) + ADD_BUTTON_SPACING
+        y = opt.rect.top() + (opt.rect.height() - ADD_BUTTON_SIZE) // 2
+        return QRect(x, y, ADD_BUTTON_SIZE, ADD_BUTTON_SIZE)
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        rect = self.add_button_rect(option, index)
+        if rect.isNull():
+            return
+        painter.save()
+        painter.setRenderHint(painter.RenderHint.Antialiasing)
+        if index.data(Qt.ItemDataRole.UserRole) == self.hover_path:
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor("#e0e0e0"))
+            painter.drawRoundedRect(rect, 8, 8)
+        resources.icon(ADD_ICON).paint(painter, rect)
+        painter.restore()
+
+
+class FileTreeView(QTreeView):
+    """Дерево файлов: клик по "+" у папки испускает add_requested вместо выделения"""
+    add_requested = pyqtSignal(str)  # путь папки
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.file_delegate = FileTreeDelegate(self)
+        self.setItemDelegateForColumn(0, self.file_delegate)
+        self.setMouseTracking(True)
+        self.setUniformRowHeights(True)
+        self._add_pressed = None  # папка, на "+" которой нажали (клик не выделяет строку)
+        self._hidden = set()  # пути строк, скрытых фильтром
+
+    def setModel(self, model):
+        super().setModel(model)
+        model.layoutChanged.connect(self._forget_removed_hidden)
+
+    def reset(self):
+        super().reset()
+        self._hidden = set()
+
+    def _forget_removed_hidden(self):
+        # Много записей модель убирает перестройкой папки, без rowsAboutToBeRemoved
+        if self._hidden:
+            nodes = self.model().nodes
+            self._hidden = {path for path in self._hidden if path in nodes}
+
+    def apply_filter(self, visible_paths):
+        """Скрывает прочитанные строки, которых нет в visible_paths (None - показать все).
+
+        Меняются только строки, состояние которых отличается от предыдущего
+        фильтра; содержимое скрытой папки отдельно не скрывается.
+        """
+        model = self.model()
+        hidden = set()
+        if visible_paths is not None:
+            stack = [model.root]
+            while stack:
+                for child in stack.pop().children:
+                    if child.path not in visible_paths:
+                        hidden.add(child.path)
+                    elif child.children:
+                        stack.append(child)
+        nodes = model.nodes
+        self._set_rows_hidden([nodes[path] for path in self._hidden - hidden if path in nodes], False)
+        self._set_rows_hidden([nodes[path] for path in hidden - self._hidden], True)
+        self._hidden = hidden
+
+    def _set_rows_hidden(self, nodes, hide):
+        # Индекс родителя получаем один раз на папку, а не для каждой строки
+        parents = {}
+        for node in nodes:
+            parent = parents.get(node.parent)
+            if parent is None:
+                parent = parents[node.parent] = self.model().index_of(node.parent.path)
+            self.setRowHidden(node.row, parent, hide)
+
+    def rowsAboutToBeRemoved(self, parent, start, end):
+        # Удаленные записи больше не считаются скрытыми (вместе с содержимым папок)
+        if self._hidden:
+            folder = self.model().node(parent)
+            removed = folder.children[start:end + 1]
+            paths = {node.path for node in removed}
+            prefixes = tuple(node.path + os.sep for node in removed if node.children)
+            self._hidden = {path for path in self._hidden
+                            if path not in paths and not (prefixes and path.startswith(prefixes))}
+        super().rowsAboutToBeRemoved(parent, start, end)
+
+    def add_button_at(self, pos):
+        """Путь папки, если в точке viewport находится ее кнопка "+", иначе None"""
+        index = self.indexAt(pos)
+        if not index.isValid() or index.column() != 0:
+            return None
+        option = QStyleOptionViewItem()
+        self.initViewItemOption(option)
+        option.rect = self.visualRect(index)
+        if self.file_delegate.add_button_rect(option, index).contains(pos):
+            return index.data(Qt.ItemDataRole.UserRole)
+        return None
+
+    def mousePressEvent(self, event):
+        path = self.add_button_at(event.position().toPoint())
+        if path is not None and event.button() == Qt.MouseButton.LeftButton:
+            event.accept()
+            self._add_pressed = path
+            return
+        super().mousePressEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        if self._add_pressed is not None:
+            path, self._add_pressed = self._add_pressed, None
+            event.accept()
+            if self.add_button_at(event.position().toPoint()) == path:
+                self.add_requested.emit(path)
+            return
+        super().mouseReleaseEvent(event)
+
+    def mouseMoveEvent(self, event):
+        path = self.add_button_at(event.position().toPoint())
+        if path != self.file_delegate.hover_path:
+            self.file_delegate.hover_path = path
+            self.viewport().update()
+        super().mouseMoveEvent(event)
+
+    def leaveEvent(self, event):
+        if self.file_delegate.hover_path is not None:
+            self.file_delegate.hover_path = None
+            self.viewport().update()
+        super().leaveEvent(event)
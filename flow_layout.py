@@ -0,0 +1,120 @@
+"""
+Поточная раскладка карточек одинакового размера.
+
+Элементы идут рядами слева направо. Позиции пересчитываются целиком только
+когда меняется число колонок (или начало раскладки); при вставке и удалении
+переставляются лишь элементы после измененного места.
+"""
+from PyQt6.QtCore import Qt, QRect, QSize, QPoint
+from PyQt6.QtWidgets import QLayout, QWidgetItem
+
+
+class FlowLayout(QLayout):
+    """Раскладка карточек фиксированного размера item_size по колонкам"""
+
+    def __init__(self, parent=None, item_size=QSize(280, 270), spacing=20, max_columns=0):
+        super().__init__(parent)
+        self._items = []
+        self._item_size = QSize(item_size)
+        self._max_columns = max_columns  # 0 - без ограничения
+        self._columns = 0       # число колонок последней раскладки
+        self._origin = None     # левый верхний угол последней раскладки
+        self._placed = 0        # сколько первых элементов уже стоят на своих местах
+        self.setSpacing(spacing)
+        self.setContentsMargins(0, 0, 0, 0)
+
+    # ============= СОСТАВ =============
+
+    def addItem(self, item):
+        self._items.append(item)
+        self.invalidate()
+
+    def insertWidget(self, index, widget):
+        """Вставляет виджет на позицию index; сдвигаются только элементы после нее"""
+        self.addChildWidget(widget)
+        index = max(0, min(index, len(self._items)))
+        self._items.insert(index, QWidgetItem(widget))
+        self._placed = min(self._placed, index)
+        self.invalidate()
+
+    def count(self):
+        return len(self._items)
+
+    def itemAt(self, index):
+        if 0 <= index < len(self._items):
+            return self._items[index]
+        return None
+
+    def takeAt(self, index):
+        if 0 <= index < len(self._items):
+            item = self._items.pop(index)
+            self._placed = min(self._placed, index)
+            self.invalidate()
+            return item
+        return None
+
+    def indexOf(self, widget):
+        for i, item in enumerate(self._items):
+            if item.widget() is widget:
+                return i
+        return -1
+
+    # ============= ГЕОМЕТРИЯ =============
+
+    def columns_for(self, width):
+        """Число колонок, которое помещается в ширину width"""
+        step = self._item_size.width() + self.spacing()
+        columns = max(1, (width + self.spacing()) // step)
+        if self._max_columns:
+            columns = min(columns, self._max_columns)
+        return columns
+
+    def item_position(self, index, columns, origin):
+        row, column = divmod(index, columns)
+        return QPoint(origin.x() + column * (self._item_size.width() + self.spacing()),
+                      origin.y() + row * (self._item_size.height() + self.spacing()))
+
+    def _height_for_columns(self, columns):
+        rows = (len(self._items) + columns - 1) // columns
+        if rows == 0:
+            return 0
+        return rows * self._item_size.height() + (rows - 1) * self.spacing()
+
+    def hasHeightForWidth(self):
+        return True
+
+    def heightForWidth(self, width):
+        margins = self.contentsMargins()
+        columns = self.columns_for(width - margins.left() - margins.right())
+        return self._height_for_columns(columns) + margins.top() + margins.bottom()
+
+    def expandingDirections(self):
+        return Qt.Orientation(0)
+
+    def sizeHint(self):
+        columns = min(len(self._items), self._max_columns) if self._max_columns else len(self._items)
+        columns = max(1, columns)
+        margins = self.contentsMargins()
+        width = columns * self._item_size.width() + (columns - 1) * self.spacing()
+        return QSize(width + margins.left() + margins.right(),
+                     self._height_for_columns(columns) + margins.top() + margins.bottom())
+
+    def minimumSize(self):
+        margins = self.contentsMargins()
+        return QSize(self._item_size.width() + margins.left() + margins.right(),
+                     self._item_size.height() + margins.top() + margins.bottom())
+
+    def setGeometry(self, rect):
+        super().setGeometry(rect)
+        area = self.contentsRect()
+        columns = self.columns_for(area.width())
+        origin = area.topLeft()
+        if columns != self._columns or origin != self._origin:
+            # Колонок стало другое число - переставляем все
+            self._columns = columns
+            self._origin = origin
+            self._placed = 0
+        for index in range(self._placed, len(self._items)):
+            self._items[index].setGeometry(
+                QRect(self.item_position(index, columns, origin), self._item_size))
+        self._placed = len(self._items)
@@ -0,0 +1,257 @@
+"""
+Наблюдение за файловой системой.
+
+PathWatcher собирает события QFileSystemWatcher, объединяет их и после
+небольшой паузы отдает одним списком путей. Для больших деревьев, когда
+QFileSystemWatcher упирается в лимиты, на Linux используется inotify напрямую.
+Пути, которые не удалось поставить под наблюдение ни так, ни так (другие
+системы, исчерпан лимит inotify), периодически опрашиваются через stat.
+"""
+import os
+import sys
+import struct
+import ctypes
+import ctypes.util
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QSocketNotifier, QTimer, pyqtSignal
+
+# Сколько путей отдаем QFileSystemWatcher, остальные - в inotify (если он доступен)
+MAX_QT_WATCHES = 4096
+
+# Задержка, в течение которой события объединяются (мс)
+DEFAULT_DEBOUNCE_MS = 300
+
+# Период опроса путей, которые не удалось поставить под наблюдение (мс)
+POLL_INTERVAL_MS = 5000
+
+
+def _stat_signature(path):
+    """Отпечаток пути для опроса: (mtime, размер, inode) или None, если пути нет"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class InotifyBackend(QObject):
+    """Минимальная обертка над inotify через ctypes"""
+    path_changed = pyqtSignal(str)
+    watch_dropped = pyqtSignal(str)  # ядро сняло наблюдение с пути
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_IGNORED = 0x00008000
+
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                  IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+    EVENT_HEADER = struct.Struct("iIII")
+
+    _libc = None
+
+    @classmethod
+    def available(cls):
+        """Проверяет, можно ли использовать inotify на этой системе"""
+        if not sys.platform.startswith('linux'):
+            return False
+        if cls._libc is None:
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+                libc.inotify_init1
+                libc.inotify_add_watch
+                libc.inotify_rm_watch
+                cls._libc = libc
+            except (OSError, AttributeError):
+                cls._libc = False
+        return bool(cls._libc)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths_by_wd = {}
+        self.wd_by_path = {}
+        self.notifier = QSocketNotifier(self.fd, QSocketNotifier.Type.Read, self)
+        self.notifier.activated.connect(self._read_events)
+
+    def add_path(self, path):
+        if path in self.wd_by_path:
+            return True
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            return False
+        self.paths_by_wd[wd] = path
+        self.wd_by_path[path] = wd
+        return True
+
+    def remove_path(self, path):
+        wd = self.wd_by_path.pop(path, None)
+        if wd is not None:
+            self.paths_by_wd.pop(wd, None)
+            self._libc.inotify_rm_watch(self.fd, wd)
+
+    def paths(self):
+        return list(self.wd_by_path)
+
+    def _read_events(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + self.EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size + length
+            path = self.paths_by_wd.get(wd)
+            if path is None:
+                continue
+            if mask & self.IN_IGNORED:
+                # Ядро само сняло наблюдение: путь удален или файл подменен
+                # через os.replace (тогда путь есть, но это уже другой inode)
+                self.paths_by_wd.pop(wd, None)
+                self.wd_by_path.pop(path, None)
+                self.watch_dropped.emit(path)
+            self.path_changed.emit(path)
+
+    def close(self):
+        self.notifier.setEnabled(False)
+        os.close(self.fd)
+
+
+class PathWatcher(QObject):
+    """Следит за набором файлов и папок и сообщает об изменениях пачками.
+
+    Сигнал paths_changed приходит один раз после паузы в событиях и содержит
+    каждый изменившийся путь ровно один раз.
+    """
+    paths_changed = pyqtSignal(list)
+
+    def __init__(self, debounce_ms=DEFAULT_DEBOUNCE_MS, parent=None):
+        super().__init__(parent)
+        self.qt_watcher = QFileSystemWatcher(self)
+        self.qt_watcher.fileChanged.connect(self._on_file_changed)
+        self.qt_watcher.directoryChanged.connect(self._on_path_changed)
+        self.inotify = None
+
+        # Пути без наблюдения: {путь: отпечаток}, проверяются по таймеру
+        self.polled = {}
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(POLL_INTERVAL_MS)
+        self.poll_timer.timeout.connect(self._poll)
+
+        self.pending = set()
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(debounce_ms)
+        self.debounce_timer.timeout.connect(self._flush)
+
+    def _fallback(self):
+        """Возвращает inotify-бэкенд, создавая его при первой необходимости"""
+        if self.inotify is None and InotifyBackend.available():
+            try:
+                self.inotify = InotifyBackend(self)
+                self.inotify.path_changed.connect(self._on_path_changed)
+                self.inotify.watch_dropped.connect(self._on_watch_dropped)
+            except OSError as e:
+                print(f"Не удалось инициализировать inotify: {e}")
+                self.inotify = False
+        return self.inotify or None
+
+    def watched(self):
+        """Возвращает множество путей под наблюдением"""
+        paths = set(self.qt_watcher.files()) | set(self.qt_watcher.directories())
+        if self.inotify:
+            paths.update(self.inotify.paths())
+        paths.update(self.polled)
+        return paths
+
+    def add_paths(self, paths):
+        """Добавляет пути под наблюдение (уже наблюдаемые пропускаются)"""
+        current = self.watched()
+        paths = [path for path in dict.fromkeys(paths) if path not in current and os.path.exists(path)]
+        if not paths:
+            return
+
+        qt_count = len(self.qt_watcher.files()) + len(self.qt_watcher.directories())
+        room = max(0, MAX_QT_WATCHES - qt_count)
+        failed = self.qt_watcher.addPaths(paths[:room]) if room else []
+        failed = list(failed) + paths[room:]
+
+        if failed:
+            backend = self._fallback()
+            not_watched = [path for path in failed if not (backend and backend.add_path(path))]
+            if not_watched:
+                print(f"Не удалось поставить под наблюдение {len(not_watched)} путей, "
+                      f"они будут проверяться раз в {POLL_INTERVAL_MS // 1000} с")
+                for path in not_watched:
+                    self.polled[path] = _stat_signature(path)
+                self.poll_timer.start()
+
+    def remove_paths(self, paths):
+        """Снимает пути с наблюдения"""
+        paths = list(paths)
+        if not paths:
+            return
+        qt_paths = set(self.qt_watcher.files()) | set(self.qt_watcher.directories())
+        qt_remove = [path for path in paths if path in qt_paths]
+        if qt_remove:
+            self.qt_watcher.removePaths(qt_remove)
+        if self.inotify:
+            for path in paths:
+                self.inotify.remove_path(path)
+        for path in paths:
+            self.polled.pop(path, None)
+        if not self.polled:
+            self.poll_timer.stop()
+
+    def clear(self):
+        """Снимает все наблюдения и сбрасывает накопленные события"""
+        self.remove_paths(self.watched())
+        self.pending.clear()
+        self.debounce_timer.stop()
+
+    def _on_file_changed(self, path):
+        # Файлы, перезаписанные через удаление и создание, выпадают из наблюдения
+        if os.path.exists(path) and path not in self.qt_watcher.files():
+            self.qt_watcher.addPath(path)
+        self._on_path_changed(path)
+
+    def _on_watch_dropped(self, path):
+        # Как и у QFileSystemWatcher, подмененный файл ставим под наблюдение снова;
+        # удаленный путь (или если наблюдение не встало) проверяем опросом
+        if os.path.exists(path) and self.inotify.add_path(path):
+            return
+        self.polled[path] = _stat_signature(path)
+        self.poll_timer.start()
+
+    def _poll(self):
+        """Сверяет отпечатки опрашиваемых путей; исчезнувшие снимаются с опроса"""
+        for path, signature in list(self.polled.items()):
+            current = _stat_signature(path)
+            if current == signature:
+                continue
+            if current is None:
+                del self.polled[path]
+            else:
+                self.polled[path] = current
+            self._on_path_changed(path)
+        if not self.polled:
+            self.poll_timer.stop()
+
+    def _on_path_changed(self, path):
+        self.pending.add(path)
+        self.debounce_timer.start()
+
+    def _flush(self):
+        paths = sorted(self.pending)
+        self.pending.clear()
+        if paths:
+            self.paths_changed.emit(paths)
@@ -0,0 +1,108 @@
+"""
+Реестр групп проектов.
+
+Хранит группы под постоянными идентификаторами (UUID, сохраняются в
+groups.json) и индекс "путь проекта -> группа", чтобы проверка и изменение
+состава групп не требовали перебора всех групп и сравнения словарей.
+"""
+import uuid
+
+
+def project_key(project):
+    """Ключ проекта в индексе: нормализованный путь"""
+    path = project["path"] if isinstance(project, dict) else project
+    return path.replace("\\", "/")
+
+
+class GroupRegistry:
+    """Группы библиотеки с индексом участников.
+
+    Поддерживает чтение как словарь {group_id: группа} (values, items, get,
+    in, len), поэтому заменяет прежний словарь project_groups. Состав
+    индекса обновляется по сигналам project_added/project_removed группы.
+    """
+
+    def __init__(self):
+        self._groups = {}    # {group_id: группа}
+        self._group_of = {}  # {путь проекта: group_id}
+
+    @staticmethod
+    def new_id():
+        """Создает новый идентификатор группы"""
+        return uuid.uuid4().hex
+
+    # ============= ГРУППЫ =============
+
+    def add(self, group, group_id=None):
+        """Регистрирует группу и ее проекты; возвращает идентификатор"""
+        if group_id is None or group_id in self._groups:
+            group_id = self.new_id()
+        group.group_id = group_id
+        self._groups[group_id] = group
+        for project in group.projects:
+            self._group_of[project_key(project)] = group_id
+        group.project_added.connect(lambda project, gid=group_id: self.attach(gid, project))
+        group.project_removed.connect(lambda project, gid=group_id: self.detach(project, gid))
+        return group_id
+
+    def remove(self, group):
+        """Убирает группу из реестра; принимает группу или ее идентификатор"""
+        group_id = group if isinstance(group, str) else getattr(group, 'group_id', None)
+        group = self._groups.pop(group_id, None)
+        if group is None:
+            return None
+        for project in group.projects:
+            key = project_key(project)
+            if self._group_of.get(key) == group_id:
+                del self._group_of[key]
+        return group
+
+    def clear(self):
+        self._groups.clear()
+        self._group_of.clear()
+
+    # ============= УЧАСТНИКИ =============
+
+    def attach(self, group_id, project):
+        """Отмечает, что проект теперь состоит в группе group_id"""
+        if group_id in self._groups:
+            self._group_of[project_key(project)] = group_id
+
+    def detach(self, project, group_id=None):
+        """Снимает отметку о группе проекта (только от group_id, если он указан)"""
+        key = project_key(project)
+        if group_id is None or self._group_of.get(key) == group_id:
+            self._group_of.pop(key, None)
+
+    def group_of(self, project):
+        """Возвращает группу, в которой состоит проект (по словарю или пути), или None"""
+        group_id = self._group_of.get(project_key(project))
+        return self._groups.get(group_id) if group_id is not None else None
+
+    def same_group(self, first, second):
+        """Проверяет, что оба проекта состоят в одной группе"""
+        group_id = self._group_of.get(project_key(first))
+        return group_id is not None and group_id == self._group_of.get(project_key(second))
+
+    # ============= ДОСТУП КАК К СЛОВАРЮ =============
+
+    def get(self, group_id, default=None):
+        return self._groups.get(group_id, default)
+
+    def keys(self):
+        return self._groups.keys()
+
+    def values(self):
+        return self._groups.values()
+
+    def items(self):
+        return self._groups.items()
+
+    def __contains__(self, group_id):
+        return group_id in self._groups
+
+    def __iter__(self):
+        return iter(self._groups)
+
+    def __len__(self):
+        return len(self._groups)
@@ -0,0 +1,181 @@
+"""
+Фоновое сканирование библиотеки проектов.
+
+Сканер работает в QThreadPool и отдает записи о проектах пачками, чтобы
+карточки появлялись постепенно, не блокируя отрисовку окна. Сначала
+отдаются проекты из каталога (новые сверху), затем - поправки по мере
+сверки с диском.
+"""
+import threading
+import traceback
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+# Количество записей в одной пачке
+BATCH_SIZE = 40
+
+
+class ScanRecord:
+    """Одна запись потока сканирования"""
+    GROUP = "group"        # группа: group_id, name, projects
+    PROJECT = "project"    # отдельный проект: project_info
+    MEMBER = "member"      # новый проект в уже известной группе: group_id, name, project_info
+    CHANGED = "changed"    # метаданные проекта изменились: path, project_info
+    REMOVED = "removed"    # папка проекта исчезла: path
+
+    def __init__(self, kind, **data):
+        self.kind = kind
+        self.data = data
+
+    def __repr__(self):
+        return f"ScanRecord({self.kind}, {self.data})"
+
+
+class _ScanSignals(QObject):
+    batch_ready = pyqtSignal(list)
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(list)  # пути всех найденных проектов
+    failed = pyqtSignal(str)
+
+
+class _ScanTask(QRunnable):
+    def __init__(self, catalog, signals, cancel_event):
+        super().__init__()
+        self.catalog = catalog
+        self.signals = signals
+        self.cancel_event = cancel_event
+        self.batch = []
+
+    def _push(self, record):
+        self.batch.append(record)
+        if len(self.batch) >= BATCH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if self.batch and not self.cancel_event.is_set():
+            self.signals.batch_ready.emit(self.batch)
+        self.batch = []
+
+    def _push_changes(self, changes, group_of):
+        """Записи для порции изменений: участники групп - в порядке groups.json,
+        остальные новые проекты - новые сверху"""
+        for path, project_info in changes.changed.items():
+            self._push(ScanRecord(ScanRecord.CHANGED, path=path, project_info=project_info))
+        members = sorted((path for path in changes.added if path in group_of),
+                         key=lambda path: group_of[path][2])
+        for path in members:
+            group_id, name, _ = group_of[path]
+            self._push(ScanRecord(ScanRecord.MEMBER, group_id=group_id,
+                                  name=name, project_info=changes.added[path]))
+        added = sorted((info for path, info in changes.added.items() if path not in group_of),
+                       key=lambda x: x["created"], reverse=True)
+        for project_info in added:
+            self._push(ScanRecord(ScanRecord.PROJECT, project_info=project_info))
+        self._flush()
+
+    def run(self):
+        try:
+            # 1. Быстрый проход по каталогу: показываем то, что было в прошлый раз
+            cached = self.catalog.cached_projects()
+            groups_info = self.catalog.load_groups()
+            group_of = {}
+            total = len(cached)
+
+            for group_id, group_data in groups_info.items():
+                members = []
+                for project in group_data["projects"]:
+                    group_of[project["path"]] = (group_id, group_data["name"], len(group_of))
+                    if project["path"] in cached:
+                        members.append(cached[project["path"]])
+                if members:
+                    self._push(ScanRecord(ScanRecord.GROUP, group_id=group_id,
+                                          name=group_data["name"], projects=members))
+
+            loose = [info for path, info in cached.items() if path not in group_of]
+            for done, project_info in enumerate(sorted(loose, key=lambda x: x["created"], reverse=True)):
+                if self.cancel_event.is_set():
+                    return
+                self._push(ScanRecord(ScanRecord.PROJECT, project_info=project_info))
+                if done % BATCH_SIZE == 0:
+                    self.signals.progress.emit(done, total)
+            self._flush()
+
+            # 2. Сверка с диском: добавляем, обновляем и убираем только изменения.
+            # Новые и измененные проекты отдаются порциями по ходу сверки
+            changes = self.catalog.rescan(
+                progress=lambda done, total: self.signals.progress.emit(done, total),
+                cancel_event=self.cancel_event,
+                on_changes=lambda batch: self._push_changes(batch, group_of))
+            if self.cancel_event.is_set():
+                return
+
+            for path in changes.removed:
+                self._push(ScanRecord(ScanRecord.REMOVED, path=path))
+            self._flush()
+
+            paths = [path for path in cached if path not in changes.removed] + list(changes.added)
+            self.signals.finished.emit(paths)
+
+        except Exception as e:
+            print(f"Ошибка сканирования библиотеки: {e}")
+            traceback.print_exc()
+            self.signals.failed.emit(str(e))
+        finally:
+            self.catalog.close()
+
+
+class LibraryScanner(QObject):
+    """Запускает фоновое сканирование и передает его результаты в GUI-поток"""
+    batch_ready = pyqtSignal(list)  # список ScanRecord
+    progress = pyqtSignal(int, int)  # готово, всего
+    finished = pyqtSignal(list)  # пути всех найденных проектов
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.cancel_event = None
+        self.signals = None
+
+    def is_running(self):
+        return self.cancel_event is not None and not self.cancel_event.is_set()
+
+    def start(self, catalog):
+        """Запускает сканирование, отменяя предыдущее"""
+        self.cancel()
+        self.cancel_event = threading.Event()
+        self.signals = _ScanSignals()
+        self.signals.batch_ready.connect(self._on_batch)
+        self.signals.progress.connect(self._on_progress)
+        self.signals.finished.connect(self._on_finished)
+        self.signals.failed.connect(self._on_failed)
+        self.pool.start(_ScanTask(catalog, self.signals, self.cancel_event))
+
+    def cancel(self):
+        """Отменяет текущее сканирование; уже полученные пачки остаются"""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+        if self.signals is not None:
+            self.signals.batch_ready.disconnect()
+            self.signals.finished.disconnect()
+            self.signals.failed.disconnect()
+            self.signals.progress.disconnect()
+            self.signals = None
+
+    def _on_progress(self, done, total):
+        if self.is_running():
+            self.progress.emit(done, total)
+
+    def _on_batch(self, records):
+        if self.is_running():
+            self.batch_ready.emit(records)
+
+    def _on_finished(self, paths):
+        if self.is_running():
+            self.cancel_event.set()
+            self.finished.emit(paths)
+
+    def _on_failed(self, message):
+        if self.is_running():
+            self.cancel_event.set()
+            self.failed.emit(message)
@@ -39,17 +39,28 @@ try:
     from datetime import datetime
     from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QPushButton,
                                QVBoxLayout, QHBoxLayout, QLabel, QFrame, QLineEdit,
-                               QScrollArea, QDialog, QGridLayout, QFileDialog, QMessageBox)
+                               QDialog, QFileDialog, QMessageBox,
+                               QProgressBar, QAbstractItemView)
     from PyQt6.QtCore import Qt
     from PyQt6.QtGui import QPainter, QPen, QColor
     from settings_dialog import SettingsDialog
     from create_project_dialog import CreateProjectDialog
-    from project_card import ProjectCard
+    from project_grid import ProjectGridModel, ProjectGridView
     from project_group import ProjectGroup
     from project_window import ProjectWindow
+    from project_catalog import ProjectCatalog
+    from fs_watcher import PathWatcher
+    from library_scanner import LibraryScanner, ScanRecord
+    from metadata_writer import MetadataWriter
+    from metadata_loader import workers_for_root
+    from group_registry import GroupRegistry
+    from project_stats import ProjectStatsService, set_shared_service
+    from thumbnail_cache import ThumbnailLoader, set_shared_loader
+    from search_index import SearchIndex, FULL_RANK_LIMIT
+    from resources import apply_app_style
     from styles import (MAIN_WINDOW_STYLE, RIGHT_PANEL_STYLE, 
                        SECTION_TITLE_STYLE, PROJECT_CARD_STYLE,
-                       SCROLL_AREA_STYLE, SIZES)
+                       SCROLL_AREA_STYLE)
     print("Импорт PyQt6 успешен")
 except ImportError as e:
     print(f"Ошибка импорта: {e}")
@@ -62,6 +73,8 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.setWindowTitle("Менеджер проектов")
         self.setStyleSheet(MAIN_WINDOW_STYLE)
+        # Стили карточек, попапов групп и дерева файлов - одна таблица на приложение
+        apply_app_style()
         
         # Создаем главный виджет и горизонтальный layout
         main_widget = QWidget()
@@ -100,6 +113,20 @@ class MainWindow(QMainWindow):
         top_panel.addWidget(settings_btn)
         left_layout.addLayout(top_panel)
         
+        # Индикатор фонового сканирования библиотеки
+        self.scan_panel = QWidget()
+        scan_layout = QHBoxLayout(self.scan_panel)
+        scan_layout.setContentsMargins(0, 0, 0, 0)
+        self.scan_progress = QProgressBar()
+        self.scan_progress.setTextVisible(False)
+        self.scan_progress.setFixedHeight(8)
+        scan_cancel_btn = QPushButton("Отмена")
+        scan_cancel_btn.clicked.connect(self.cancel_scan)
+        scan_layout.addWidget(self.scan_progress)
+        scan_layout.addWidget(scan_cancel_btn)
+        self.scan_panel.hide()
+        left_layout.addWidget(self.scan_panel)
+        
         # Область со всеми проектами
         all_projects = QFrame()
         all_projects.setObjectName("projects_container")
@@ -108,21 +135,22 @@ class MainWindow(QMainWindow):
         all_title.setStyleSheet(SECTION_TITLE_STYLE)
         all_layout.addWidget(all_title)
         
-        # Контейнер с прокруткой для всех проектов
-        self.all_projects_container = QWidget()
-        self.all_projects_container.setObjectName("all_projects_container")
-        self.all_projects_layout = QGridLayout(self.all_projects_container)
-        self.all_projects_layout.setSpacing(20)
-        self.all_projects_layout.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
-        
-        all_scroll = QScrollArea()
-        all_scroll.setWidget(self.all_projects_container)
-        all_scroll.setWidgetResizable(True)
-        all_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        all_scroll.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        all_scroll.setStyleSheet(SCROLL_AREA_STYLE)
-        all_scroll.widget().setObjectName("scrollAreaWidgetContents")
-        all_layout.addWidget(all_scroll)
+        # Сетка проектов: карточки рисуются делегатом только для видимых строк
+        # Статистика и миниатюры превью загружаются в фоне для видимых карточек
+        self.stats_service = ProjectStatsService(self.get_catalog, parent=self)
+        set_shared_service(self.stats_service)
+        self.thumbnail_loader = ThumbnailLoader(self)
+        set_shared_loader(self.thumbnail_loader)
+        self.project_model = ProjectGridModel(self.stats_service, self.thumbnail_loader, self)
+        self.project_view = ProjectGridView()
+        self.project_view.setModel(self.project_model)
+        self.project_view.setStyleSheet(SCROLL_AREA_STYLE)
+        self.project_view.project_clicked.connect(self.open_project)
+        self.project_view.deleted.connect(self.delete_project)
+        self.project_view.favorite_changed.connect(self.update_favorite)
+        self.project_view.group_created.connect(self.create_project_group)
+        self.project_view.project_dropped.connect(self.move_project_to_grid)
+        all_layout.addWidget(self.project_view)
         left_layout.addWidget(all_projects)
         
         main_layout.addWidget(left_widget, stretch=7)
@@ -140,13 +168,24 @@ class MainWindow(QMainWindow):
         self.favorites_layout.addStretch()
         main_layout.addWidget(right_panel, stretch=3)
         
-        # Инициализируем переменные для адаптивной сетки
-        self.min_card_width = 250  # Минимальная ширина карточки
-        self.card_spacing = 20     # Расстояние между карточками
-        
         # Словари для хранения групп и открытых окон
-        self.project_groups = {}  # Словарь для хранения групп проектов
+        self.project_groups = GroupRegistry()  # Группы проектов с индексом участников
+        self.search_index = SearchIndex()  # Индекс для поиска по названию, тегам и описанию
         self.project_windows = {}  # Словарь для хранения открытых окон проектов
+        self.catalog = None  # Каталог метаданных текущей библиотеки
+        self._bulk_update = False  # Массовое обновление: не сохраняем и не перестраиваем сетку на каждой карточке
+        self.metadata_writer = MetadataWriter(self.get_catalog, parent=self)  # Отложенная запись метаданных
+        
+        # Фоновое сканирование библиотеки
+        self.scanner = LibraryScanner(self)
+        self.scanner.batch_ready.connect(self.on_scan_batch)
+        self.scanner.progress.connect(self.on_scan_progress)
+        self.scanner.finished.connect(self.on_scan_finished)
+        self.scanner.failed.connect(self.on_scan_failed)
+        
+        # Наблюдение за папкой проектов: обновляем только затронутые карточки
+        self.library_watcher = PathWatcher(parent=self)
+        self.library_watcher.paths_changed.connect(self.on_library_paths_changed)
         
         # Загружаем настройки и существующие проекты
         self.load_settings()
@@ -155,36 +194,14 @@ class MainWindow(QMainWindow):
         # Устанавливаем минимальный размер окна
         self.setMinimumSize(800, 600)
     
-    def resizeEvent(self, event):
-        """Обработчик изменения размера окна"""
-        super().resizeEvent(event)
-        self.update_grid_layout()
-    
     def update_grid_layout(self):
-        """Обновляет расположение карточек в сетке"""
-        # Получаем ширину области для карточек
-        scroll_width = self.all_projects_container.width()
-        
-        # Вычисляем максимальное количество колонок
-        # Учитываем фиксированную ширину карточки и отступы
-        card_width = int(SIZES['card_width'].replace('px', ''))
-        max_cols = max(1, (scroll_width - self.card_spacing) // (card_width + self.card_spacing))
-        
-        # Собираем все карточки
-        cards = []
-        while self.all_projects_layout.count():
-            item = self.all_projects_layout.takeAt(0)
-            if item.widget():
-                cards.append(item.widget())
+        """Обновляет расположение карточек в сетке.
         
-        # Распределяем карточки по новой сетке
-        for i, card in enumerate(cards):
-            row = i // max_cols
-            col = i % max_cols
-            self.all_projects_layout.addWidget(card, row, col)
-        
-        # Устанавливаем отступы
-        self.all_projects_layout.setSpacing(self.card_spacing)
+        Раскладкой занимается ProjectGridView (в том числе при изменении
+        размера окна), здесь только применяется текущий фильтр поиска.
+        """
+        if self.search_input.text():
+            self.filter_projects()
     
     def show_settings(self):
         dialog = SettingsDialog(self)
@@ -193,18 +210,26 @@ class MainWindow(QMainWindow):
     
     def on_settings_changed(self, settings):
         """Обработчик изменения настроек"""
+        # Дописываем изменения в текущую библиотеку до смены настроек
+        self.metadata_writer.flush()
         # Сохраняем новые настройки
         self.settings = settings
         # Перезагружаем проекты
         self.reload_projects()
     
     def reload_projects(self):
-        """Перезагружает все карточки проектов"""
+        """Обновляет библиотеку проектов.
+        
+        Если папка проектов не менялась, применяются только изменения
+        с последнего снимка каталога, иначе все карточки перестраиваются.
+        """
+        projects_dir = self.settings.get('projects_path', '')
+        if self.catalog is not None and self.catalog.projects_dir == projects_dir.replace("\\", "/"):
+            self.refresh_projects()
+            return
+        
         # Удаляем все существующие карточки
-        while self.all_projects_layout.count():
-            item = self.all_projects_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
+        self.clear_projects()
         
         # Очищаем избранное
         while self.favorites_layout.count() > 1:  # Оставляем заголовок
@@ -214,15 +239,178 @@ class MainWindow(QMainWindow):
         
         # Очищаем группы
         self.project_groups.clear()
+        self.metadata_writer.reset()
+        self.stats_service.reset()
+        self.thumbnail_loader.clear()
         
         # Загружаем проекты заново
         self.load_projects()
     
+    def refresh_projects(self):
+        """Добавляет, удаляет и обновляет только изменившиеся карточки"""
+        try:
+            projects_dir = self.settings.get('projects_path', '')
+            if not projects_dir or not os.path.exists(projects_dir):
+                return
+            
+            changes = self.get_catalog().rescan()
+            if not changes:
+                return
+            
+            # Метаданные уже прочитаны с диска, записывать их обратно не нужно
+            self._bulk_update = True
+            for project_path in changes.removed:
+                self.remove_project_by_path(project_path)
+            
+            for project_path, project_info in changes.changed.items():
+                if not self.update_project_card(project_path, project_info):
+                    changes.added[project_path] = project_info
+            
+            for project_info in sorted(changes.added.values(), key=lambda x: x["created"], reverse=True):
+                # Проект мог быть уже показан прерванным сканированием
+                if not self.update_project_card(project_info["path"], project_info):
+                    self.add_project(project_info)
+            
+            self.update_grid_layout()
+            self.watch_library(self.catalog.projects_dir, list(changes.added) + list(changes.changed))
+            
+        except Exception as e:
+            print(f"Error refreshing projects: {e}")
+            traceback.print_exc()
+        finally:
+            self._bulk_update = False
+    
+    def refresh_project(self, project_path):
+        """Сверяет с диском один проект и обновляет только его карточку"""
+        try:
+            changes = self.get_catalog().rescan([project_path])
+            if not changes:
+                return
+            
+            self._bulk_update = True
+            for path in changes.removed:
+                self.remove_project_by_path(path)
+            for path, project_info in changes.changed.items():
+                if not self.update_project_card(path, project_info):
+                    changes.added[path] = project_info
+            for project_info in changes.added.values():
+                self.add_project(project_info)
+            if changes.added or changes.removed:
+                self.update_grid_layout()
+        except Exception as e:
+            print(f"Error refreshing project {project_path}: {e}")
+            traceback.print_exc()
+        finally:
+            self._bulk_update = False
+    
+    def watch_library(self, projects_dir, project_paths):
+        """Ставит под наблюдение корень библиотеки и файлы указанных проектов"""
+        paths = [projects_dir]
+        for project_path in project_paths:
+            project_path = project_path.replace("\\", "/")
+            paths.append(project_path)
+            paths.append(f"{project_path}/preview.png")
+            paths.append(f"{project_path}/project_info.json")
+        self.library_watcher.add_paths(paths)
+    
+    def on_library_paths_changed(self, paths):
+        """Обрабатывает объединенные события наблюдателя библиотеки"""
+        if self.catalog is None:
+            return
+        projects_dir = self.catalog.projects_dir
+        rescan_library = False
+        
+        for path in paths:
+            path = path.replace("\\", "/")
+            if path == projects_dir:
+                # Проекты добавлены, удалены или переименованы
+                rescan_library = True
+                continue
+            
+            name = os.path.basename(path)
+            parent = os.path.dirname(path)
+            if name == "preview.png" and parent != projects_dir:
+                # Обновляем только превью одной карточки
+                self.refresh_preview(parent)
+            elif name == "project_info.json" and parent != projects_dir:
+                self.refresh_project(parent)
+            elif parent == projects_dir:
+                # Изменилось содержимое папки проекта: файлы могли появиться или пропасть
+                self.refresh_project(path)
+                self.stats_service.invalidate(path)
+                if self.refresh_preview(path):
+                    self.watch_library(projects_dir, [path])
+        
+        if rescan_library:
+            self.refresh_projects()
+    
+    def find_project(self, project_path):
+        """Ищет проект по пути: возвращает (карточка или None, группа или None, данные проекта).
+        
+        Карточка есть только у проектов внутри групп и только пока открыт
+        попап группы; проекты общей сетки рисуются делегатом, для них
+        возвращается (None, None, данные).
+        """
+        project_path = project_path.replace("\\", "/")
+        row = self.project_model.row_of(project_path)
+        if row >= 0:
+            return None, None, self.project_model.project_at(row)
+        group = self.project_groups.group_of(project_path)
+        if group is not None:
+            project_info = group.member(project_path)
+            if project_info is not None:
+                return group.card_for(project_path), group, project_info
+        return None, None, None
+    
+    def refresh_preview(self, project_path):
+        """Перечитывает превью проекта; возвращает False, если проект не найден"""
+        card, group, project_info = self.find_project(project_path)
+        if group is not None:
+            group.refresh_preview(project_path)
+            return True
+        return self.project_model.update_project(project_path, refresh_preview=True)
+    
+    def update_project_card(self, project_path, project_info):
+        """Обновляет карточку проекта новыми метаданными"""
+        card, group, old_info = self.find_project(project_path)
+        if old_info is None:
+            return False
+        
+        was_favorite = old_info.get("favorite", False)
+        if was_favorite:
+            self.remove_from_favorites(old_info)
+        self.search_index.add(project_info)
+        if project_info is not old_info:
+            # Обновляем словарь на месте, чтобы ссылки в группах и избранном остались актуальными
+            old_info.clear()
+            old_info.update(project_info)
+        if card is not None:
+            card.set_project_info(old_info)
+        else:
+            self.project_model.update_project(project_path, refresh_preview=True)
+        if old_info.get("favorite", False):
+            self.add_to_favorites(old_info)
+        if group is not None:
+            group.update_info()
+        return True
+    
+    def remove_project_by_path(self, project_path):
+        """Убирает из интерфейса проект, папка которого исчезла"""
+        card, group, project_info = self.find_project(project_path)
+        if project_info is None:
+            return
+        if group is not None:
+            if project_info.get("favorite", False):
+                self.remove_from_favorites(project_info)
+            group.remove_project(project_info)
+            self.search_index.remove(project_info)
+        else:
+            self.delete_project(project_info)
+    
     def show_create_project_dialog(self):
         dialog = CreateProjectDialog(self)
         if dialog.exec() and dialog.project_data:
             self.add_project(dialog.project_data)
-            self.save_projects()
     
     def restore_missing_projects(self):
         """Восстанавливает проекты, которые есть в файловой системе, но отсутствуют в интерфейсе"""
@@ -233,33 +421,18 @@ class MainWindow(QMainWindow):
                 return
             
             # Собираем все существующие пути проектов
-            existing_paths = set()
-            for i in range(self.all_projects_layout.count()):
-                item = self.all_projects_layout.itemAt(i)
-                if item and item.widget():
-                    widget = item.widget()
-                    if isinstance(widget, ProjectCard):
-                        existing_paths.add(widget.project_info["path"])
-                    elif isinstance(widget, ProjectGroup):
-                        for project in widget.projects:
-                            existing_paths.add(project["path"])
+            existing_paths = {project["path"] for project in self.project_model.projects()}
+            for group in self.project_groups.values():
+                for project in group.projects:
+                    existing_paths.add(project["path"])
             
-            # Проверяем каждую папку в директории проектов
-            for project_name in os.listdir(projects_dir):
-                project_path = os.path.join(projects_dir, project_name).replace("\\", "/")
-                if os.path.isdir(project_path) and project_path not in existing_paths:
-                    # Создаем новую информацию о проекте
-                    project_info = {
-                        "name": project_name,
-                        "path": project_path,
-                        "created": os.path.getctime(project_path),
-                        "favorite": False
-                    }
-                    # Добавляем проект
+            # Сверяем каталог с файловой системой и добавляем недостающие проекты
+            for project_path, project_info in self.get_catalog().sync_projects().items():
+                if project_path not in existing_paths:
                     self.add_project(project_info)
             
             # Сохраняем изменения
-            self.save_projects()
+            self.save_projects(())
             
         except Exception as e:
             print(f"Error in restore_missing_projects: {e}")
@@ -291,116 +464,112 @@ class MainWindow(QMainWindow):
             }
 
     def load_projects(self):
+        """Запускает фоновую загрузку библиотеки: карточки появляются пачками"""
         try:
             # Очищаем существующие проекты и группы
+            self.scanner.cancel()
             self.clear_projects()
             self.project_groups.clear()
+            self.library_watcher.clear()
             
             # Получаем путь к каталогу проектов из настроек
             projects_dir = self.settings.get('projects_path', '')
             if not projects_dir or not os.path.exists(projects_dir):
                 return
             
-            # Словарь для хранения информации о проектах
-            projects_info = {}
-            groups_info = {}
-            
-            # Список служебных папок, которые нужно исключить
-            excluded_dirs = {'backups', 'archives', 'exports', '.temp_archive'}
-            
-            # Сканируем каталог проектов
-            for project_name in os.listdir(projects_dir):
-                if project_name in excluded_dirs:
-                    continue
-                    
-                project_path = os.path.join(projects_dir, project_name).replace("\\", "/")
-                if not os.path.isdir(project_path):
-                    continue
-                
-                # Путь к файлу с информацией о проекте
-                info_file = os.path.join(project_path, "project_info.json")
-                
-                try:
-                    if os.path.exists(info_file):
-                        # Загружаем существующую информацию
-                        with open(info_file, 'r', encoding='utf-8') as f:
-                            project_info = json.load(f)
-                    else:
-                        # Создаем новую информацию о проекте
-                        project_info = {
-                            "name": project_name,
-                            "path": project_path,
-                            "created": os.path.getctime(project_path),
-                            "favorite": False,
-                            "description": "",
-                            "tags": [],
-                            "last_modified": os.path.getmtime(project_path)
-                        }
-                        # Сохраняем информацию в файл
-                        with open(info_file, 'w', encoding='utf-8') as f:
-                            json.dump(project_info, f, indent=4, ensure_ascii=False)
-                    
-                    projects_info[project_path] = project_info
-                    
-                except Exception as e:
-                    print(f"Error processing project {project_path}: {e}")
-                    continue
-            
-            # Загружаем информацию о группах, если она есть
-            groups_file = os.path.join(projects_dir, "groups.json")
-            if os.path.exists(groups_file):
-                try:
-                    with open(groups_file, 'r', encoding='utf-8') as f:
-                        groups_info = json.load(f)
-                except:
-                    groups_info = {}
-            
-            # Создаем группы
-            for group_id, group_data in groups_info.items():
-                # Проверяем существование всех проектов группы
-                valid_projects = []
-                for project in group_data["projects"]:
-                    if project["path"] in projects_info:
-                        valid_projects.append(projects_info[project["path"]])
-                        del projects_info[project["path"]]  # Удаляем из словаря, чтобы не создавать отдельную карточку
-                
-                if valid_projects:
-                    self.create_project_group(group_data["name"], valid_projects)
-            
-            # Создаем карточки для оставшихся проектов
-            for project_info in sorted(projects_info.values(), key=lambda x: x["created"], reverse=True):
-                self.add_project(project_info)
-            
-            # Обновляем сетку
-            self.update_grid_layout()
+            self.scan_progress.setRange(0, 0)
+            self.scan_panel.show()
+            self.scanner.start(self.get_catalog())
             
         except Exception as e:
             print(f"Error loading projects: {e}")
             traceback.print_exc()
     
+    def on_scan_batch(self, records):
+        """Добавляет в интерфейс очередную пачку проектов от сканера"""
+        self._bulk_update = True
+        self.project_model.begin_batch()
+        try:
+            for record in records:
+                data = record.data
+                if record.kind == ScanRecord.GROUP:
+                    self.create_project_group(data["name"], data["projects"], data["group_id"])
+                elif record.kind == ScanRecord.MEMBER:
+                    group = self.project_groups.get(data["group_id"])
+                    if group is not None:
+                        group.add_project(data["project_info"])
+                    else:
+                        self.create_project_group(data["name"], [data["project_info"]], data["group_id"])
+                elif record.kind == ScanRecord.PROJECT:
+                    self.add_project(data["project_info"])
+                elif record.kind == ScanRecord.CHANGED:
+                    if not self.update_project_card(data["path"], data["project_info"]):
+                        self.add_project(data["project_info"])
+                elif record.kind == ScanRecord.REMOVED:
+                    self.remove_project_by_path(data["path"])
+        except Exception as e:
+            print(f"Error applying scan results: {e}")
+            traceback.print_exc()
+        finally:
+            self.project_model.end_batch()
+            self._bulk_update = False
+        self.update_grid_layout()
+    
+    def on_scan_progress(self, done, total):
+        self.scan_progress.setRange(0, max(total, 1))
+        self.scan_progress.setValue(done)
+    
+    def on_scan_finished(self, project_paths):
+        """Сканирование завершено: ставим библиотеку под наблюдение"""
+        self.scan_panel.hide()
+        # Загруженный состав групп считается сохраненным, а не изменением
+        self.metadata_writer.mark_groups_saved(self.groups_data())
+        if self.catalog is not None:
+            self.watch_library(self.catalog.projects_dir, project_paths)
+    
+    def on_scan_failed(self, message):
+        self.scan_panel.hide()
+        print(f"Error loading projects: {message}")
+    
+    def cancel_scan(self):
+        """Останавливает фоновое сканирование, уже показанные карточки остаются"""
+        self.scanner.cancel()
+        self.scan_panel.hide()
+    
+    def get_catalog(self):
+        """Возвращает каталог для текущего пути к проектам"""
+        projects_dir = self.settings.get('projects_path', '')
+        if self.catalog is None or self.catalog.projects_dir != projects_dir.replace("\\", "/"):
+            if self.catalog is not None:
+                self.catalog.close()
+            self.catalog = ProjectCatalog(projects_dir)
+        self.catalog.io_workers = workers_for_root(self.settings, projects_dir)
+        return self.catalog
+    
     def clear_projects(self):
-        # Очищаем все проекты
-        while self.all_projects_layout.count():
-            item = self.all_projects_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
+        # Очищаем все проекты (виджеты групп удаляет представление)
+        self.project_model.clear()
+        self.search_index.clear()
     
     def add_project(self, project_data):
-        # Создаем и добавляем карточку
-        card = ProjectCard(project_data)
-        card.deleted.connect(self.delete_project)
-        card.favorite_changed.connect(self.update_favorite)
-        card.project_clicked.connect(self.open_project)
-        card.group_created.connect(self.create_project_group)
-        self.all_projects_layout.addWidget(card, 0, 0)  # Временно добавляем в позицию 0,0
+        # Добавляем проект в модель сетки
+        self.project_model.add_item(project_data)
+        self.search_index.set_group(project_data, None)
+        self.search_index.add(project_data)
         
         # Если проект помечен как избранный, добавляем его в боковую панель
         if project_data.get("favorite", False):
             self.add_to_favorites(project_data)
         
+        if self._bulk_update:
+            return
+        
+        if self.catalog is not None:
+            self.watch_library(self.catalog.projects_dir, [project_data["path"]])
+        
         # Обновляем сетку
         self.update_grid_layout()
-        self.save_projects()
+        self.save_projects([project_data])
 
     def open_project(self, project_data):
         # Проверяем, не открыт ли уже проект
@@ -428,41 +597,33 @@ class MainWindow(QMainWindow):
             window.show()
 
     def delete_project(self, project_data):
-        # Удаляем карточку из сетки
-        for i in range(self.all_projects_layout.count()):
-            item = self.all_projects_layout.itemAt(i)
-            if item and item.widget():
-                card = item.widget()
-                if isinstance(card, ProjectCard) and card.project_info == project_data:
-                    self.all_projects_layout.takeAt(i).widget().deleteLater()
-                    break
-        
-        # Перераспределяем оставшиеся карточки
-        cards = []
-        while self.all_projects_layout.count():
-            item = self.all_projects_layout.takeAt(0)
-            if item.widget():
-                cards.append(item.widget())
-        
-        max_cols = 4
-        for i, card in enumerate(cards):
-            row = i // max_cols
-            col = i % max_cols
-            self.all_projects_layout.addWidget(card, row, col)
+        # Удаляем карточку из сетки, остальные сдвигаются сами
+        self.project_model.remove_row(self.project_model.row_of(project_data["path"]))
         
         # Удаляем из избранного, если был там
         if project_data.get("favorite", False):
             self.remove_from_favorites(project_data)
-        
+        self.metadata_writer.forget(project_data["path"])
+        self.stats_service.forget(project_data["path"])
+        self.search_index.remove(project_data)
+
+        # Убираем строку каталога сразу, не дожидаясь следующего сканирования
+        try:
+            self.get_catalog().remove_project(project_data["path"])
+        except Exception as e:
+            print(f"Error removing project from catalog: {e}")
+            traceback.print_exc()
+
         # Обновляем JSON файл
-        self.save_projects()
+        self.save_projects(())
 
     def update_favorite(self, project_data, is_favorite):
         if is_favorite:
             self.add_to_favorites(project_data)
         else:
             self.remove_from_favorites(project_data)
-        self.save_projects()
+        # Избранное хранится только в project_info.json самого проекта
+        self.metadata_writer.save_project(project_data)
 
     def add_to_favorites(self, project_data):
         # Находим правую панель
@@ -489,25 +650,42 @@ class MainWindow(QMainWindow):
                         break
 
     def filter_projects(self):
-        search_text = self.search_input.text().lower()
-        
-        # Фильтруем все проекты
-        for row in range(self.all_projects_layout.rowCount()):
-            for col in range(self.all_projects_layout.columnCount()):
-                item = self.all_projects_layout.itemAtPosition(row, col)
-                if item and item.widget():
-                    card = item.widget()
-                    if isinstance(card, ProjectCard):
-                        project_name = card.project_info["name"].lower()
-                        card.setVisible(search_text in project_name)
+        """Показывает проекты, подходящие под запрос, и группы, в которых они есть"""
+        query = self.search_input.text()
+        if not query.strip():
+            self.project_view.apply_filter(None)
+            return
+        matched = self.search_index.matches(query)
+        visible = set(matched)
+        for path in matched:
+            group = self.project_groups.group_of(path)
+            if group is not None:
+                visible.add(id(group))
+        self.project_view.apply_filter(visible)
+        
+        # Прокручиваем к лучшему совпадению (при коротком запросе совпадений
+        # слишком много, чтобы ранжировать их на каждое нажатие)
+        if matched and len(matched) <= FULL_RANK_LIMIT:
+            best_path = self.search_index.search(query, limit=1)[0][0]
+            row = self.project_model.row_of(best_path)
+            if row < 0:
+                group = self.project_groups.group_of(best_path)
+                row = self.project_model.row_of(group) if group is not None else -1
+            if row >= 0:
+                self.project_view.scrollTo(self.project_model.index(row),
+                                           QAbstractItemView.ScrollHint.EnsureVisible)
 
-    def create_project_group(self, name, projects):
+    def create_project_group(self, name, projects, group_id=None):
+        # Работаем с теми же словарями, что показаны в интерфейсе (при
+        # перетаскивании приходит копия из mime-данных)
+        projects = [self.find_project(project["path"])[2] or project for project in projects]
+        
         # Удаляем проекты из других групп
         for project in projects:
-            # Удаляем из групп
-            for group in self.project_groups.values():
-                if project in group.projects:
-                    group.remove_project(project)
+            # Удаляем из группы, в которой проект состоит сейчас
+            group = self.project_groups.group_of(project)
+            if group is not None:
+                group.remove_project(project)
             # Удаляем отдельные карточки
             self.remove_project_card(project)
         
@@ -515,33 +693,44 @@ class MainWindow(QMainWindow):
         group = ProjectGroup(name, projects)
         group.deleted.connect(self.ungroup_projects)
         group.project_clicked.connect(self.open_project)
-        group.group_changed.connect(self.save_projects)
+        group.group_changed.connect(lambda: self.save_projects(()))
+        group.group_changed.connect(lambda: self.index_group(group))
+        group.project_added.connect(lambda project: self.index_group_member(group, project))
+        group.project_removed.connect(lambda project: self.search_index.set_group(project, None))
         group.group_created.connect(self.create_project_group)
         
         # Добавляем группу в сетку
-        self.all_projects_layout.addWidget(group, 0, 0)
+        row = self.project_model.add_item(group)
+        self.project_view.add_group_widget(row, group)
         
-        # Сохраняем группу в словаре
-        group_id = f"group_{len(self.project_groups)}"
-        self.project_groups[group_id] = group
+        # Регистрируем группу: идентификатор из groups.json или новый UUID
+        self.project_groups.add(group, group_id)
+        for project in projects:
+            self.index_group_member(group, project)
         
         # Обновляем сетку и сохраняем
-        self.update_grid_layout()
-        self.save_projects()
+        if not self._bulk_update:
+            self.update_grid_layout()
+            self.save_projects(())
+        return group
+    
+    def index_group_member(self, group, project):
+        """Индексирует проект группы вместе с названием группы"""
+        self.search_index.add(project)
+        self.search_index.set_group(project, group.name)
+    
+    def index_group(self, group):
+        """Обновляет название группы в индексе (после переименования)"""
+        for project in group.projects:
+            self.search_index.set_group(project, group.name)
     
     def ungroup_projects(self, projects):
         # Получаем группу, которая отправила сигнал
         group = self.sender()
         
         # Удаляем группу из сетки и словаря
-        self.all_projects_layout.removeWidget(group)
-        group_id = None
-        for gid, g in self.project_groups.items():
-            if g == group:
-                group_id = gid
-                break
-        if group_id:
-            del self.project_groups[group_id]
+        self.project_model.remove_row(self.project_model.row_of(group))
+        self.project_groups.remove(group)
         group.deleteLater()
         
         # Добавляем проекты обратно как отдельные карточки
@@ -550,68 +739,59 @@ class MainWindow(QMainWindow):
         
         # Обновляем сетку и сохраняем
         self.update_grid_layout()
-        self.save_projects()
+        self.save_projects(())
     
     def remove_project_card(self, project_data):
-        # Ищем карточку проекта во всех ячейках сетки
-        for row in range(self.all_projects_layout.rowCount()):
-            for col in range(self.all_projects_layout.columnCount()):
-                item = self.all_projects_layout.itemAtPosition(row, col)
-                if item and item.widget():
-                    widget = item.widget()
-                    if isinstance(widget, ProjectCard) and widget.project_info == project_data:
-                        # Удаляем виджет из layout
-                        self.all_projects_layout.removeWidget(widget)
-                        widget.deleteLater()
-                        # Обновляем сетку
-                        self.update_grid_layout()
-                        return True
-        return False
+        # Убираем проект из общей сетки (если он там есть)
+        row = self.project_model.row_of(project_data["path"])
+        if row < 0:
+            return False
+        self.project_model.remove_row(row)
+        return True
+    
+    def groups_data(self):
+        """Состав групп в формате groups.json: хранятся только пути проектов,
+        метаданные самих проектов лежат в их project_info.json"""
+        return {
+            group_id: {
+                "name": group.name,
+                "projects": [{"path": project["path"]} for project in group.projects]
+            }
+            for group_id, group in self.project_groups.items()
+        }
     
-    def save_projects(self):
+    def save_projects(self, projects=None):
+        """Сохраняет состав групп и метаданные проектов.
+        
+        projects - проекты, которые могли измениться; None - проверить все.
+        Изменения групп не трогают project_info.json, поэтому для них
+        передается пустой список.
+        """
+        if self._bulk_update:
+            return
         try:
             projects_dir = self.settings.get('projects_path', '')
             if not projects_dir or not os.path.exists(projects_dir):
                 return
             
-            # Сохраняем информацию о группах
-            groups_data = {}
-            for group_id, group in self.project_groups.items():
-                groups_data[group_id] = {
-                    "name": group.name,
-                    "projects": group.projects
-                }
+            self.metadata_writer.save_groups(self.groups_data())
             
-            # Сохраняем информацию о группах в отдельный файл
-            groups_file = os.path.join(projects_dir, "groups.json")
-            with open(groups_file, 'w', encoding='utf-8') as f:
-                json.dump(groups_data, f, indent=4, ensure_ascii=False)
-            
-            # Обновляем информацию о проектах
-            for i in range(self.all_projects_layout.count()):
-                item = self.all_projects_layout.itemAt(i)
-                if item and item.widget():
-                    widget = item.widget()
-                    if isinstance(widget, ProjectCard):
-                        self._save_project_info(widget.project_info)
-                    elif isinstance(widget, ProjectGroup):
-                        for project in widget.projects:
-                            self._save_project_info(project)
+            # Ставим в очередь на запись только изменившиеся проекты
+            if projects is None:
+                projects = list(self.project_model.projects())
+                for group in self.project_groups.values():
+                    projects.extend(group.projects)
+            for project in projects:
+                self.metadata_writer.save_project(project)
                             
         except Exception as e:
             print(f"Error saving projects: {e}")
             traceback.print_exc()
     
-    def _save_project_info(self, project_info):
-        """Сохраняет информацию о проекте в его project_info.json"""
-        try:
-            info_file = os.path.join(project_info["path"], "project_info.json")
-            # Обновляем время последнего изменения
-            project_info["last_modified"] = os.path.getmtime(project_info["path"])
-            with open(info_file, 'w', encoding='utf-8') as f:
-                json.dump(project_info, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error saving project info for {project_info['path']}: {e}")
+    def closeEvent(self, event):
+        """Перед закрытием записываем отложенные изменения метаданных"""
+        self.metadata_writer.flush()
+        super().closeEvent(event)
 
     def dragEnterEvent(self, event):
         if event.mimeData().hasText():
@@ -625,28 +805,10 @@ class MainWindow(QMainWindow):
                 # Получаем данные о проекте
                 project_data = eval(event.mimeData().text())
                 
-                # Сначала удаляем проект из всех групп
-                # Создаем копию списка групп для безопасной итерации
-                groups_to_check = list(self.project_groups.values())
-                for group in groups_to_check:
-                    if project_data in group.projects:
-                        group.remove_project(project_data)
-                
-                # Проверяем, не находится ли проект уже в основной области
-                for i in range(self.all_projects_layout.count()):
-                    item = self.all_projects_layout.itemAt(i)
-                    if item and item.widget():
-                        widget = item.widget()
-                        if isinstance(widget, ProjectCard) and widget.project_info == project_data:
-                            event.ignore()
-                            return
-                
-                # Добавляем проект в основную область
-                self.add_project(project_data)
-                event.acceptProposedAction()
-                
-                # Сохраняем изменения
-                self.save_projects()
+                if self.move_project_to_grid(project_data):
+                    event.acceptProposedAction()
+                else:
+                    event.ignore()
             except Exception as e:
                 print(f"Error in dropEvent: {e}")
                 traceback.print_exc()  # Добавляем вывод полного стека ошибки
@@ -654,6 +816,22 @@ class MainWindow(QMainWindow):
         else:
             event.ignore()
 
+    def move_project_to_grid(self, project_data):
+        """Возвращает проект из группы в общую сетку; False, если он уже там"""
+        # Проверяем, не находится ли проект уже в основной области
+        if self.project_model.row_of(project_data["path"]) >= 0:
+            return False
+        
+        # Сначала удаляем проект из его группы
+        group = self.project_groups.group_of(project_data)
+        if group is not None:
+            project_data = group.remove_project(project_data) or project_data
+        
+        # Добавляем проект в основную область и сохраняем изменения
+        self.add_project(project_data)
+        self.save_projects([project_data])
+        return True
+
     def dragMoveEvent(self, event):
         if event.mimeData().hasText():
             event.acceptProposedAction()
@@ -714,7 +892,6 @@ class MainWindow(QMainWindow):
                 
                 # Добавляем проект в интерфейс
                 self.add_project(project_info)
-                self.save_projects()
                 
                 QMessageBox.information(
                     self,
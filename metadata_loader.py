@@ -0,0 +1,141 @@
+"""
+Параллельное чтение метаданных проектов.
+
+На сетевых дисках время загрузки библиотеки складывается из задержек
+отдельных обращений к файлам (stat, open, json.load), поэтому чтение
+раскладывается по пулу потоков. Размер пула задается для каждого корня
+библиотеки в settings.json:
+
+    "io_workers": {"//server/share/Projects": 16, "default": 8}
+
+Результаты возвращаются в порядке входных путей.
+
+Запуск модуля напрямую сравнивает последовательную и параллельную загрузку:
+
+    python metadata_loader.py [--projects 5000] [--workers 16] [--root ПАПКА] [--latency МС]
+
+На локальном диске выигрыша почти нет; --root позволяет указать папку на
+сетевом диске, а --latency - имитировать задержку сети на каждый проект.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Размер пула, если для корня ничего не задано
+DEFAULT_WORKERS = 8
+
+# Верхняя граница, чтобы опечатка в настройках не создала тысячи потоков
+MAX_WORKERS = 64
+
+
+def workers_for_root(settings, projects_dir):
+    """Возвращает размер пула чтения для корня библиотеки из настроек"""
+    value = settings.get('io_workers', DEFAULT_WORKERS)
+    if isinstance(value, dict):
+        root = projects_dir.replace("\\", "/").rstrip("/")
+        value = next((count for path, count in value.items()
+                      if path.replace("\\", "/").rstrip("/") == root),
+                     value.get('default', DEFAULT_WORKERS))
+    try:
+        return max(1, min(MAX_WORKERS, int(value)))
+    except (TypeError, ValueError):
+        print(f"Некорректное значение io_workers: {value!r}")
+        return DEFAULT_WORKERS
+
+
+def load_ordered(func, items, workers=DEFAULT_WORKERS):
+    """Вызывает func для каждого элемента в пуле потоков.
+
+    Возвращает генератор результатов в порядке items. Если генератор закрыть
+    раньше времени, еще не начатые задачи отменяются. func сама отвечает за
+    обработку ошибок отдельного элемента.
+    """
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=min(workers, len(items)),
+                                  thread_name_prefix="metadata")
+    try:
+        for result in executor.map(func, items):
+            yield result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _generate_library(root, count):
+    """Создает тестовую библиотеку из count проектов"""
+    import json
+    os.makedirs(root, exist_ok=True)
+    for i in range(count):
+        project_path = os.path.join(root, f"project_{i:05d}")
+        os.makedirs(project_path, exist_ok=True)
+        with open(os.path.join(project_path, "project_info.json"), 'w', encoding='utf-8') as f:
+            json.dump({
+                "name": f"project_{i:05d}",
+                "path": project_path.replace("\\", "/"),
+                "created": 1700000000 + i,
+                "favorite": False,
+                "description": "",
+                "tags": [],
+                "last_modified": 1700000000 + i
+            }, f, indent=4, ensure_ascii=False)
+
+
+def _benchmark():
+    import argparse
+    import tempfile
+    import shutil
+    from project_catalog import ProjectCatalog
+
+    parser = argparse.ArgumentParser(description="Сравнение последовательной и параллельной загрузки метаданных")
+    parser.add_argument('--projects', type=int, default=5000, help="размер сгенерированной библиотеки")
+    parser.add_argument('--workers', type=int, default=16, help="размер пула для параллельной загрузки")
+    parser.add_argument('--root', help="папка для библиотеки (например, на сетевом диске)")
+    parser.add_argument('--repeat', type=int, default=3, help="количество повторов")
+    parser.add_argument('--latency', type=float, default=0,
+                        help="имитация задержки сети на проект, мс")
+    args = parser.parse_args()
+
+    if args.latency:
+        probe = ProjectCatalog._probe
+
+        def slow_probe(self, *probe_args):
+            time.sleep(args.latency / 1000)
+            return probe(self, *probe_args)
+        ProjectCatalog._probe = slow_probe
+
+    base = args.root or tempfile.mkdtemp(prefix="bpm_bench_")
+    library = os.path.join(base, "library")
+    cache = tempfile.mkdtemp(prefix="bpm_bench_cache_")
+    try:
+        print(f"Генерация библиотеки из {args.projects} проектов в {library}...")
+        _generate_library(library, args.projects)
+
+        results = {}
+        for run in range(args.repeat):
+            for workers in (1, args.workers):
+                # Каждый прогон - с пустым каталогом, чтобы все project_info.json читались заново
+                db_path = os.path.join(cache, f"catalog_{run}_{workers}.sqlite")
+                catalog = ProjectCatalog(library, db_path=db_path, io_workers=workers)
+                start = time.perf_counter()
+                projects = catalog.sync_projects()
+                elapsed = time.perf_counter() - start
+                catalog.close()
+                assert len(projects) == args.projects
+                results.setdefault(workers, []).append(elapsed)
+
+        for workers, times in results.items():
+            label = "последовательно" if workers == 1 else f"{workers} потоков"
+            print(f"{label:>16}: лучший {min(times) * 1000:.0f} мс, средний {sum(times) / len(times) * 1000:.0f} мс")
+    finally:
+        shutil.rmtree(cache, ignore_errors=True)
+        shutil.rmtree(library, ignore_errors=True)
+        if not args.root:
+            shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,144 @@
+"""
+Запись метаданных проектов.
+
+MetadataWriter сохраняет только те project_info, которые действительно
+изменились, и объединяет записи за короткий интервал в одну пачку. Файлы
+пишутся атомарно: сначала во временный файл рядом, затем os.replace, поэтому
+сбой во время записи не оставляет обрезанный JSON.
+"""
+import os
+import json
+import traceback
+from PyQt6.QtCore import QObject, QTimer
+
+# Интервал, за который записи объединяются (мс)
+DEFAULT_DELAY_MS = 250
+
+# Поля, которые выставляются при записи и не делают проект измененным
+VOLATILE_KEYS = ("last_modified",)
+
+
+def atomic_write_json(path, data):
+    """Записывает JSON во временный файл рядом с path и подменяет им path"""
+    directory, name = os.path.split(path)
+    temp_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _signature(data):
+    """Строка для сравнения содержимого без учета служебных полей"""
+    if isinstance(data, dict):
+        data = {key: value for key, value in data.items() if key not in VOLATILE_KEYS}
+    return json.dumps(data, sort_keys=True, ensure_ascii=False)
+
+
+class MetadataWriter(QObject):
+    """Отложенная запись project_info.json и groups.json через каталог.
+
+    save_project и save_groups только помечают данные к записи, если они
+    отличаются от последних сохраненных; сама запись выполняется в flush
+    после паузы в изменениях.
+    """
+
+    def __init__(self, get_catalog, delay_ms=DEFAULT_DELAY_MS, parent=None):
+        super().__init__(parent)
+        self.get_catalog = get_catalog
+        self.saved = {}  # {путь: подпись последней сохраненной версии}
+        self.saved_groups = None
+        self.pending = {}  # {путь: project_info}
+        self.pending_groups = None
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.flush)
+
+    def _saved_signature(self, project_path):
+        signature = self.saved.get(project_path)
+        if signature is None:
+            # Проект еще не записывался в этой сессии - сравниваем со снимком в каталоге
+            cached = self.get_catalog().get_project(project_path)
+            if cached is not None:
+                signature = self.saved[project_path] = _signature(cached)
+        return signature
+
+    def is_dirty(self, project_info):
+        """Проверяет, отличается ли project_info от сохраненной версии"""
+        return _signature(project_info) != self._saved_signature(project_info["path"])
+
+    def save_project(self, project_info):
+        """Ставит проект в очередь на запись, если он изменился"""
+        try:
+            if project_info["path"] in self.pending or self.is_dirty(project_info):
+                self.pending[project_info["path"]] = project_info
+                self.timer.start()
+        except Exception as e:
+            print(f"Error checking project info for {project_info.get('path')}: {e}")
+            traceback.print_exc()
+
+    def save_groups(self, groups_data):
+        """Ставит groups.json в очередь на запись, если состав групп изменился"""
+        if self.saved_groups is None:
+            try:
+                self.saved_groups = _signature(self.get_catalog().load_groups())
+            except Exception as e:
+                print(f"Error loading groups: {e}")
+        if _signature(groups_data) != self.saved_groups:
+            self.pending_groups = groups_data
+            self.timer.start()
+
+    def mark_groups_saved(self, groups_data):
+        """Запоминает состав групп, загруженный с диска, как сохраненный"""
+        if self.pending_groups is None:
+            self.saved_groups = _signature(groups_data)
+
+    def forget(self, project_path):
+        """Убирает удаленный проект из очереди и из сохраненных версий"""
+        self.pending.pop(project_path, None)
+        self.saved.pop(project_path, None)
+
+    def reset(self):
+        """Сбрасывает состояние при смене библиотеки (несохраненное записывается)"""
+        self.flush()
+        self.saved.clear()
+        self.saved_groups = None
+
+    def flush(self):
+        """Записывает все накопленные изменения"""
+        self.timer.stop()
+        pending, self.pending = self.pending, {}
+        groups_data, self.pending_groups = self.pending_groups, None
+        if not pending and groups_data is None:
+            return
+
+        catalog = self.get_catalog()
+        if groups_data is not None:
+            try:
+                catalog.save_groups(groups_data)
+                self.saved_groups = _signature(groups_data)
+            except Exception as e:
+                print(f"Error saving groups: {e}")
+                traceback.print_exc()
+
+        for project_path, project_info in pending.items():
+            if not os.path.isdir(project_path):
+                # Папку удалили, пока запись ждала своей очереди
+                self.saved.pop(project_path, None)
+                continue
+            try:
+                catalog.save_project_info(project_info)
+                self.saved[project_path] = _signature(project_info)
+            except Exception as e:
+                print(f"Error saving project info for {project_path}: {e}")
+                traceback.print_exc()
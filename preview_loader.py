@@ -0,0 +1,247 @@
+"""
+Фоновая загрузка превью изображений для окна проекта.
+
+Изображение декодируется PIL в пуле потоков и уменьшается до размера
+превью; пиксели передаются в QImage напрямую, без повторного кодирования
+в память и декодирования Qt. Готовые превью хранятся в LRU в памяти по
+ключу (путь, mtime), поэтому повторный выбор того же файла не обращается
+к диску, а измененный файл получает новое превью.
+
+Большие текстуры не декодируются в полном размере, где этого можно
+избежать: JPEG декодируется сразу в уменьшенном виде (draft), остальное
+сначала уменьшается в целое число раз (reduce) и только потом
+сглаживается. Изображение, которое целиком не укладывается в бюджет
+пикселей, не открывается. Для больших PNG/TGA при первом просмотре
+сохраняется уменьшенная копия в папке кэша, и следующие просмотры и
+"Установить как превью" читают ее вместо оригинала.
+
+Ждет результата только последний запрос: при выборе другого файла
+предыдущий запрос, если он еще не начался, отменяется, а результат уже
+начатого отбрасывается.
+"""
+import os
+import hashlib
+import traceback
+from collections import OrderedDict
+from PIL import Image, PngImagePlugin
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage
+from project_catalog import CACHE_DIR
+
+# Расширения файлов, для которых показывается превью
+PREVIEW_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tga'}
+
+# Превью вписывается в квадрат этого размера
+PREVIEW_SIZE = 300
+
+# Сколько готовых превью держать в памяти (~350 КБ каждое)
+PREVIEW_CACHE_SIZE = 64
+
+# Потоков декодирования: запрос нового файла не ждет, пока дочитается прежний
+PREVIEW_THREADS = 2
+
+# Больше пикселей за одно декодирование не выделяем (8K x 8K, ~256 МБ в RGBA)
+PREVIEW_PIXEL_BUDGET = 8192 * 8192
+
+# Уменьшенные копии больших изображений, которые нельзя декодировать уменьшенными
+PROXY_DIR = os.path.join(CACHE_DIR, 'preview_proxies')
+PROXY_SIZE = 1024
+PROXY_MIN_PIXELS = 2048 * 2048
+
+
+def has_preview(path):
+    return os.path.splitext(path)[1].lower() in PREVIEW_EXTENSIONS
+
+
+def _to_qimage(img):
+    """QImage с копией пикселей изображения PIL (без кодирования в PNG/JPEG)"""
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+    data = img.tobytes("raw", "RGBA")
+    image = QImage(data, img.width, img.height, img.width * 4, QImage.Format.Format_RGBA8888)
+    # QImage ссылается на data - копируем, пока буфер жив
+    return image.copy()
+
+
+def _proxy_prefix(path):
+    key = os.path.normcase(os.path.abspath(path))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+
+
+def _proxy_path(path, stat):
+    return os.path.join(PROXY_DIR, f"{_proxy_prefix(path)}_{stat.st_mtime_ns:x}_{stat.st_size:x}.png")
+
+
+def _open_proxy(proxy_path):
+    """(уменьшенная копия, размеры оригинала) или None, если копии нет"""
+    try:
+        with Image.open(proxy_path) as img:
+            img.load()
+            width, height = img.text["source_size"].split("x")
+            return img, (int(width), int(height))
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _store_proxy(path, proxy_path, img, size):
+    """Сохраняет уменьшенную копию и удаляет копии прежних версий файла"""
+    temp_path = f"{proxy_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(PROXY_DIR, exist_ok=True)
+        prefix = _proxy_prefix(path) + "_"
+        with os.scandir(PROXY_DIR) as entries:
+            stale = [entry.path for entry in entries
+                     if entry.name.startswith(prefix) and entry.path != proxy_path]
+        for stale_path in stale:
+            os.remove(stale_path)
+        info = PngImagePlugin.PngInfo()
+        info.add_text("source_size", f"{size[0]}x{size[1]}")
+        img.save(temp_path, "PNG", pnginfo=info, compress_level=1)
+        os.replace(temp_path, proxy_path)
+    except OSError as e:
+        print(f"Ошибка сохранения уменьшенной копии {proxy_path}: {e}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+def _reduce(img, max_side):
+    """Уменьшает в целое число раз, пока большая сторона не меньше max_side"""
+    factor = max(img.size) // max_side
+    if factor < 2:
+        return img
+    if img.mode not in ("RGB", "RGBA", "L", "LA"):
+        img = img.convert("RGBA")
+    return img.reduce(factor)
+
+
+def open_reduced(path, max_side):
+    """Возвращает (изображение PIL не больше max_side x max_side, (ширина, высота) оригинала).
+
+    Полноразмерное декодирование ограничено PREVIEW_PIXEL_BUDGET; для
+    изображения больше бюджета (кроме JPEG, который уменьшается при
+    декодировании) выбрасывается ValueError.
+    """
+    stat = os.stat(path)
+    proxy_path = _proxy_path(path, stat)
+    if max_side <= PROXY_SIZE:
+        proxy = _open_proxy(proxy_path)
+        if proxy is not None:
+            img, size = proxy
+            img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            return img, size
+
+    with Image.open(path) as img:
+        size = img.size
+        if img.format == "JPEG":
+            # Декодер сразу уменьшает в 2-8 раз, не меньше max_side
+            img.draft("RGB", (max_side, max_side))
+        if img.width * img.height > PREVIEW_PIXEL_BUDGET:
+            raise ValueError(f"Изображение {size[0]}x{size[1]} слишком большое для превью")
+        img.load()
+        save_proxy = img.format != "JPEG" and size[0] * size[1] >= PROXY_MIN_PIXELS
+        img = _reduce(img, max(max_side, PROXY_SIZE) if save_proxy else max_side)
+        if save_proxy:
+            proxy = img.copy()
+            proxy.thumbnail((PROXY_SIZE, PROXY_SIZE), Image.Resampling.LANCZOS)
+            _store_proxy(path, proxy_path, proxy, size)
+            img = proxy
+        img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        img.load()
+        return img, size
+
+
+def decode_preview(path):
+    """Возвращает (QImage превью, (ширина, высота) оригинала).
+
+    Не использует QPixmap, поэтому может вызываться не из GUI-потока.
+    """
+    img, size = open_reduced(path, PREVIEW_SIZE)
+    return _to_qimage(img), size
+
+
+class _PreviewSignals(QObject):
+    # номер запроса, путь, mtime, QImage или None, размеры оригинала, текст ошибки
+    decoded = pyqtSignal(int, str, float, object, object, str)
+
+
+class _PreviewTask(QRunnable):
+    def __init__(self, path, mtime, token, signals):
+        super().__init__()
+        self.path = path
+        self.mtime = mtime
+        self.token = token
+        self.signals = signals
+        self.cancelled = False
+
+    def run(self):
+        if self.cancelled:
+            return
+        image, size, error = None, None, ""
+        try:
+            image, size = decode_preview(self.path)
+        except Exception as e:
+            error = str(e)
+            # Нечитаемый или слишком большой файл - обычная ситуация, остальное печатаем
+            if not isinstance(e, (OSError, ValueError)):
+                traceback.print_exc()
+        if not self.cancelled:
+            self.signals.decoded.emit(self.token, self.path, self.mtime, image, size, error)
+
+
+class PreviewLoader(QObject):
+    """Превью изображений: LRU в памяти и фоновое декодирование последнего запроса"""
+    preview_ready = pyqtSignal(str, object, object, str)  # путь, QImage или None, размеры, ошибка
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cache = OrderedDict()  # {(путь, mtime): (QImage, размеры)}
+        self.task = None
+        self.next_token = 0
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(PREVIEW_THREADS)
+        self.signals = _PreviewSignals()
+        self.signals.decoded.connect(self._on_decoded)
+
+    def cached(self, path, mtime):
+        """(QImage, размеры) из памяти или None"""
+        entry = self.cache.get((path, mtime))
+        if entry is not None:
+            self.cache.move_to_end((path, mtime))
+        return entry
+
+    def request(self, path, mtime):
+        """Запрашивает превью; результат придет сигналом preview_ready.
+
+        Превью из памяти отдается сразу (сигнал испускается до возврата).
+        """
+        self.cancel()
+        entry = self.cached(path, mtime)
+        if entry is not None:
+            self.preview_ready.emit(path, entry[0], entry[1], "")
+            return
+        self.next_token += 1
+        self.task = _PreviewTask(path, mtime, self.next_token, self.signals)
+        self.pool.start(self.task)
+
+    def cancel(self):
+        """Отменяет ожидаемое превью (например, выбран не файл изображения)"""
+        if self.task is not None:
+            self.task.cancelled = True
+            self.task = None
+
+    def clear(self):
+        self.cancel()
+        self.cache.clear()
+
+    def _on_decoded(self, token, path, mtime, image, size, error):
+        if image is not None:
+            self.cache[(path, mtime)] = (image, size)
+            self.cache.move_to_end((path, mtime))
+            while len(self.cache) > PREVIEW_CACHE_SIZE:
+                self.cache.popitem(last=False)
+        if self.task is None or self.task.token != token:
+            return
+        self.task = None
+        self.preview_ready.emit(path, image, size, error)
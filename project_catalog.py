@@ -0,0 +1,505 @@
+"""
+Каталог проектов на SQLite.
+
+Хранит метаданные всех проектов библиотеки, состав групп из groups.json и
+кэшированную статистику. Файлы project_info.json остаются переносимым
+источником истины: каталог перечитывает их только при изменении mtime/размера.
+"""
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+import traceback
+from metadata_writer import atomic_write_json
+from metadata_loader import DEFAULT_WORKERS, load_ordered
+
+# Папка для локальных кэшей приложения (каталог не кладем на сетевой диск)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+
+# Служебные папки в каталоге проектов, которые не являются проектами
+EXCLUDED_DIRS = {'backups', 'archives', 'exports', '.temp_archive'}
+
+INFO_FILE_NAME = "project_info.json"
+GROUPS_FILE_NAME = "groups.json"
+
+# Результаты проверки одной папки проекта
+PROBE_MISSING = "missing"          # папки больше нет
+PROBE_UNCHANGED = "unchanged"      # отпечаток совпал со снимком
+PROBE_DIR_CHANGED = "dir_changed"  # изменилась только папка, метаданные прежние
+PROBE_READ = "read"                # project_info.json прочитан заново
+PROBE_FAILED = "failed"            # ошибка чтения, проект пропускается
+PROBE_SKIPPED = "skipped"          # сверка отменена
+
+# Версия схемы: каталог - это кэш, поэтому при смене схемы он просто пересоздается
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    CREATE TABLE IF NOT EXISTS projects (
+        path TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        created REAL NOT NULL DEFAULT 0,
+        info_json TEXT NOT NULL,
+        info_mtime REAL,
+        info_size INTEGER,
+        dir_mtime REAL,
+        dir_inode INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS groups (
+        group_id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        position INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS group_members (
+        group_id TEXT NOT NULL,
+        project_path TEXT NOT NULL,
+        position INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (group_id, project_path)
+    );
+    CREATE TABLE IF NOT EXISTS project_stats (
+        path TEXT PRIMARY KEY,
+        file_count INTEGER NOT NULL,
+        total_size INTEGER NOT NULL,
+        fingerprint TEXT
+    );
+"""
+
+
+def normalize_path(path):
+    """Приводит путь к виду, который используется как ключ проекта"""
+    return path.replace("\\", "/")
+
+
+def library_key(projects_dir):
+    """Короткий ключ библиотеки для имен файлов локальных кэшей"""
+    key = os.path.normcase(os.path.abspath(projects_dir))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+class LibraryChanges:
+    """Изменения библиотеки относительно последнего снимка"""
+
+    def __init__(self):
+        self.added = {}    # {путь: информация о проекте}
+        self.changed = {}  # {путь: информация о проекте}
+        self.removed = []  # [путь]
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+
+class ProjectCatalog:
+    """Кэш метаданных одной библиотеки проектов"""
+
+    def __init__(self, projects_dir, db_path=None, io_workers=DEFAULT_WORKERS):
+        self.projects_dir = normalize_path(projects_dir)
+        self.db_path = db_path or self.default_db_path(projects_dir)
+        self.io_workers = io_workers  # Размер пула для чтения метаданных с диска
+        # sqlite3-соединения нельзя делить между потоками, поэтому у каждого потока свое
+        self._local = threading.local()
+
+    @staticmethod
+    def default_db_path(projects_dir):
+        """Путь к файлу каталога для указанной библиотеки"""
+        return os.path.join(CACHE_DIR, f"catalog_{library_key(projects_dir)}.sqlite")
+
+    def connection(self):
+        """Возвращает соединение с базой для текущего потока"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self._reset_schema(conn)
+            self._local.conn = conn
+        return conn
+
+    def _reset_schema(self, conn):
+        """Пересоздает таблицы каталога под текущую версию схемы"""
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+        with conn:
+            for table in tables:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.executescript(SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        """Закрывает соединение текущего потока"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ============= СЛУЖЕБНЫЕ ЗНАЧЕНИЯ =============
+
+    def get_meta(self, key, default=None):
+        row = self.connection().execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self.connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # ============= ПРОЕКТЫ =============
+
+    def _read_info_file(self, project_path, info_file):
+        """Читает project_info.json, создавая его для новых проектов"""
+        if os.path.exists(info_file):
+            with open(info_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        # Создаем новую информацию о проекте
+        project_info = {
+            "name": os.path.basename(project_path),
+            "path": project_path,
+            "created": os.path.getctime(project_path),
+            "favorite": False,
+            "description": "",
+            "tags": [],
+            "last_modified": os.path.getmtime(project_path)
+        }
+        # Сохраняем информацию в файл
+        atomic_write_json(info_file, project_info)
+        return project_info
+
+    def _row_values(self, project_path, project_info, info_stat, dir_stat):
+        return (
+            project_path,
+            project_info.get("name", os.path.basename(project_path)),
+            project_info.get("created", 0),
+            json.dumps(project_info, ensure_ascii=False),
+            info_stat.st_mtime if info_stat else None,
+            info_stat.st_size if info_stat else None,
+            dir_stat.st_mtime,
+            dir_stat.st_ino,
+        )
+
+    def _list_project_dirs(self):
+        """Возвращает пути всех папок проектов в корне библиотеки"""
+        paths = []
+        with os.scandir(self.projects_dir) as entries:
+            for entry in entries:
+                if entry.name in EXCLUDED_DIRS:
+                    continue
+                try:
+                    if entry.is_dir():
+                        paths.append(normalize_path(os.path.join(self.projects_dir, entry.name)))
+                except OSError:
+                    continue
+        return paths
+
+    def _root_fingerprint(self):
+        stat = os.stat(self.projects_dir)
+        return f"{stat.st_mtime}:{stat.st_ino}"
+
+    def _probe(self, project_path, row, cancel_event=None):
+        """Выполняет дисковые операции сверки для одной папки проекта.
+
+        Вызывается из пула потоков, поэтому не обращается к базе. Возвращает
+        (состояние, информация о проекте, stat project_info.json, stat папки),
+        где состояние - одно из PROBE_*.
+        """
+        if cancel_event is not None and cancel_event.is_set():
+            return PROBE_SKIPPED, None, None, None
+
+        info_file = os.path.join(project_path, INFO_FILE_NAME)
+        try:
+            try:
+                dir_stat = os.stat(project_path)
+            except FileNotFoundError:
+                return PROBE_MISSING, None, None, None
+            try:
+                info_stat = os.stat(info_file)
+            except FileNotFoundError:
+                info_stat = None
+
+            if row is not None and info_stat is not None:
+                info_json, info_mtime, info_size, dir_mtime, dir_inode = row
+                if ((dir_mtime, dir_inode, info_mtime, info_size)
+                        == (dir_stat.st_mtime, dir_stat.st_ino, info_stat.st_mtime, info_stat.st_size)):
+                    return PROBE_UNCHANGED, None, info_stat, dir_stat
+                if (info_mtime, info_size) == (info_stat.st_mtime, info_stat.st_size):
+                    # Изменилась только папка, метаданные перечитывать не нужно
+                    return PROBE_DIR_CHANGED, None, info_stat, dir_stat
+
+            project_info = self._read_info_file(project_path, info_file)
+            if info_stat is None:
+                info_stat = os.stat(info_file)
+                dir_stat = os.stat(project_path)
+            return PROBE_READ, project_info, info_stat, dir_stat
+
+        except Exception as e:
+            print(f"Error processing project {project_path}: {e}")
+            return PROBE_FAILED, None, None, None
+
+    def _scan(self, paths, only_changed, complete=True, progress=None, cancel_event=None,
+              on_changes=None):
+        """Сверяет указанные папки проектов с каталогом.
+
+        Для каждой папки сравнивается отпечаток (mtime и inode папки, mtime и
+        размер project_info.json). При only_changed=True в результат попадают только
+        проекты, отпечаток которых изменился. complete=False означает, что
+        paths - лишь часть библиотеки, и удаленными считаются только они.
+        progress(готово, всего) вызывается по ходу сверки; если выставлен
+        cancel_event, сверка прерывается и удаленные проекты не определяются.
+        on_changes(изменения) получает новые и измененные проекты порциями
+        по ходу сверки. Прерванная сверка ничего не записывает в каталог:
+        отданные к этому моменту проекты будут найдены заново при следующей.
+        Обращения к диску выполняются в пуле из io_workers потоков, результат
+        от этого не зависит. Возвращает (проекты, изменения).
+        """
+        conn = self.connection()
+        cached = {
+            row[0]: row[1:]
+            for row in conn.execute(
+                "SELECT path, info_json, info_mtime, info_size, dir_mtime, dir_inode FROM projects")
+        }
+
+        projects_info = {}
+        changes = LibraryChanges()
+        seen = set()
+        changed_rows = []
+        batch = LibraryChanges()
+
+        cancelled = False
+        total = len(paths)
+        probes = load_ordered(
+            lambda project_path: self._probe(project_path, cached.get(project_path), cancel_event),
+            paths, self.io_workers)
+        try:
+            for done, (project_path, probe) in enumerate(zip(paths, probes)):
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled = True
+                    break
+                if done % 50 == 0:
+                    if progress is not None:
+                        progress(done, total)
+                    if on_changes is not None and batch:
+                        on_changes(batch)
+                        batch = LibraryChanges()
+
+                state, project_info, info_stat, dir_stat = probe
+                if state in (PROBE_MISSING, PROBE_SKIPPED):
+                    continue
+                seen.add(project_path)
+                if state == PROBE_FAILED:
+                    continue
+
+                row = cached.get(project_path)
+                if state == PROBE_UNCHANGED:
+                    if not only_changed:
+                        projects_info[project_path] = json.loads(row[0])
+                    continue
+                if state == PROBE_DIR_CHANGED:
+                    project_info = json.loads(row[0])
+                    projects_info[project_path] = project_info
+                    changed_rows.append(self._row_values(project_path, project_info, info_stat, dir_stat))
+                    continue
+
+                projects_info[project_path] = project_info
+                changed_rows.append(self._row_values(project_path, project_info, info_stat, dir_stat))
+                if row is None:
+                    changes.added[project_path] = batch.added[project_path] = project_info
+                else:
+                    changes.changed[project_path] = batch.changed[project_path] = project_info
+        finally:
+            probes.close()
+
+        if cancelled:
+            return projects_info, changes
+        if on_changes is not None and batch:
+            on_changes(batch)
+
+        candidates = cached if complete else [path for path in paths if path in cached]
+        changes.removed = [path for path in candidates if path not in seen]
+
+        with conn:
+            if changed_rows:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO projects "
+                    "(path, name, created, info_json, info_mtime, info_size, dir_mtime, dir_inode) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", changed_rows)
+            if changes.removed:
+                removed = [(path,) for path in changes.removed]
+                conn.executemany("DELETE FROM projects WHERE path = ?", removed)
+                conn.executemany("DELETE FROM project_stats WHERE path = ?", removed)
+                conn.executemany("DELETE FROM group_members WHERE project_path = ?", removed)
+
+        return projects_info, changes
+
+    def sync_projects(self):
+        """Сверяет каталог с папкой проектов и возвращает {путь: информация о проекте}.
+
+        project_info.json читается только для новых проектов и для тех,
+        у которых изменились mtime или размер файла.
+        """
+        if not os.path.isdir(self.projects_dir):
+            return {}
+
+        root_fingerprint = self._root_fingerprint()
+        projects_info, _ = self._scan(self._list_project_dirs(), only_changed=False)
+        self.set_meta('root_fingerprint', root_fingerprint)
+        return projects_info
+
+    def cached_projects(self):
+        """Возвращает {путь: информация о проекте} из каталога без обращения к диску"""
+        return {
+            path: json.loads(info_json)
+            for path, info_json in self.connection().execute("SELECT path, info_json FROM projects")
+        }
+
+    def rescan(self, paths=None, progress=None, cancel_event=None, on_changes=None):
+        """Инкрементально сверяет библиотеку с последним снимком.
+
+        Корень библиотеки перечитывается только если изменился его отпечаток,
+        иначе проверяются отпечатки уже известных папок проектов. Если переданы
+        paths, проверяются только эти папки. Новые и измененные проекты
+        отдаются в on_changes порциями по мере сверки. Возвращает LibraryChanges.
+        """
+        if not os.path.isdir(self.projects_dir):
+            return LibraryChanges()
+
+        if paths is not None:
+            _, changes = self._scan([normalize_path(path) for path in paths],
+                                    only_changed=True, complete=False)
+            return changes
+
+        root_fingerprint = self._root_fingerprint()
+        if root_fingerprint != self.get_meta('root_fingerprint'):
+            paths = self._list_project_dirs()
+        else:
+            paths = [row[0] for row in self.connection().execute("SELECT path FROM projects")]
+
+        _, changes = self._scan(paths, only_changed=True, progress=progress,
+                                cancel_event=cancel_event, on_changes=on_changes)
+        if cancel_event is None or not cancel_event.is_set():
+            self.set_meta('root_fingerprint', root_fingerprint)
+        return changes
+
+    def get_project(self, project_path):
+        """Возвращает закэшированную информацию о проекте или None"""
+        row = self.connection().execute(
+            "SELECT info_json FROM projects WHERE path = ?",
+            (normalize_path(project_path),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_project_info(self, project_info):
+        """Записывает project_info.json проекта и обновляет запись в каталоге"""
+        project_path = normalize_path(project_info["path"])
+        info_file = os.path.join(project_path, INFO_FILE_NAME)
+        # Обновляем время последнего изменения
+        project_info["last_modified"] = os.path.getmtime(project_path)
+        atomic_write_json(info_file, project_info)
+
+        # Обновляем снимок, чтобы собственная запись не считалась внешним изменением
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO projects "
+                "(path, name, created, info_json, info_mtime, info_size, dir_mtime, dir_inode) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._row_values(project_path, project_info, os.stat(info_file), os.stat(project_path)))
+
+    def remove_project(self, project_path):
+        """Удаляет проект из каталога"""
+        project_path = normalize_path(project_path)
+        with self.connection() as conn:
+            conn.execute("DELETE FROM projects WHERE path = ?", (project_path,))
+            conn.execute("DELETE FROM project_stats WHERE path = ?", (project_path,))
+            conn.execute("DELETE FROM group_members WHERE project_path = ?", (project_path,))
+
+    # ============= ГРУППЫ =============
+
+    def _store_groups(self, conn, groups_data):
+        conn.execute("DELETE FROM groups")
+        conn.execute("DELETE FROM group_members")
+        for position, (group_id, group_data) in enumerate(groups_data.items()):
+            conn.execute(
+                "INSERT INTO groups (group_id, name, position) VALUES (?, ?, ?)",
+                (group_id, group_data.get("name", ""), position))
+            conn.executemany(
+                "INSERT OR IGNORE INTO group_members (group_id, project_path, position) "
+                "VALUES (?, ?, ?)",
+                [(group_id, normalize_path(project["path"]), i)
+                 for i, project in enumerate(group_data.get("projects", []))])
+
+    def load_groups(self):
+        """Возвращает группы в формате groups.json: {id: {"name", "projects"}}.
+
+        groups.json перечитывается только если он изменился с прошлого раза.
+        """
+        groups_file = os.path.join(self.projects_dir, GROUPS_FILE_NAME)
+        try:
+            stat = os.stat(groups_file)
+            signature = f"{stat.st_mtime}:{stat.st_size}"
+        except FileNotFoundError:
+            signature = ""
+
+        conn = self.connection()
+        if signature != self.get_meta('groups_signature'):
+            groups_info = {}
+            if signature:
+                try:
+                    with open(groups_file, 'r', encoding='utf-8') as f:
+                        groups_info = json.load(f)
+                except Exception as e:
+                    print(f"Error loading groups: {e}")
+                    groups_info = {}
+            with conn:
+                self._store_groups(conn, groups_info)
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                             ('groups_signature', signature))
+
+        groups_info = {}
+        for group_id, name in conn.execute("SELECT group_id, name FROM groups ORDER BY position"):
+            groups_info[group_id] = {"name": name, "projects": []}
+        for group_id, project_path in conn.execute(
+                "SELECT group_id, project_path FROM group_members ORDER BY group_id, position"):
+            if group_id in groups_info:
+                groups_info[group_id]["projects"].append({"path": project_path})
+        return groups_info
+
+    def save_groups(self, groups_data):
+        """Сохраняет группы в groups.json и в каталог"""
+        groups_file = os.path.join(self.projects_dir, GROUPS_FILE_NAME)
+        # Замена файла меняет mtime корня; если до записи корень совпадал со
+        # снимком, обновляем отпечаток, чтобы не перечитывать библиотеку зря
+        root_unchanged = self._root_fingerprint() == self.get_meta('root_fingerprint')
+        atomic_write_json(groups_file, groups_data)
+
+        stat = os.stat(groups_file)
+        with self.connection() as conn:
+            self._store_groups(conn, groups_data)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                         ('groups_signature', f"{stat.st_mtime}:{stat.st_size}"))
+            if root_unchanged:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                             ('root_fingerprint', self._root_fingerprint()))
+
+    # ============= СТАТИСТИКА =============
+
+    def get_stats(self, project_path):
+        """Возвращает (file_count, total_size, fingerprint) или None"""
+        row = self.connection().execute(
+            "SELECT file_count, total_size, fingerprint FROM project_stats WHERE path = ?",
+            (normalize_path(project_path),)).fetchone()
+        return tuple(row) if row else None
+
+    def set_stats(self, project_path, file_count, total_size, fingerprint=None):
+        """Сохраняет статистику проекта"""
+        try:
+            with self.connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO project_stats (path, file_count, total_size, fingerprint) "
+                    "VALUES (?, ?, ?, ?)",
+                    (normalize_path(project_path), file_count, total_size, fingerprint))
+        except Exception as e:
+            print(f"Error saving project stats: {e}")
+            traceback.print_exc()
@@ -0,0 +1,663 @@
+"""
+Сетка проектов на основе модели и представления.
+
+Вместо отдельного виджета ProjectCard на каждый проект сетка хранит данные в
+ProjectGridModel, а карточки рисует ProjectCardDelegate - только для видимых
+строк. Группы проектов остаются виджетами ProjectGroup и встраиваются в
+сетку через setIndexWidget, поэтому их попап и перетаскивание работают
+по-прежнему. Превью и статистика загружаются в фоне только для видимых
+карточек и карточек рядом с видимой областью.
+"""
+import ast
+import traceback
+from datetime import datetime
+from PyQt6.QtWidgets import (QListView, QStyledItemDelegate, QStyle, QMenu,
+                            QApplication, QAbstractItemView, QStyleOptionViewItem)
+from PyQt6.QtCore import (Qt, QAbstractListModel, QModelIndex, QSize, QRect,
+                          QRectF, QPoint, QMimeData, QTimer, pyqtSignal)
+from PyQt6.QtGui import (QPixmap, QColor, QPainter, QPainterPath, QPen, QFont,
+                         QAction, QDrag)
+from styles import COLORS, SIZES
+from project_card import (open_in_blender, open_in_substance, format_size,
+                          delete_project_files, export_project_archive)
+from thumbnail_cache import (project_thumbnail, cached_project_thumbnail,
+                             invalidate_project_thumbnail)
+import resources
+
+
+def _px(name):
+    return int(SIZES[name].replace('px', ''))
+
+
+# Насколько экранов выше и ниже видимой области превью загружаются заранее
+PREFETCH_SCREENS = 1
+
+# Геометрия карточки (совпадает с ProjectCard)
+CARD_WIDTH = _px('card_width')
+CARD_HEIGHT = _px('card_min_height')
+CARD_SPACING = 20
+PREVIEW_PADDING = _px('preview_padding')
+PREVIEW_WIDTH = _px('preview_width')
+PREVIEW_HEIGHT = _px('preview_height')
+ICON_SIZE = 20
+
+
+class ProjectGridModel(QAbstractListModel):
+    """Элементы сетки: словари проектов и группы (ProjectGroup)"""
+    ProjectRole = Qt.ItemDataRole.UserRole + 1
+    GroupRole = Qt.ItemDataRole.UserRole + 2
+    PreviewRole = Qt.ItemDataRole.UserRole + 3
+    StatsRole = Qt.ItemDataRole.UserRole + 4
+    PreviewPendingRole = Qt.ItemDataRole.UserRole + 5
+
+    def __init__(self, stats_service=None, thumbnail_loader=None, parent=None):
+        super().__init__(parent)
+        self.items = []
+        self._rows = None  # {путь проекта или id(группы): строка}, строится по требованию
+        # Статистика считается в фоне, карточка перерисовывается по готовности
+        self.stats_service = stats_service
+        if stats_service is not None:
+            stats_service.stats_ready.connect(self._on_stats_ready)
+        self.thumbnail_loader = thumbnail_loader
+        if thumbnail_loader is not None:
+            thumbnail_loader.thumbnail_ready.connect(self.update_project)
+        self._scheduled = set()  # проекты, для которых сейчас запрошена загрузка
+        self._deferred = None  # проекты, ожидающие вставки в конце пачки
+
+    @staticmethod
+    def _key(item):
+        if isinstance(item, dict):
+            return item["path"].replace("\\", "/")
+        return id(item)
+
+    def _row_index(self):
+        if self._rows is None:
+            self._rows = {self._key(item): row for row, item in enumerate(self.items)}
+        return self._rows
+
+    # ============= QAbstractListModel =============
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def flags(self, index):
+        flags = Qt.ItemFlag.ItemIsEnabled
+        if index.isValid() and isinstance(self.items[index.row()], dict):
+            flags |= Qt.ItemFlag.ItemIsDragEnabled | Qt.ItemFlag.ItemIsDropEnabled
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.items):
+            return None
+        item = self.items[index.row()]
+        if isinstance(item, dict):
+            if role == Qt.ItemDataRole.DisplayRole:
+                return item.get("name", "")
+            if role == self.ProjectRole:
+                return item
+            if role == self.PreviewRole:
+                return self.preview(item["path"])
+            if role == self.PreviewPendingRole:
+                return not cached_project_thumbnail(item["path"])[0]
+            if role == self.StatsRole:
+                return self.project_stats(item["path"])
+        else:
+            if role == Qt.ItemDataRole.DisplayRole:
+                return item.name
+            if role == self.GroupRole:
+                return item
+        return None
+
+    # ============= ИЗМЕНЕНИЕ СОСТАВА =============
+
+    def begin_batch(self):
+        """Начинает пачку: проекты копятся и вставляются одним изменением модели.
+
+        Каждая вставка заставляет представление перестроить раскладку, поэтому
+        добавление тысяч строк по одной занимает квадратичное время.
+        """
+        if self._deferred is None:
+            self._deferred = []
+
+    def end_batch(self):
+        self._insert_deferred()
+        self._deferred = None
+
+    def _insert_deferred(self):
+        if not self._deferred:
+            return
+        items, self._deferred = self._deferred, []
+        first = len(self.items)
+        self.beginInsertRows(QModelIndex(), first, first + len(items) - 1)
+        self.items.extend(items)
+        if self._rows is not None:
+            for row, item in enumerate(items, first):
+                self._rows[self._key(item)] = row
+        self.endInsertRows()
+
+    def add_item(self, item):
+        if self._deferred is not None and isinstance(item, dict):
+            self._deferred.append(item)
+            return len(self.items) + len(self._deferred) - 1
+        self._insert_deferred()
+        row = len(self.items)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.items.append(item)
+        if self._rows is not None:
+            self._rows[self._key(item)] = row
+        self.endInsertRows()
+        return row
+
+    def remove_row(self, row):
+        self._insert_deferred()
+        if 0 <= row < len(self.items):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            item = self.items.pop(row)
+            self._rows = None
+            self.endRemoveRows()
+            return item
+        return None
+
+    def clear(self):
+        self.beginResetModel()
+        self.items = []
+        if self._deferred is not None:
+            self._deferred = []
+        self._rows = None
+        self.endResetModel()
+        self.schedule([])
+
+    def row_of(self, item):
+        """Строка проекта (словарь или путь) или группы; -1, если ее нет"""
+        self._insert_deferred()
+        if isinstance(item, str):
+            key = item.replace("\\", "/")
+        else:
+            key = self._key(item)
+        return self._row_index().get(key, -1)
+
+    def row_keys(self):
+        """{ключ строки: номер}; ключ - путь проекта или id виджета группы"""
+        self._insert_deferred()
+        return self._row_index()
+
+    def project_at(self, row):
+        self._insert_deferred()
+        item = self.items[row] if 0 <= row < len(self.items) else None
+        return item if isinstance(item, dict) else None
+
+    def projects(self):
+        self._insert_deferred()
+        return [item for item in self.items if isinstance(item, dict)]
+
+    def groups(self):
+        self._insert_deferred()
+        return [item for item in self.items if not isinstance(item, dict)]
+
+    def update_project(self, project_path, refresh_preview=False):
+        """Сообщает представлению, что данные проекта изменились"""
+        row = self.row_of(project_path)
+        if row < 0:
+            return False
+        if refresh_preview:
+            invalidate_project_thumbnail(project_path)
+            if self.thumbnail_loader is not None and project_path.replace("\\", "/") in self._scheduled:
+                self.thumbnail_loader.request(project_path)
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+        return True
+
+    # ============= ПРЕВЬЮ И СТАТИСТИКА =============
+
+    def preview(self, project_path):
+        """Возвращает миниатюру превью проекта (None, если ее нет или она еще грузится)"""
+        if self.thumbnail_loader is None:
+            try:
+                return project_thumbnail(project_path)
+            except Exception as e:
+                print(f"Ошибка при обновлении превью: {e}")
+                return None
+        return cached_project_thumbnail(project_path)[1]
+
+    def project_stats(self, project_path):
+        """Возвращает (файлов, размер) или None, пока статистика не посчитана"""
+        if self.stats_service is None:
+            return None
+        return self.stats_service.cached(project_path)
+
+    def schedule(self, rows):
+        """Запрашивает превью и статистику для строк рядом с видимой областью.
+
+        rows - список (строка, удаление от видимой области в рядах сетки);
+        чем ближе строка, тем выше приоритет. Запросы проектов, которых
+        больше нет в списке, отменяются.
+        """
+        wanted = set()
+        for row, distance in rows:
+            project_info = self.project_at(row)
+            if project_info is None:
+                continue
+            path = self._key(project_info)
+            wanted.add(path)
+            if self.thumbnail_loader is not None:
+                self.thumbnail_loader.request(path, -distance)
+            if self.stats_service is not None:
+                self.stats_service.request(path, priority=-distance)
+
+        for path in self._scheduled - wanted:
+            if self.thumbnail_loader is not None:
+                self.thumbnail_loader.cancel(path)
+            if self.stats_service is not None:
+                self.stats_service.cancel(path)
+        self._scheduled = wanted
+
+    def _on_stats_ready(self, project_path, stats):
+        self.update_project(project_path)
+
+
+class ProjectCardDelegate(QStyledItemDelegate):
+    """Рисует карточку проекта так же, как выглядит ProjectCard"""
+
+    def icon(self, name):
+        return resources.icon(f"icons/{name}.png")
+
+    def folder_pixmap(self):
+        return resources.pixmap("icons/open-folder.png", 100, 100)
+
+    def sizeHint(self, option, index):
+        return QSize(CARD_WIDTH, CARD_HEIGHT)
+
+    @staticmethod
+    def card_rect(rect):
+        return QRect(rect.x(), rect.y(), CARD_WIDTH, CARD_HEIGHT)
+
+    @staticmethod
+    def icon_rects(rect, project_info):
+        """Прямоугольники кнопок программ: {"blender"/"substance": QRect}"""
+        card = ProjectCardDelegate.card_rect(rect)
+        names = []
+        if project_info.get("blender_project", True):
+            names.append("blender")
+        if project_info.get("substance_project", True):
+            names.append("substance")
+        rects = {}
+        x = card.right() - 8 - ICON_SIZE + 1
+        y = card.y() + PREVIEW_HEIGHT + 16 + 4 + 38 + 8 + 11
+        for name in reversed(names):
+            rects[name] = QRect(x, y, ICON_SIZE, ICON_SIZE)
+            x -= ICON_SIZE + 4
+        return rects
+
+    def paint(self, painter, option, index):
+        project_info = index.data(ProjectGridModel.ProjectRole)
+        if project_info is None:
+            return  # Группы рисуются своими виджетами
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        card = self.card_rect(option.rect)
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+
+        # Фон и рамка
+        path = QPainterPath()
+        path.addRoundedRect(QRectF(card).adjusted(0.5, 0.5, -0.5, -0.5), 16, 16)
+        painter.fillPath(path, QColor(COLORS['card_hover'] if hovered else COLORS['card_background']))
+        painter.setPen(QPen(QColor(COLORS['primary'] if hovered else COLORS['input_border']), 1))
+        painter.drawPath(path)
+
+        # Превью
+        preview_rect = QRect(card.x() + PREVIEW_PADDING, card.y() + PREVIEW_PADDING,
+                             PREVIEW_WIDTH, PREVIEW_HEIGHT)
+        preview_path = QPainterPath()
+        preview_path.addRoundedRect(QRectF(preview_rect), 10, 10)
+        painter.fillPath(preview_path, QColor(COLORS['placeholder_bg']))
+        pixmap = index.data(ProjectGridModel.PreviewRole)
+        if pixmap is not None:
+            painter.save()
+            painter.setClipPath(preview_path)
+            target = QRect(0, 0, pixmap.width(), pixmap.height())
+            target.moveCenter(preview_rect.center())
+            painter.drawPixmap(target, pixmap)
+            painter.restore()
+        elif not index.data(ProjectGridModel.PreviewPendingRole):
+            folder = self.folder_pixmap()
+            if not folder.isNull():
+                target = QRect(0, 0, folder.width(), folder.height())
+                target.moveCenter(preview_rect.center())
+                painter.drawPixmap(target, folder)
+
+        # Название
+        content_top = card.y() + PREVIEW_HEIGHT + 16
+        font = QFont(option.font)
+        font.setPixelSize(16)
+        font.setBold(True)
+        painter.setFont(font)
+        painter.setPen(QColor(COLORS['text_primary']))
+        name_rect = QRect(card.x() + 8, content_top + 4, CARD_WIDTH - 16, 38)
+        painter.drawText(name_rect, Qt.AlignmentFlag.AlignCenter | Qt.TextFlag.TextWordWrap,
+                         project_info.get("name", ""))
+
+        # Дата создания и статистика
+        font.setPixelSize(12)
+        font.setBold(False)
+        painter.setFont(font)
+        painter.setPen(QColor(COLORS['text_secondary']))
+        info_top = name_rect.bottom() + 1 + 8
+        try:
+            created_date = datetime.fromtimestamp(project_info["created"]).strftime("%d.%m.%y")
+            painter.drawText(QRect(card.x() + 13, info_top + 5, 200, 16),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                             f"Дата создания: {created_date}")
+        except Exception:
+            pass
+        stats = index.data(ProjectGridModel.StatsRole)
+        if stats is not None:
+            file_count, total_size = stats
+            painter.drawText(QRect(card.x() + 8, info_top + 26, 200, 16),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                             f"{file_count} файлов {format_size(total_size)}")
+
+        # Кнопки программ
+        for name, rect in self.icon_rects(option.rect, project_info).items():
+            icon = self.icon("blend" if name == "blender" else "substance")
+            icon.paint(painter, rect)
+
+        painter.restore()
+
+
+class ProjectGridView(QListView):
+    """Сетка карточек: клики, кнопки программ, контекстное меню и перетаскивание"""
+    project_clicked = pyqtSignal(dict)
+    deleted = pyqtSignal(dict)
+    favorite_changed = pyqtSignal(dict, bool)
+    group_created = pyqtSignal(str, list)
+    project_dropped = pyqtSignal(dict)  # проект перетащили на свободное место сетки
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Загрузка превью и статистики следует за видимой областью
+        # (таймер нужен раньше всего: updateGeometries вызывается уже при настройке)
+        self.schedule_timer = QTimer(self)
+        self.schedule_timer.setSingleShot(True)
+        self.schedule_timer.setInterval(30)
+        self.schedule_timer.timeout.connect(self.schedule_visible)
+        self.verticalScrollBar().valueChanged.connect(lambda value: self.schedule_timer.start())
+
+        self.setViewMode(QListView.ViewMode.IconMode)
+        self.setMovement(QListView.Movement.Static)
+        # Раскладка пересчитывается в resizeEvent, только если изменилось число колонок
+        self.setResizeMode(QListView.ResizeMode.Fixed)
+        self._columns = 0
+        self.setFlow(QListView.Flow.LeftToRight)
+        self.setWrapping(True)
+        self.setUniformItemSizes(True)
+        self.setGridSize(QSize(CARD_WIDTH + CARD_SPACING, CARD_HEIGHT + CARD_SPACING))
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.verticalScrollBar().setSingleStep(30)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setFrameShape(QListView.Shape.NoFrame)
+        self.setMouseTracking(True)
+        self.setAcceptDrops(True)
+        self.setDragEnabled(True)
+        self.viewport().setCursor(Qt.CursorShape.PointingHandCursor)
+        self.setItemDelegate(ProjectCardDelegate(self))
+
+        self.press_pos = None
+        self.press_index = QModelIndex()
+        self._hidden_keys = set()  # ключи строк, скрытых фильтром
+
+    def column_count(self):
+        """Число колонок, которое QListView разместит в текущей ширине"""
+        # Ряд переносится, когда ячейка не помещается в viewport().rect().right()
+        return max(1, (self.viewport().width() - 1) // self.gridSize().width())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        columns = self.column_count()
+        if columns != self._columns:
+            self._columns = columns
+            self.scheduleDelayedItemsLayout()
+
+    def apply_filter(self, visible_keys):
+        """Оставляет видимыми строки с ключами из visible_keys (None - все строки).
+
+        Меняется состояние только тех строк, которые были скрыты или показаны
+        предыдущим вызовом, поэтому уточнение запроса не обходит всю сетку.
+        """
+        rows = self.model().row_keys()
+        hidden = set() if visible_keys is None else rows.keys() - visible_keys
+        for key in hidden ^ self._hidden_keys:
+            row = rows.get(key)
+            if row is not None:
+                self.setRowHidden(row, key in hidden)
+        self._hidden_keys = hidden
+
+    def reset(self):
+        super().reset()
+        self._hidden_keys = set()
+
+    def rowsAboutToBeRemoved(self, parent, start, end):
+        # Вставленная заново строка будет видимой: забываем, что она была скрыта
+        items = self.model().items
+        for row in range(start, end + 1):
+            self._hidden_keys.discard(ProjectGridModel._key(items[row]))
+        super().rowsAboutToBeRemoved(parent, start, end)
+
+    def updateGeometries(self):
+        # Вызывается после каждой перестройки раскладки: вставка, удаление,
+        # фильтр, изменение размера
+        super().updateGeometries()
+        self.schedule_timer.start()
+
+    def schedule_visible(self):
+        """Запрашивает превью и статистику видимых карточек и карточек рядом с ними"""
+        model = self.model()
+        if not isinstance(model, ProjectGridModel):
+            return
+        viewport = self.viewport().rect()
+        grid = self.gridSize()
+        offset = self.verticalOffset()
+        margin = viewport.height() * PREFETCH_SCREENS
+        first = max(0, (offset - margin) // grid.height())
+        last = (offset + viewport.height() + margin) // grid.height()
+
+        rows = []
+        seen = set()
+        for grid_row in range(first, last + 1):
+            top = grid_row * grid.height() - offset
+            bottom = top + CARD_HEIGHT
+            if bottom < 0:
+                distance = (-bottom) // grid.height() + 1
+            elif top > viewport.height():
+                distance = (top - viewport.height()) // grid.height() + 1
+            else:
+                distance = 0
+            for x in range(0, viewport.width(), grid.width()):
+                index = self.indexAt(QPoint(x + grid.width() // 2, top + CARD_HEIGHT // 2))
+                if index.isValid() and index.row() not in seen:
+                    seen.add(index.row())
+                    rows.append((index.row(), distance))
+        model.schedule(rows)
+
+    def project_at(self, pos):
+        """Возвращает (индекс, данные проекта) под точкой viewport"""
+        index = self.indexAt(pos)
+        if index.isValid() and self.visualRect(index).contains(pos):
+            project_info = index.data(ProjectGridModel.ProjectRole)
+            if project_info is not None and ProjectCardDelegate.card_rect(self.visualRect(index)).contains(pos):
+                return index, project_info
+        return QModelIndex(), None
+
+    def add_group_widget(self, row, group):
+        """Встраивает виджет группы в ячейку сетки"""
+        self.setIndexWidget(self.model().index(row), group)
+
+    # ============= МЫШЬ =============
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.press_pos = event.position().toPoint()
+            self.press_index, _ = self.project_at(self.press_pos)
+            event.accept()
+            return
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if (event.buttons() & Qt.MouseButton.LeftButton) and self.press_pos is not None and self.press_index.isValid():
+            distance = (event.position().toPoint() - self.press_pos).manhattanLength()
+            if distance >= QApplication.startDragDistance():
+                index = self.press_index
+                self.press_pos = None
+                self.press_index = QModelIndex()
+                self.start_project_drag(index, event.position().toPoint())
+                return
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton and self.press_pos is not None:
+            pos = event.position().toPoint()
+            index, project_info = self.project_at(pos)
+            if project_info is not None and index == self.press_index:
+                action = None
+                for name, rect in ProjectCardDelegate.icon_rects(self.visualRect(index), project_info).items():
+                    if rect.contains(pos):
+                        action = name
+                if action == "blender":
+                    open_in_blender(project_info, self)
+                elif action == "substance":
+                    open_in_substance(project_info, self)
+                else:
+                    self.project_clicked.emit(project_info)
+            self.press_pos = None
+            self.press_index = QModelIndex()
+            event.accept()
+            return
+        super().mouseReleaseEvent(event)
+
+    def contextMenuEvent(self, event):
+        index, project_info = self.project_at(event.pos())
+        if project_info is None:
+            return
+        menu = QMenu(self)
+
+        open_action = QAction("Открыть", self)
+        open_action.triggered.connect(lambda: self.project_clicked.emit(project_info))
+        menu.addAction(open_action)
+
+        menu.addSeparator()
+
+        is_favorite = project_info.get("favorite", False)
+        favorite_action = QAction("Убрать из избранного" if is_favorite else "Добавить в избранное", self)
+        favorite_action.triggered.connect(lambda: self.toggle_favorite(project_info))
+        menu.addAction(favorite_action)
+
+        menu.addSeparator()
+
+        export_action = QAction("Экспортировать", self)
+        export_action.triggered.connect(lambda: export_project_archive(project_info, self))
+        menu.addAction(export_action)
+
+        menu.addSeparator()
+
+        delete_action = QAction("Удалить", self)
+        delete_action.triggered.connect(lambda: self.confirm_delete(project_info))
+        menu.addAction(delete_action)
+
+        menu.exec(event.globalPos())
+
+    def toggle_favorite(self, project_info):
+        is_favorite = not project_info.get("favorite", False)
+        project_info["favorite"] = is_favorite
+        self.model().update_project(project_info["path"])
+        self.favorite_changed.emit(project_info, is_favorite)
+
+    def confirm_delete(self, project_info):
+        if delete_project_files(project_info, self):
+            self.deleted.emit(project_info)
+
+    # ============= ПЕРЕТАСКИВАНИЕ =============
+
+    def render_card(self, index):
+        """Рисует карточку в QPixmap (для превью перетаскивания)"""
+        pixmap = QPixmap(CARD_WIDTH, CARD_HEIGHT)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        option = QStyleOptionViewItem()
+        self.initViewItemOption(option)
+        option.rect = QRect(0, 0, CARD_WIDTH, CARD_HEIGHT)
+        self.itemDelegate().paint(painter, option, index)
+        painter.end()
+        return pixmap
+
+    def start_project_drag(self, index, pos):
+        project_info = index.data(ProjectGridModel.ProjectRole)
+        if project_info is None:
+            return
+        drag = QDrag(self)
+        mime_data = QMimeData()
+        # Тот же формат, что и у ProjectCard: repr словаря проекта
+        mime_data.setText(str(project_info))
+        drag.setMimeData(mime_data)
+        drag.setPixmap(self.render_card(index).scaled(256, 280, Qt.AspectRatioMode.KeepAspectRatio))
+        drag.setHotSpot(pos - self.visualRect(index).topLeft())
+        drag.exec(Qt.DropAction.MoveAction)
+
+    @staticmethod
+    def dropped_project(event):
+        try:
+            return ast.literal_eval(event.mimeData().text())
+        except Exception:
+            return None
+
+    def _drop_target(self, event):
+        """Определяет, что произойдет при сбросе: (проект под курсором, перетаскиваемый проект).
+
+        Если под курсором нет карточки, первый элемент - None: проект
+        возвращается в общую сетку. (None, None) - сброс здесь невозможен.
+        """
+        if not event.mimeData().hasText():
+            return None, None
+        dropped = self.dropped_project(event)
+        if not isinstance(dropped, dict) or "path" not in dropped:
+            return None, None
+        _, target = self.project_at(event.position().toPoint())
+        if target is None:
+            # Свободное место: имеет смысл только для проектов не из общей сетки
+            if self.model().row_of(dropped["path"]) >= 0:
+                return None, None
+            return None, dropped
+        if dropped["path"] == target["path"]:
+            return None, None
+        return target, dropped
+
+    def dragEnterEvent(self, event):
+        # Принимаем любой текст: решение принимается в dragMoveEvent по позиции
+        if event.mimeData().hasText():
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+
+    def dragMoveEvent(self, event):
+        _, dropped = self._drop_target(event)
+        if dropped is not None:
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+
+    def dropEvent(self, event):
+        try:
+            target, dropped = self._drop_target(event)
+            if target is not None:
+                # Бросили проект на другой проект - создаем группу
+                self.group_created.emit("Новая группа", [target, dropped])
+                event.acceptProposedAction()
+                return
+            if dropped is not None:
+                self.project_dropped.emit(dropped)
+                event.acceptProposedAction()
+                return
+        except Exception as e:
+            print(f"Error in dropEvent: {e}")
+            traceback.print_exc()
+        event.ignore()
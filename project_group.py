@@ -1,15 +1,76 @@
 from PyQt6.QtWidgets import (QFrame, QVBoxLayout, QLabel, QHBoxLayout, 
                             QPushButton, QMessageBox, QWidget, QMenu, QSizePolicy,
-                            QInputDialog, QApplication, QGridLayout, QScrollArea, QLineEdit)
+                            QInputDialog, QApplication, QScrollArea, QLineEdit)
 from PyQt6.QtCore import (pyqtSignal, QSize, Qt, QPoint, QTimer, QPropertyAnimation, 
                        QEasingCurve, QRect)
-from PyQt6.QtGui import (QPixmap, QPainter, QCursor, QAction, QPalette, QColor)
-from styles import PROJECT_CARD_STYLES, GROUP_CARD_STYLES, COLORS, SIZES
+from PyQt6.QtGui import (QPixmap, QPainter, QCursor, QAction, QPalette, QColor, QPainterPath)
+from styles import GROUP_CARD_STYLES, COLORS, SIZES
 from project_card import ProjectCard
+from group_registry import project_key
+from flow_layout import FlowLayout
+from thumbnail_cache import (project_thumbnail, cached_project_thumbnail,
+                             invalidate_project_thumbnail, shared_loader)
 import traceback
+from itertools import islice
+
+# Миниатюры первых проектов на плитке свернутой группы
+STRIP_THUMBNAILS = 3
+STRIP_THUMBNAIL_SIZE = QSize(68, 38)
+STRIP_SPACING = 8
+
+class ThumbnailStrip(QWidget):
+    """Полоска миниатюр первых проектов группы.
+    
+    Миниатюры берутся из кэша при отрисовке; недостающие загружаются в фоне,
+    поэтому плитки групп за пределами экрана ничего не читают с диска.
+    """
+    
+    def __init__(self, group, parent=None):
+        super().__init__(parent)
+        self.group = group
+        self.setFixedHeight(STRIP_THUMBNAIL_SIZE.height())
+        loader = shared_loader()
+        if loader is not None:
+            loader.thumbnail_ready.connect(self.on_thumbnail_ready)
+    
+    def project_paths(self):
+        return list(islice(self.group.members, STRIP_THUMBNAILS))
+    
+    def thumbnail(self, project_path):
+        """Миниатюра из кэша; при промахе ставит загрузку в очередь и возвращает None"""
+        loader = shared_loader()
+        if loader is None:
+            return project_thumbnail(project_path)
+        known, pixmap = cached_project_thumbnail(project_path)
+        if not known:
+            loader.request(project_path)
+        return pixmap
+    
+    def on_thumbnail_ready(self, project_path):
+        if project_path in self.project_paths():
+            self.update()
+    
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        placeholder = QColor(COLORS['placeholder_bg'])
+        for i, project_path in enumerate(self.project_paths()):
+            rect = QRect(QPoint(i * (STRIP_THUMBNAIL_SIZE.width() + STRIP_SPACING), 0),
+                         STRIP_THUMBNAIL_SIZE)
+            clip = QPainterPath()
+            clip.addRoundedRect(rect.toRectF(), 6, 6)
+            painter.setClipPath(clip)
+            pixmap = self.thumbnail(project_path)
+            if pixmap is not None:
+                painter.drawPixmap(rect, pixmap)
+            else:
+                painter.fillRect(rect, placeholder)
+        painter.end()
 
 class GroupPopup(QWidget):
     name_changed = pyqtSignal(str)  # Сигнал для уведомления об изменении имени
+    closed = pyqtSignal()  # Попап скрыт (после анимации)
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -27,21 +88,9 @@ class GroupPopup(QWidget):
         self.header_layout.setContentsMargins(0, 0, 0, 16)
         
         # Поле ввода для названия
+        # Оформление попапа задает общая таблица стилей (styles.GROUP_POPUP_STYLE)
         self.title = QLineEdit()
-        self.title.setStyleSheet(f"""
-            QLineEdit {{
-                color: {COLORS['text_light']};
-                font-size: 24px;
-                font-weight: bold;
-                background: transparent;
-                border: none;
-                border-radius: 8px;
-                padding: 4px 8px;
-            }}
-            QLineEdit:hover, QLineEdit:focus {{
-                background: rgba(255, 255, 255, 0.1);
-            }}
-        """)
+        self.title.setObjectName("popup_title")
         self.title.setMinimumWidth(300)
         self.title.setClearButtonEnabled(False)
         self.title.setPlaceholderText("Введите название группы")
@@ -52,53 +101,24 @@ class GroupPopup(QWidget):
         self.close_btn = QPushButton("×")
         self.close_btn.setFixedSize(32, 32)
         self.close_btn.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.close_btn.setStyleSheet(f"""
-            QPushButton {{
-                background: rgba(255, 255, 255, 0.1);
-                color: {COLORS['text_light']};
-                font-size: 24px;
-                border: none;
-                border-radius: 16px;
-                margin: 0px;
-                padding: 0px;
-                text-align: center;
-                line-height: 32px;
-            }}
-            QPushButton:hover {{
-                background: rgba(255, 255, 255, 0.2);
-            }}
-        """)
+        self.close_btn.setObjectName("popup_close")
         self.header_layout.addWidget(self.close_btn)
         self.layout.addWidget(self.header)
         
         # Контейнер для карточек
         self.grid = QWidget()
         self.grid.setObjectName("scrollContent")
-        self.grid_layout = QGridLayout(self.grid)
-        self.grid_layout.setSpacing(20)
-        self.grid_layout.setContentsMargins(0, 0, 0, 0)
-        self.grid_layout.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
+        # Карточки по 3 в ряд; при добавлении и удалении сдвигаются только соседние
+        card_width = int(SIZES['card_width'].replace('px', ''))
+        card_height = int(SIZES['card_min_height'].replace('px', ''))
+        self.grid_layout = FlowLayout(self.grid, QSize(card_width, card_height), spacing=20, max_columns=3)
         self.layout.addWidget(self.grid)
         
         # Создаем виджет-подложку для фона
         self.background = QFrame(self)
-        self.background.setObjectName("background")
-        self.background.setStyleSheet(f"""
-            QFrame#background {{
-                background: {COLORS['background']};
-                border-radius: {SIZES['radius_large']};
-                border: 1px solid {COLORS['text_light']};
-            }}
-        """)
+        self.background.setObjectName("popup_background")
         self.background.lower()
         
-        # Настройка внешнего вида
-        self.setStyleSheet("""
-            GroupPopup {
-                background: transparent;
-            }
-        """)
-        
         # Добавляем анимацию
         self.animation = QPropertyAnimation(self, b"geometry")
         self.animation.setDuration(300)
@@ -193,8 +213,9 @@ class GroupPopup(QWidget):
         # Показываем виджет и запускаем анимацию
         super().show()
         self.animation.start()
+        self.load_cards()
 
-    def hide(self):
+    def close_animated(self):
         """Скрывает попап с анимацией"""
         # Отключаем предыдущие соединения, если они были
         try:
@@ -222,7 +243,7 @@ class GroupPopup(QWidget):
         
         # Подключаем сигнал завершения анимации к закрытию
         def finish_hide():
-            super(GroupPopup, self).hide()
+            self.hide()
             try:
                 self.animation.finished.disconnect(finish_hide)
             except:
@@ -233,6 +254,33 @@ class GroupPopup(QWidget):
         # Запускаем анимацию
         self.animation.start()
 
+    def hideEvent(self, event):
+        # Попап закрывается и самим Qt (клик мимо, Esc), поэтому карточки
+        # отпускаются здесь, а не в методе, который вызывает приложение
+        super().hideEvent(event)
+        if not event.spontaneous():
+            self.release_cards()
+            self.closed.emit()
+
+    def cards(self):
+        """Карточки проектов в попапе"""
+        cards = []
+        for i in range(self.grid_layout.count()):
+            widget = self.grid_layout.itemAt(i).widget()
+            if widget is not None:
+                cards.append(widget)
+        return cards
+
+    def load_cards(self):
+        """Запрашивает превью и статистику карточек: верхние ряды раньше"""
+        for i, card in enumerate(self.cards()):
+            card.load_content(priority=-(i // 3))
+
+    def release_cards(self):
+        """Отпускает превью закрытого попапа и отменяет незавершенную загрузку"""
+        for card in self.cards():
+            card.release_content()
+
     def mousePressEvent(self, event):
         # Предотвращаем закрытие при клике внутри попапа
         event.accept()
@@ -252,11 +300,15 @@ class ProjectGroup(QFrame):
     project_clicked = pyqtSignal(dict)  # Сигнал для открытия проекта
     group_changed = pyqtSignal()  # Сигнал для уведомления об изменении группы
     group_created = pyqtSignal(str, list)  # Сигнал для создания новой группы
+    project_added = pyqtSignal(dict)  # Проект добавлен в группу
+    project_removed = pyqtSignal(dict)  # Проект убран из группы
     
     def __init__(self, name="Новая группа", projects=None, parent=None):
         super().__init__(parent)
-        self.projects = projects or []
+        # {ключ проекта: словарь проекта} в порядке группы - поиск и удаление за O(1)
+        self.members = {project_key(project): project for project in projects or []}
         self.name = name
+        self.group_id = None  # Назначается реестром групп
         
         # Настраиваем внешний вид
         self.setObjectName("project_group")
@@ -280,38 +332,34 @@ class ProjectGroup(QFrame):
         self.layout.setContentsMargins(12, 12, 12, 12)
         
         # Название группы
+        # Оформление плитки задает styles.GROUP_TILE_STYLE
         self.name_label = QLabel(self.name)
-        self.name_label.setObjectName("title")
-        self.name_label.setStyleSheet(f"""
-            color: {COLORS['text_primary']};
-            font-size: 16px;
-            font-weight: bold;
-            margin-bottom: 4px;
-        """)
+        self.name_label.setObjectName("group_title")
         self.layout.addWidget(self.name_label)
         
         # Количество проектов
         self.count_label = QLabel()
-        self.count_label.setStyleSheet(f"""
-            color: {COLORS['text_secondary']};
-            font-size: 14px;
-            margin-bottom: 8px;
-        """)
+        self.count_label.setObjectName("group_count")
         self.layout.addWidget(self.count_label)
         
         # Растягивающийся спейсер
         self.layout.addStretch()
         
+        # Миниатюры первых проектов
+        self.strip = ThumbnailStrip(self)
+        self.layout.addWidget(self.strip)
+        
         # Создаем попап
         self.popup = GroupPopup()
         self.popup.set_title(self.name)
         self.popup.close_btn.clicked.connect(self.close_popup)
         self.popup.name_changed.connect(self._on_name_changed)
+        self.popup.closed.connect(self.release_cards)
         
-        # Создаем карточки проектов
-        self.project_cards = []
-        for project in self.projects:
-            self._create_card(project)
+        # Карточки проектов {ключ проекта: карточка} создаются при открытии попапа
+        # и удаляются после закрытия
+        self.project_cards = {}
+        self.cards_built = False
         
         # Обновляем информацию и внешний вид
         self.update_info()
@@ -339,60 +387,80 @@ class ProjectGroup(QFrame):
         card.dragged_out.connect(self.handle_project_dragged)
         card.drag_finished.connect(self.handle_drag_finished)
         
-        self.project_cards.append(card)
+        self.project_cards[project_key(project)] = card
+        self.popup.grid_layout.addWidget(card)
         return card
 
+    def build_cards(self):
+        """Создает карточки всех проектов группы для попапа"""
+        if self.cards_built:
+            return
+        self.cards_built = True
+        for project in self.members.values():
+            self._create_card(project)
+
+    def release_cards(self):
+        """Удаляет карточки закрытого попапа: в свернутой группе нужна только полоска миниатюр"""
+        if self.popup.isVisible():
+            return
+        self.cards_built = False
+        for card in self.project_cards.values():
+            self.popup.grid_layout.removeWidget(card)
+            card.deleteLater()
+        self.project_cards = {}
+
+    def member(self, project):
+        """Возвращает словарь проекта группы (по словарю или пути) или None"""
+        return self.members.get(project_key(project))
+
+    def card_for(self, project):
+        """Карточка проекта в попапе или None, если попап закрыт"""
+        return self.project_cards.get(project_key(project))
+
+    def refresh_preview(self, project):
+        """Перечитывает превью проекта группы после изменения preview.png"""
+        card = self.card_for(project)
+        if card is not None:
+            card.check_preview_update()
+        else:
+            invalidate_project_thumbnail(project_key(project))
+            self.strip.update()
+
     def update_stack_appearance(self):
-        """Обновляет внешний вид стопки карточек"""
-        num_projects = len(self.projects)
-        
-        # Основной контейнер
-        self.content.setStyleSheet(f"""
-            QFrame#content_frame {{
-                background-color: {COLORS['card_background']};
-                border-radius: 16px;
-                border: 1px solid {COLORS['input_border']};
-            }}
-            QFrame#content_frame:hover {{
-                border: 1px solid {COLORS['primary']};
-                background-color: {COLORS['card_hover']};
-            }}
-        """)
+        """Обновляет внешний вид стопки карточек (число теней зависит от числа проектов)"""
+        self.update()
 
     def update_info(self):
         """Обновляет информацию о группе"""
-        count = len(self.projects)
+        count = len(self.members)
         self.count_label.setText(f"{count} проект{'ов' if count != 1 else ''}")
         
         # Обновляем внешний вид стопки
         self.update_stack_appearance()
+        self.strip.update()
         
-        # Обновляем сетку в попапе
-        while self.popup.grid_layout.count():
-            item = self.popup.grid_layout.takeAt(0)
-            if item.widget():
-                item.widget().setParent(None)
-        
-        # Добавляем карточки в сетку по 3 в ряд с отступами
-        self.popup.grid_layout.setSpacing(20)  # Устанавливаем отступы между карточками
-        for i, card in enumerate(self.project_cards):
-            row = i // 3
-            col = i % 3
-            self.popup.grid_layout.addWidget(card, row, col, Qt.AlignmentFlag.AlignTop)
-            
         # Анимируем изменение размера попапа, если он видим
         self.popup.animate_resize()
+        if self.popup.isVisible():
+            self.popup.load_cards()
+
+    @property
+    def projects(self):
+        """Словари проектов группы в порядке группы"""
+        return list(self.members.values())
+
+    def contains(self, project):
+        """Проверяет, состоит ли проект (словарь или путь) в группе"""
+        return project_key(project) in self.members
 
     def add_project(self, project):
         """Добавление проекта в группу"""
-        if project not in self.projects:
-            self.projects.append(project)
-            card = self._create_card(project)
-            
-            # Добавляем карточку в попап
-            row = (len(self.project_cards) - 1) // 3
-            col = (len(self.project_cards) - 1) % 3
-            self.popup.grid_layout.addWidget(card, row, col)
+        if not self.contains(project):
+            self.members[project_key(project)] = project
+            self.project_added.emit(project)
+            # Карточка встает в конец сетки попапа, остальные не двигаются
+            if self.cards_built:
+                self._create_card(project)
             
             # Обновляем информацию и внешний вид
             self.update_info()
@@ -400,13 +468,16 @@ class ProjectGroup(QFrame):
 
     def remove_project(self, project):
         """Удаление проекта из группы"""
-        if project in self.projects:
-            index = self.projects.index(project)
-            self.projects.remove(project)
-            card = self.project_cards.pop(index)
-            card.deleteLater()
+        if self.contains(project):
+            key = project_key(project)
+            project = self.members.pop(key)
+            if self.cards_built:
+                card = self.project_cards.pop(key)
+                self.popup.grid_layout.removeWidget(card)
+                card.deleteLater()
+            self.project_removed.emit(project)
             
-            if len(self.projects) == 0:
+            if not self.members:
                 self.popup.hide()  # Скрываем попап, если группа пуста
                 self.deleted.emit([])
             else:
@@ -418,11 +489,12 @@ class ProjectGroup(QFrame):
 
     def close_popup(self):
         """Закрывает попап"""
-        self.popup.hide()
+        self.popup.close_animated()
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
             # Показываем попап
+            self.build_cards()
             self.popup.show()
         super().mousePressEvent(event)
 
@@ -434,12 +506,12 @@ class ProjectGroup(QFrame):
         rename_action.triggered.connect(self.rename_group)
         menu.addAction(rename_action)
         
-        if len(self.projects) > 0:
+        if self.members:
             menu.addSeparator()
             
             # Подменю для проектов
             projects_menu = QMenu("Проекты", self)
-            for project in self.projects:
+            for project in self.members.values():
                 project_action = QAction(project["name"], self)
                 project_action.triggered.connect(lambda p=project: self.project_clicked.emit(p))
                 projects_menu.addAction(project_action)
@@ -460,7 +532,7 @@ class ProjectGroup(QFrame):
             try:
                 project_data = eval(event.mimeData().text())
                 # Проверяем, не находится ли проект уже в этой группе
-                if project_data not in self.projects:
+                if not self.contains(project_data):
                     # Подсвечиваем всю область группы
                     self.setStyleSheet(f"""
                         QFrame#project_group {{
@@ -512,7 +584,7 @@ class ProjectGroup(QFrame):
                 project_data = eval(event.mimeData().text())
                 
                 # Проверяем, не находится ли проект уже в этой группе
-                if project_data not in self.projects:
+                if not self.contains(project_data):
                     # Находим родительское окно
                     main_window = self.window()
                     
@@ -522,11 +594,11 @@ class ProjectGroup(QFrame):
                         event.ignore()
                         return
                     
-                    # Удаляем проект из других групп
+                    # Удаляем проект из другой группы
                     if hasattr(main_window, 'project_groups'):
-                        for group in main_window.project_groups.values():
-                            if group != self and project_data in group.projects:
-                                group.remove_project(project_data)
+                        group = main_window.project_groups.group_of(project_data)
+                        if group is not None and group is not self:
+                            group.remove_project(project_data)
                     
                     # Удаляем карточку с главного экрана
                     if hasattr(main_window, 'remove_project_card'):
@@ -611,12 +683,12 @@ class ProjectGroup(QFrame):
 
     def paintEvent(self, event):
         """Отрисовка теней"""
-        if len(self.projects) > 1:
+        if len(self.members) > 1:
             painter = QPainter(self)
             painter.setRenderHint(QPainter.RenderHint.Antialiasing)
             
             # Рисуем тени в обратном порядке (снизу вверх)
-            num_shadows = min(len(self.projects) - 1, 2)
+            num_shadows = min(len(self.members) - 1, 2)
             for i in range(num_shadows - 1, -1, -1):
                 offset = 8 * (i + 1)
                 opacity = 0.8 - (i * 0.3)
@@ -0,0 +1,235 @@
+"""
+Статистика проектов: количество файлов и общий размер.
+
+Обход дерева проекта выполняется в фоне через os.scandir (размеры берутся из
+записей каталога, без отдельного os.path.getsize на каждый файл), результат
+сохраняется в каталоге вместе с отпечатком дерева. Отпечаток строится по
+одному уровню папки проекта, поэтому при повторном запуске проверка стоит
+одного scandir, а полный обход выполняется только для изменившихся проектов.
+Статистика приблизительная: файл, измененный на месте во вложенной папке,
+или файл, добавленный глубже второго уровня, отпечаток не меняют, и
+статистика пересчитывается при следующем изменении первого уровня.
+"""
+import os
+import hashlib
+import traceback
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from project_catalog import INFO_FILE_NAME, normalize_path
+
+# Потоков обхода: обход упирается в диск, больше двух только мешают друг другу
+STATS_THREADS = 2
+
+_shared_service = None
+
+
+def shared_service():
+    """Возвращает общий сервис статистики (None, пока он не создан)"""
+    return _shared_service
+
+
+def set_shared_service(service):
+    """Делает сервис общим для карточек, которые создаются без ссылки на окно"""
+    global _shared_service
+    _shared_service = service
+
+
+def _is_metadata_entry(name):
+    # project_info.json и временные файлы атомарной записи меняются при
+    # каждом сохранении метаданных и не должны сбрасывать статистику
+    return name == INFO_FILE_NAME or (name.startswith('.') and name.endswith('.tmp'))
+
+
+def tree_fingerprint(project_path):
+    """Отпечаток дерева проекта по его первому уровню.
+
+    Учитываются имена, размеры и mtime записей папки проекта; mtime вложенной
+    папки меняется при добавлении и удалении файлов прямо в ней. Изменения
+    глубже (и правку файла во вложенной папке без смены ее состава) отпечаток
+    не замечает. Метаданные проекта не учитываются, поэтому запись
+    project_info.json не сбрасывает статистику.
+    """
+    digest = hashlib.sha1()
+    with os.scandir(project_path) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            if _is_metadata_entry(entry.name):
+                continue
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            digest.update(f"{entry.name}\0{stat.st_size}\0{stat.st_mtime_ns}\n"
+                          .encode('utf-8', 'surrogateescape'))
+    return digest.hexdigest()
+
+
+def scan_tree(project_path):
+    """Обходит дерево проекта и возвращает (количество файлов, общий размер)"""
+    file_count = 0
+    total_size = 0
+    stack = [project_path]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            if directory == project_path:
+                raise
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        # Как os.walk: по ссылкам на папки не спускаемся
+                        if not entry.is_symlink():
+                            stack.append(entry.path)
+                        continue
+                    total_size += entry.stat().st_size
+                    file_count += 1
+                except OSError:
+                    continue
+    return file_count, total_size
+
+
+class _StatsSignals(QObject):
+    done = pyqtSignal(int, str, object)  # номер запроса, путь, (файлов, размер) или None
+
+
+class _StatsTask(QRunnable):
+    def __init__(self, catalog, project_path, force, token, priority, signals):
+        super().__init__()
+        self.catalog = catalog
+        self.project_path = project_path
+        self.force = force
+        self.token = token
+        self.priority = priority
+        self.signals = signals
+        self.cancelled = False
+        self.started = False
+
+    def run(self):
+        if self.cancelled:
+            return
+        self.started = True
+        stats = None
+        try:
+            fingerprint = tree_fingerprint(self.project_path)
+            cached = None if self.force else self.catalog.get_stats(self.project_path)
+            if cached is not None and cached[2] == fingerprint:
+                stats = cached[0], cached[1]
+            else:
+                stats = scan_tree(self.project_path)
+                self.catalog.set_stats(self.project_path, stats[0], stats[1], fingerprint)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error computing stats for {self.project_path}: {e}")
+            traceback.print_exc()
+        finally:
+            self.catalog.close()
+            self.signals.done.emit(self.token, self.project_path, stats)
+
+
+class ProjectStatsService(QObject):
+    """Выдает статистику проектов и досчитывает недостающую в фоне.
+
+    get возвращает известное значение или None и ставит проект в очередь;
+    когда значение готово, испускается stats_ready. Приоритет запроса -
+    целое число, больше - раньше; еще не начатый подсчет можно отменить.
+    """
+    stats_ready = pyqtSignal(str, object)  # путь, (файлов, размер)
+
+    def __init__(self, get_catalog, parent=None):
+        super().__init__(parent)
+        self.get_catalog = get_catalog
+        self.cache = {}  # {путь: (файлов, размер)}
+        self.unavailable = set()  # проекты, которые не удалось посчитать
+        self.pending = {}  # {путь: задача в очереди или в работе}
+        self.next_token = 0
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(STATS_THREADS)
+        self.signals = _StatsSignals()
+        self.signals.done.connect(self._on_done)
+
+    def cached(self, project_path):
+        """Возвращает посчитанную статистику или None, ничего не запрашивая"""
+        return self.cache.get(normalize_path(project_path))
+
+    def get(self, project_path):
+        """Возвращает (файлов, размер) или None, запрашивая подсчет в фоне"""
+        stats = self.cached(project_path)
+        if stats is None:
+            self.request(project_path)
+        return stats
+
+    def request(self, project_path, force=False, priority=0):
+        """Ставит подсчет в очередь; force - пересчитать, не доверяя отпечатку"""
+        path = normalize_path(project_path)
+        task = self.pending.get(path)
+        if not force:
+            if path in self.cache or path in self.unavailable:
+                return
+            if task is not None and (task.priority == priority or task.started):
+                return
+        self._start(path, force, priority)
+
+    def _start(self, path, force, priority):
+        task = self.pending.get(path)
+        if task is not None and not task.started:
+            task.cancelled = True
+        # Ответ на более ранний запрос того же проекта будет проигнорирован
+        self.next_token += 1
+        task = _StatsTask(self.get_catalog(), path, force, self.next_token, priority, self.signals)
+        self.pending[path] = task
+        self.pool.start(task, priority)
+
+    def cancel(self, project_path):
+        """Отменяет подсчет, если он еще не начался"""
+        path = normalize_path(project_path)
+        task = self.pending.get(path)
+        if task is not None and not task.started:
+            task.cancelled = True
+            del self.pending[path]
+
+    def invalidate(self, project_path):
+        """Сверяет статистику проекта, содержимое которого могло измениться.
+
+        Дерево обходится заново, только если изменился его отпечаток, поэтому
+        запись метаданных проекта обходится одним scandir. До ответа
+        отдается прежнее значение.
+        """
+        path = normalize_path(project_path)
+        self.unavailable.discard(path)
+        task = self.pending.get(path)
+        if task is not None and not task.started:
+            # Задача еще в очереди и прочитает дерево в текущем состоянии
+            return
+        if path in self.cache or task is not None:
+            self._start(path, False, task.priority if task is not None else 0)
+
+    def forget(self, project_path):
+        path = normalize_path(project_path)
+        self.cache.pop(path, None)
+        self.unavailable.discard(path)
+        task = self.pending.pop(path, None)
+        if task is not None:
+            task.cancelled = True
+
+    def reset(self):
+        """Сбрасывает состояние при смене библиотеки"""
+        for task in self.pending.values():
+            task.cancelled = True
+        self.cache.clear()
+        self.unavailable.clear()
+        self.pending.clear()
+
+    def _on_done(self, token, project_path, stats):
+        task = self.pending.get(project_path)
+        if task is None or task.token != token:
+            return
+        del self.pending[project_path]
+        if stats is None:
+            self.unavailable.add(project_path)
+            return
+        self.cache[project_path] = stats
+        self.stats_ready.emit(project_path, stats)
@@ -1,41 +1,21 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                            QLabel, QPushButton, QTreeWidget, QTreeWidgetItem, 
+                            QLabel, QPushButton, QAbstractItemView,
                             QHeaderView, QMenu, QFileDialog, QMessageBox,
-                            QLineEdit, QSplitter, QTreeWidgetItemIterator,
-                            QInputDialog)
-from PyQt6.QtCore import Qt, QSize, QTimer, QMimeData, QPoint
+                            QLineEdit, QSplitter, QInputDialog)
+from PyQt6.QtCore import Qt, QSize, QTimer, QMimeData, QPoint, QModelIndex
 from PyQt6.QtGui import QIcon, QAction, QPixmap, QDrag, QKeySequence, QShortcut
 import os
 import shutil
 from datetime import datetime
-from PIL import Image
-import io
 from search_panel import SearchPanel
+from fs_watcher import PathWatcher
+from file_tree import LOADING_TEXT, FileTreeModel, FileTreeView, format_size
+from file_index import ProjectFileIndex, is_empty_query
+from preview_loader import PreviewLoader, has_preview, open_reduced
 import subprocess
 
-# Создаем класс для элементов дерева с переопределенным методом сравнения
-class ProjectTreeItem(QTreeWidgetItem):
-    def __lt__(self, other):
-        tree = self.treeWidget()
-        if not tree:
-            return super().__lt__(other)
-            
-        column = tree.sortColumn()
-        
-        # Папки всегда должны быть выше файлов
-        is_dir_self = os.path.isdir(self.data(0, Qt.ItemDataRole.UserRole))
-        is_dir_other = os.path.isdir(other.data(0, Qt.ItemDataRole.UserRole))
-        
-        if is_dir_self != is_dir_other:
-            return is_dir_self
-        
-        # Сортировка по соответствующему столбцу
-        if column == 0:  # Имя
-            return self.text(0).lower() < other.text(0).lower()
-        elif column in [1, 2]:  # Дата или размер
-            return float(self.data(column, Qt.ItemDataRole.UserRole) or 0) < float(other.data(column, Qt.ItemDataRole.UserRole) or 0)
-        
-        return super().__lt__(other)
+# Как часто дерево показывает порции, найденные чтением файлов (мс)
+FILTER_REVEAL_MS = 100
 
 class ProjectWindow(QMainWindow):
     def __init__(self, project_info):
@@ -45,6 +25,9 @@ class ProjectWindow(QMainWindow):
         self.preview_timer = QTimer()
         self.preview_timer.setSingleShot(True)
         self.preview_timer.timeout.connect(self.update_preview)
+        self.preview_loader = PreviewLoader(self)
+        self.preview_loader.preview_ready.connect(self.on_preview_ready)
+        self.preview_path = None  # файл, превью которого ждем
         self.sort_order = {
             0: Qt.SortOrder.AscendingOrder,  # Имя
             1: Qt.SortOrder.AscendingOrder,  # Дата
@@ -55,34 +38,6 @@ class ProjectWindow(QMainWindow):
         self.clipboard = []
         self.clipboard_mode = None  # 'copy' или 'cut'
         
-        # Загружаем иконки для интерфейса
-        self.expand_icon = QIcon('icons/expand.png')
-        self.collapse_icon = QIcon('icons/expand.png')  # Будет повернута программно
-        self.add_icon = QIcon('icons/add.png')
-        self.folder_icon = QIcon('icons/folder.png')
-        
-        # Загружаем иконки для разных типов файлов
-        self.file_icons = {
-            '.blend': QIcon('icons/blend.png'),
-            '.spp': QIcon('icons/substance.png'),
-            '.fbx': QIcon('icons/model.png'),
-            '.obj': QIcon('icons/model.png'),
-            '.3ds': QIcon('icons/model.png'),
-            '.png': QIcon('icons/image.png'),
-            '.jpg': QIcon('icons/image.png'),
-            '.jpeg': QIcon('icons/image.png'),
-            '.tga': QIcon('icons/image.png'),
-            '.psd': QIcon('icons/image.png'),
-            '.txt': QIcon('icons/text.png'),
-            '.doc': QIcon('icons/document.png'),
-            '.docx': QIcon('icons/document.png'),
-            '.pdf': QIcon('icons/pdf.png'),
-            '.zip': QIcon('icons/archive.png'),
-            '.rar': QIcon('icons/archive.png'),
-            '.7z': QIcon('icons/archive.png'),
-        }
-        self.folder_closed_icon = QIcon('icons/folder-closed.png')
-        
         self.setWindowTitle(project_info["name"])
         self.resize(1000, 600)
         
@@ -130,19 +85,25 @@ class ProjectWindow(QMainWindow):
         # Создаем разделитель для дерева файлов и предпросмотра
         splitter = QSplitter(Qt.Orientation.Horizontal)
         
-        # Дерево файлов
-        self.tree = QTreeWidget()
-        self.tree.setHeaderLabels(["Имя", "Дата изменения", "Размер"])
+        # Дерево файлов: содержимое папок читается при раскрытии
+        self.tree_model = FileTreeModel(self.project_path, self)
+        self.tree = FileTreeView()
+        self.tree.setModel(self.tree_model)
         self.tree.header().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
         self.tree.header().setSectionResizeMode(1, QHeaderView.ResizeMode.Fixed)
         self.tree.header().setSectionResizeMode(2, QHeaderView.ResizeMode.Fixed)
         self.tree.header().setStretchLastSection(False)
         self.tree.header().resizeSection(1, 150)  # Фиксированная ширина для даты
         self.tree.header().resizeSection(2, 100)  # Фиксированная ширина для размера
+        self.tree.header().setSectionsClickable(True)
         self.tree.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.tree.customContextMenuRequested.connect(self.show_context_menu)
-        self.tree.currentItemChanged.connect(self.on_item_selected)
+        self.tree.selectionModel().currentChanged.connect(self.on_item_selected)
         self.tree.header().sectionClicked.connect(self.sort_tree)
+        self.tree.add_requested.connect(self.add_files_to_folder)
+        # Свернутую папку незачем дочитывать
+        self.tree.collapsed.connect(self.tree_model.cancel_loading)
+        self.tree_model.load_failed.connect(self.on_folder_load_failed)
         
         # Включаем раскрытие папок одним кликом
         self.tree.setExpandsOnDoubleClick(False)
@@ -151,12 +112,12 @@ class ProjectWindow(QMainWindow):
         # Включаем drag & drop
         self.tree.setDragEnabled(True)
         self.tree.setAcceptDrops(True)
-        self.tree.setDragDropMode(QTreeWidget.DragDropMode.InternalMove)
+        self.tree.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
         self.tree.dropEvent = self.handleDropEvent
         self.tree.dragEnterEvent = self.handleDragEnterEvent
         
         # Включаем множественное выделение
-        self.tree.setSelectionMode(QTreeWidget.SelectionMode.ExtendedSelection)
+        self.tree.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         
         # Добавляем горячие клавиши
         self.copy_shortcut = QShortcut(QKeySequence.StandardKey.Copy, self)
@@ -169,26 +130,26 @@ class ProjectWindow(QMainWindow):
         self.paste_shortcut.activated.connect(self.paste_items)
         
         self.tree.setStyleSheet("""
-            QTreeWidget {
+            QTreeView {
                 border: none;
                 background-color: white;
                 gridline-color: #e0e0e0;
                 show-decoration-selected: 1;
             }
-            QTreeWidget::item {
+            QTreeView::item {
                 height: 25px;
                 padding: 2px;
                 border-bottom: 1px solid #e0e0e0;
                 border-right: 1px solid #e0e0e0;
             }
-            QTreeWidget::item:!selected {
+            QTreeView::item:!selected {
                 color: #000000;
             }
-            QTreeWidget::item:selected {
+            QTreeView::item:selected {
                 background-color: #e6f3ff;
                 color: #000000;
             }
-            QTreeWidget::item:hover {
+            QTreeView::item:hover {
                 background-color: #f5f5f5;
             }
             QHeaderView::section {
@@ -211,6 +172,27 @@ class ProjectWindow(QMainWindow):
         
         # Добавляем переменную для хранения состояния развернутости папок
         self.expanded_paths = set()
+        self.pending_expand = set()  # раскрытые папки, родители которых еще читаются
+        
+        # Наблюдаем только за прочитанными папками
+        self.watcher = PathWatcher(parent=self)
+        self.watcher.paths_changed.connect(self.on_paths_changed)
+        self.tree_model.folder_loaded.connect(self.on_folder_loaded)
+        self.tree_model.folders_removed.connect(self.watcher.remove_paths)
+        
+        # Индекс файлов проекта для фильтров; строится в фоне
+        self.file_index = ProjectFileIndex(self.project_path, self)
+        self.file_index.matched.connect(self.on_filter_matched)
+        self.file_index.matched_more.connect(self.on_filter_matched_more)
+        # Папки, перечитанные деревом по сообщению наблюдателя, сверяет и индекс
+        self.tree_model.folders_listed.connect(self.file_index.refresh_folders)
+        self.tree_model.folders_listed.connect(self.refilter)
+        self.search_params = None  # параметры действующего фильтра (None - показаны все файлы)
+        self.filter_visible = set()  # пути, показанные текущим фильтром
+        self.filter_more = (set(), set())  # найденное чтением файлов, еще не показанное
+        self.reveal_timer = QTimer(self)
+        self.reveal_timer.setSingleShot(True)
+        self.reveal_timer.timeout.connect(self.reveal_filter_matches)
         
         # Виджет предпросмотра
         preview_widget = QWidget()
@@ -257,108 +239,81 @@ class ProjectWindow(QMainWindow):
         
         # Загружаем структуру файлов
         self.load_project_files()
+        self.file_index.build()
     
     def filter_files(self, search_params):
-        """Фильтрация файлов по заданным параметрам поиска"""
-        # Скрываем все элементы
-        iterator = QTreeWidgetItemIterator(self.tree)
-        while iterator.value():
-            item = iterator.value()
-            item.setHidden(True)
-            iterator += 1
-            
+        """Фильтрация файлов по параметрам поиска; незавершенный предыдущий запрос отменяется"""
+        self.reveal_timer.stop()
+        self.filter_more = (set(), set())
+        
         # Если поиск пустой - показываем все
-        if not any(search_params.values()):
-            iterator = QTreeWidgetItemIterator(self.tree)
-            while iterator.value():
-                item = iterator.value()
-                item.setHidden(False)
-                iterator += 1
+        if is_empty_query(search_params):
+            self.search_params = None
+            self.file_index.cancel_query()
+            self.complete_partial_folders()
+            self.tree.apply_filter(None)
             return
-            
-        # Фильтруем по параметрам
-        self.filter_tree_items(None, search_params)
-        
-        # Раскрываем родительские папки найденных элементов
-        iterator = QTreeWidgetItemIterator(self.tree)
-        while iterator.value():
-            item = iterator.value()
-            if not item.isHidden():
-                parent = item.parent()
-                while parent:
-                    parent.setHidden(False)
-                    parent.setExpanded(True)
-                    parent = parent.parent()
-            iterator += 1
-    
-    def filter_tree_items(self, parent_item, search_params):
-        """Рекурсивная фильтрация элементов дерева"""
-        if parent_item is None:
-            items = []
-            for i in range(self.tree.topLevelItemCount()):
-                items.append(self.tree.topLevelItem(i))
-        else:
-            items = [parent_item]
         
-        for item in items:
-            file_path = item.data(0, Qt.ItemDataRole.UserRole)
-            show_item = True
-            
-            # Проверяем текст поиска
-            if search_params["text"]:
-                text = search_params["text"]
-                name = item.text(0)
-                if not search_params["case_sensitive"]:
-                    text = text.lower()
-                    name = name.lower()
-                if text not in name:
-                    # Если включен поиск по содержимому
-                    if search_params["search_content"] and os.path.isfile(file_path):
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                                if not search_params["case_sensitive"]:
-                                    content = content.lower()
-                                if text not in content:
-                                    show_item = False
-                        except:
-                            show_item = False
-                    else:
-                        show_item = False
-            
-            # Проверяем тип файла
-            if show_item and search_params["file_type"] != "Все файлы":
-                ext = os.path.splitext(file_path)[1].lower()
-                if search_params["file_type"] == "Изображения" and ext not in ['.png', '.jpg', '.jpeg', '.tga', '.psd']:
-                    show_item = False
-                elif search_params["file_type"] == "Документы" and ext not in ['.txt', '.doc', '.docx', '.pdf']:
-                    show_item = False
-                elif search_params["file_type"] == "3D модели" and ext not in ['.blend', '.fbx', '.obj', '.3ds']:
-                    show_item = False
-                elif search_params["file_type"] == "Архивы" and ext not in ['.zip', '.rar', '.7z']:
-                    show_item = False
-            
-            # Проверяем даты
-            if show_item and os.path.exists(file_path):
-                mtime = datetime.fromtimestamp(os.path.getmtime(file_path))
-                if mtime.date() < search_params["date_from"] or mtime.date() > search_params["date_to"]:
-                    show_item = False
-            
-            item.setHidden(not show_item)
-            
-            # Рекурсивно проверяем дочерние элементы
-            if item.childCount() > 0:
-                for i in range(item.childCount()):
-                    self.filter_tree_items(item.child(i), search_params)
+        self.search_params = search_params
+        self.file_index.query(search_params)
+    
+    def refilter(self, *args):
+        """Повторяет действующий фильтр после изменения файлов, чтобы новые записи
+        были скрыты или показаны по нему"""
+        if self.search_params is not None:
+            self.filter_files(self.search_params)
+    
+    def on_filter_matched(self, matches, folders):
+        """Показывает найденные записи и раскрывает их родительские папки"""
+        self.filter_visible = set()
+        self.show_filter_matches(matches, folders)
+    
+    def on_filter_matched_more(self, matches, folders):
+        """Копит порции, найденные чтением файлов, и показывает их по таймеру"""
+        self.filter_more[0].update(matches)
+        self.filter_more[1].update(folders)
+        if not self.reveal_timer.isActive():
+            self.reveal_timer.start(FILTER_REVEAL_MS)
+    
+    def reveal_filter_matches(self):
+        matches, folders = self.filter_more
+        self.filter_more = (set(), set())
+        self.show_filter_matches(matches, folders)
+    
+    def show_filter_matches(self, matches, folders):
+        """Добавляет записи к показанным фильтром и раскрывает их родительские папки"""
+        visible = matches | folders
+        self.filter_visible |= visible
+        by_folder = {}
+        for path in visible:
+            by_folder.setdefault(os.path.dirname(path), []).append(path)
+        # Непрочитанные папки заполняем из индекса только найденными записями,
+        # без обращения к диску; остальное допишется, когда фильтр сбросят
+        for folder in sorted(folders, key=len):
+            entries = self.file_index.entries(folder, by_folder.get(folder, ()))
+            self.tree_model.populate(folder, entries, partial=True)
+            index = self.tree_model.index_of(folder)
+            if index.isValid() and not self.tree.isExpanded(index):
+                self.tree.expand(index)
+        self.tree.apply_filter(self.filter_visible)
+    
+    def complete_partial_folders(self):
+        """Дописывает из индекса записи папок, заполненных фильтром не полностью"""
+        for folder in sorted(self.tree_model.partial_folders(), key=len):
+            self.tree_model.populate(folder, self.file_index.entries(folder))
+    
+    def selected_paths(self):
+        """Пути выделенных строк дерева"""
+        return [index.data(Qt.ItemDataRole.UserRole)
+                for index in self.tree.selectionModel().selectedRows(0)]
     
     def on_item_selected(self, current, previous):
         """Обновляем превью только если выбран один элемент"""
-        if len(self.tree.selectedItems()) == 1:
-            if not current:
+        if len(self.tree.selectionModel().selectedRows(0)) == 1:
+            if not current.isValid():
                 return
             
-            file_path = current.data(0, Qt.ItemDataRole.UserRole)
-            if not os.path.isfile(file_path):
+            if self.tree_model.is_dir(current):
                 self.preview_label.setText("Выберите файл для просмотра")
                 self.info_label.hide()
                 return
@@ -367,166 +322,105 @@ class ProjectWindow(QMainWindow):
             self.preview_timer.start(200)
     
     def update_preview(self):
-        current = self.tree.currentItem()
-        if not current:
+        current = self.tree.currentIndex()
+        if not current.isValid():
             self.preview_label.setText("Выберите файл для просмотра")
             self.info_label.hide()
             return
             
-        file_path = current.data(0, Qt.ItemDataRole.UserRole)
-        if not os.path.isfile(file_path):
+        file_path = self.tree_model.path(current)
+        if not file_path or not os.path.isfile(file_path):
             self.preview_label.setText("Выберите файл для просмотра")
             self.info_label.hide()
             return
             
         # Получаем информацию о файле
+        mtime = 0.0
         try:
             size = os.path.getsize(file_path)
-            modified = datetime.fromtimestamp(os.path.getmtime(file_path))
+            mtime = os.path.getmtime(file_path)
+            modified = datetime.fromtimestamp(mtime)
             info = f"Имя: {os.path.basename(file_path)}\n"
-            info += f"Размер: {self.format_size(size)}\n"
+            info += f"Размер: {format_size(size)}\n"
             info += f"Изменен: {modified.strftime('%d.%m.%y %H:%M:%S')}"
             self.info_label.setText(info)
             self.info_label.show()
         except Exception as e:
             self.info_label.hide()
             
-        # Проверяем расширение файла
-        ext = os.path.splitext(file_path)[1].lower()
-        if ext in ['.jpg', '.jpeg', '.png', '.bmp', '.gif']:
-            try:
-                # Сначала получаем размеры оригинального изображения
-                with Image.open(file_path) as original_img:
-                    # Добавляем информацию о размерах оригинального изображения
-                    info = self.info_label.text()
-                    info += f"\nРазмеры: {original_img.width}x{original_img.height} пикселей"
-                    self.info_label.setText(info)
-                    
-                    # Создаем копию для превью
-                    img = original_img.copy()
-                    # Определяем размер для отображения с сохранением пропорций
-                    max_size = (300, 300)
-                    img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                    
-                    # Конвертируем в формат, поддерживаемый Qt
-                    img_byte_array = io.BytesIO()
-                    img.save(img_byte_array, format=original_img.format)
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(img_byte_array.getvalue())
-                    
-                    # Устанавливаем изображение без растягивания
-                    self.preview_label.setPixmap(pixmap)
-                    self.preview_label.setScaledContents(False)
-            except Exception as e:
-                self.preview_label.setText(f"Ошибка загрузки изображения:\n{str(e)}")
-                self.info_label.hide()
+        # Изображение декодируется в фоне, результат придет в on_preview_ready
+        if has_preview(file_path):
+            self.preview_path = file_path
+            self.preview_label.setText(LOADING_TEXT)
+            self.preview_loader.request(file_path, mtime)
         else:
+            self.preview_path = None
+            self.preview_loader.cancel()
             self.preview_label.setText(info)
             self.info_label.hide()
     
-    def load_project_files(self, parent=None, path=None):
-        if path is None:
-            # Сохраняем текущее состояние развернутости перед очисткой
-            self.save_expanded_state()
-            path = self.project_path
-            self.tree.clear()
-            parent = self.tree
-        
-        try:
-            entries = []
-            for entry in os.scandir(path):
-                entries.append(entry)
-            
-            entries.sort(key=lambda x: (not x.is_dir(), x.name.lower()))
-            
-            for entry in entries:
-                item = ProjectTreeItem(parent)
-                item.setData(0, Qt.ItemDataRole.UserRole, entry.path)
-                
-                if entry.is_dir():
-                    item.setIcon(0, self.folder_icon)
-                    
-                    # Создаем виджет-контейнер
-                    container = QWidget()
-                    container_layout = QHBoxLayout(container)
-                    container_layout.setContentsMargins(0, 0, 0, 0)
-                    container_layout.setSpacing(9)  # Увеличиваем расстояние между элементами
-                    
-                    # Добавляем название папки
-                    name_label = QLabel(entry.name)
-                    name_label.setStyleSheet("""
-                        QLabel {
-                            color: #000000;
-                            padding: 0;
-                            margin-left: 4px;  /* Добавляем отступ слева от иконки */
-                        }
-                    """)
-                    
-                    # Добавляем кнопку с иконкой
-                    add_btn = QPushButton()
-                    add_btn.setIcon(self.add_icon)
-                    add_btn.setFixedSize(16, 16)
-                    add_btn.setStyleSheet("""
-                        QPushButton {
-                            border: none;
-                            background-color: transparent;
-                            padding: 0;
-                            margin: 0;
-                        }
-                        QPushButton:hover {
-                            background-color: #e0e0e0;
-                            border-radius: 8px;
-                        }
-                    """)
-                    add_btn.clicked.connect(lambda checked, path=entry.path: self.add_files_to_folder(path))
-                    
-                    container_layout.addWidget(name_label)
-                    container_layout.addWidget(add_btn)
-                    container_layout.addStretch()
-                    
-                    self.tree.setItemWidget(item, 0, container)
-                    
-                    # Восстанавливаем состояние развернутости
-                    if entry.path in self.expanded_paths:
-                        self.tree.expandItem(item)
-                    
-                    self.load_project_files(item, entry.path)
-                else:
-                    # Для файлов устанавливаем соответствующую иконку
-                    ext = os.path.splitext(entry.name)[1].lower()
-                    item.setIcon(0, self.file_icons.get(ext, QIcon('icons/file.png')))
-                    item.setText(0, "    " + entry.name)  # Добавляем отступ для имени файла
-                    
-                    stat = entry.stat()
-                    modified_date = datetime.fromtimestamp(stat.st_mtime).strftime("%d.%m.%y %H:%M:%S")
-                    size = self.format_size(stat.st_size)
-                    
-                    item.setText(1, modified_date)
-                    item.setText(2, size)
-                    item.setData(1, Qt.ItemDataRole.UserRole, stat.st_mtime)
-                    item.setData(2, Qt.ItemDataRole.UserRole, stat.st_size)
-                    
-                    # Устанавливаем выравнивание для колонок
-                    item.setTextAlignment(1, Qt.AlignmentFlag.AlignCenter)
-                    item.setTextAlignment(2, Qt.AlignmentFlag.AlignCenter)
-        
-        except Exception as e:
-            QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить содержимое папки:\n{str(e)}")
+    def on_preview_ready(self, file_path, image, size, error):
+        if file_path != self.preview_path:
+            return
+        if image is None:
+            self.preview_label.setText(f"Ошибка загрузки изображения:\n{error}")
+            self.info_label.hide()
+            return
+        # Добавляем информацию о размерах оригинального изображения
+        info = self.info_label.text()
+        info += f"\nРазмеры: {size[0]}x{size[1]} пикселей"
+        self.info_label.setText(info)
+        
+        # Устанавливаем изображение без растягивания
+        self.preview_label.setPixmap(QPixmap.fromImage(image))
+        self.preview_label.setScaledContents(False)
+    
+    def load_project_files(self):
+        """Перечитывает дерево: папки снова читаются при раскрытии"""
+        # Сохраняем текущее состояние развернутости перед очисткой
+        self.save_expanded_state()
+        self.tree_model.reload()
+        self.tree_model.fetchMore(QModelIndex())
+        self.restore_expanded_state()
+    
+    def apply_file_changes(self, created=(), removed=()):
+        """Переносит в дерево результат файловой операции, не перечитывая проект.
+
+        Выделение, раскрытые папки и прокрутка остаются как были.
+        """
+        self.tree_model.remove_paths(removed)
+        self.tree_model.add_paths(created)
+        self.file_index.remove_paths(removed)
+        self.file_index.add_paths(created)
+        self.refilter()
+    
+    def on_folder_loaded(self, path):
+        """Начинает наблюдение за прочитанной папкой и раскрывает ее сохраненные подпапки"""
+        self.watcher.add_paths([path])
+        self.expand_pending(path)
+    
+    def expand_pending(self, folder_path):
+        """Раскрывает сохраненные подпапки прочитанной папки"""
+        for child_path in [p for p in self.pending_expand if os.path.dirname(p) == folder_path]:
+            self.pending_expand.discard(child_path)
+            index = self.tree_model.index_of(child_path)
+            if index.isValid():
+                self.tree.expand(index)
     
-    def format_size(self, size):
-        for unit in ['б', 'Кб', 'Мб', 'Гб']:
-            if size < 1024:
-                return f"{size:.0f}{unit}"
-            size /= 1024
-        return f"{size:.0f}Тб"
+    def on_folder_load_failed(self, path, error):
+        QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить содержимое папки:\n{error}")
+    
+    def on_paths_changed(self, paths):
+        """Перечитывает в фоне только изменившиеся прочитанные папки"""
+        self.tree_model.refresh_folders(paths)
     
     def show_context_menu(self, position):
         menu = QMenu()
         
         # Получаем выделенные элементы
-        selected_items = self.tree.selectedItems()
+        selected_paths = self.selected_paths()
         
-        if not selected_items:
+        if not selected_paths:
             # Меню для пустого места
             new_folder_action = menu.addAction("Создать папку")
             new_folder_action.triggered.connect(lambda: self.create_folder(self.project_path))
@@ -537,9 +431,8 @@ class ProjectWindow(QMainWindow):
                 paste_action.triggered.connect(self.paste_items)
         else:
             # Если выбран один элемент
-            if len(selected_items) == 1:
-                item = selected_items[0]
-                file_path = item.data(0, Qt.ItemDataRole.UserRole)
+            if len(selected_paths) == 1:
+                file_path = selected_paths[0]
                 
                 if os.path.isfile(file_path):
                     open_action = menu.addAction("Открыть")
@@ -576,13 +469,12 @@ class ProjectWindow(QMainWindow):
 
     def copy_selected(self):
         """Копирование выделенных элементов в буфер"""
-        selected_items = self.tree.selectedItems()
-        if not selected_items:
+        selected_paths = self.selected_paths()
+        if not selected_paths:
             return
             
         self.clipboard = []
-        for item in selected_items:
-            path = item.data(0, Qt.ItemDataRole.UserRole)
+        for path in selected_paths:
             if path and os.path.exists(path):
                 self.clipboard.append(path)
         
@@ -595,11 +487,11 @@ class ProjectWindow(QMainWindow):
 
     def delete_selected(self):
         """Удаление выделенных элементов"""
-        selected_items = self.tree.selectedItems()
-        if not selected_items:
+        selected_paths = self.selected_paths()
+        if not selected_paths:
             return
             
-        msg = "выбранные элементы" if len(selected_items) > 1 else "выбранный элемент"
+        msg = "выбранные элементы" if len(selected_paths) > 1 else "выбранный элемент"
         reply = QMessageBox.question(
             self,
             "Подтверждение удаления",
@@ -609,17 +501,18 @@ class ProjectWindow(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
+            removed = []
             try:
-                for item in selected_items:
-                    path = item.data(0, Qt.ItemDataRole.UserRole)
+                for path in selected_paths:
                     if os.path.isfile(path):
                         os.remove(path)
                     elif os.path.isdir(path):
                         shutil.rmtree(path)
-                
-                self.load_project_files()
+                    removed.append(path)
             except Exception as e:
                 QMessageBox.critical(self, "Ошибка", f"Не удалось удалить:\n{str(e)}")
+            # Убираем из дерева то, что успели удалить
+            self.apply_file_changes(removed=removed)
 
     def paste_items(self):
         """Вставка элементов из буфера"""
@@ -627,14 +520,16 @@ class ProjectWindow(QMainWindow):
             return
             
         # Определяем папку назначения
-        selected_items = self.tree.selectedItems()
-        if selected_items:
-            dest_path = selected_items[0].data(0, Qt.ItemDataRole.UserRole)
+        selected_paths = self.selected_paths()
+        if selected_paths:
+            dest_path = selected_paths[0]
             if not os.path.isdir(dest_path):
                 dest_path = os.path.dirname(dest_path)
         else:
             dest_path = self.project_path
         
+        created = []
+        removed = []
         try:
             for source_path in self.clipboard:
                 if not os.path.exists(source_path):
@@ -660,15 +555,24 @@ class ProjectWindow(QMainWindow):
                         shutil.copytree(source_path, new_path)
                 elif self.clipboard_mode == 'cut':
                     shutil.move(source_path, new_path)
+                    removed.append(source_path)
+                created.append(new_path)
             
             # Очищаем буфер после вырезания
             if self.clipboard_mode == 'cut':
                 self.clipboard = []
                 self.clipboard_mode = None
-            
-            self.load_project_files()
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось выполнить операцию:\n{str(e)}")
+        self.apply_file_changes(created=created, removed=removed)
+    
+    def closeEvent(self, event):
+        # Останавливаем фоновое чтение папок и индексацию
+        self.tree_model.cancel_all()
+        self.file_index.stop()
+        self.reveal_timer.stop()
+        self.preview_loader.cancel()
+        super().closeEvent(event)
     
     def show_project_settings(self):
         # TODO: Реализовать окно настроек проекта
@@ -678,38 +582,34 @@ class ProjectWindow(QMainWindow):
         # Меняем порядок сортировки для текущего столбца
         self.sort_order[column] = Qt.SortOrder.DescendingOrder if self.sort_order[column] == Qt.SortOrder.AscendingOrder else Qt.SortOrder.AscendingOrder
         
-        # Сортируем дерево
-        self.tree.sortItems(column, self.sort_order[column])
+        # Сортируем прочитанные папки (метаданные уже в модели)
+        self.tree_model.sort(column, self.sort_order[column])
         
         # Устанавливаем индикатор сортировки в заголовке
-        for col in range(3):
-            if col == column:
-                self.tree.headerItem().setIcon(col, QIcon.fromTheme("go-down" if self.sort_order[column] == Qt.SortOrder.DescendingOrder else "go-up"))
-            else:
-                self.tree.headerItem().setIcon(col, QIcon())
+        self.tree.header().setSortIndicatorShown(True)
+        self.tree.header().setSortIndicator(column, self.sort_order[column])
     
     def save_expanded_state(self):
         """Сохраняет состояние развернутости всех папок"""
-        self.expanded_paths.clear()
-        iterator = QTreeWidgetItemIterator(self.tree)
-        while iterator.value():
-            item = iterator.value()
-            if item.isExpanded():
-                path = item.data(0, Qt.ItemDataRole.UserRole)
-                if path:
-                    self.expanded_paths.add(path)
-            iterator += 1
+        # Папки, до которых восстановление еще не дошло, тоже остаются раскрытыми
+        self.expanded_paths = set(self.pending_expand)
+        for node in self.tree_model.walk():
+            if node.is_dir and self.tree.isExpanded(self.tree_model.index_of(node.path)):
+                self.expanded_paths.add(node.path)
+    
+    def restore_expanded_state(self):
+        """Раскрывает сохраненные папки по мере того, как читаются их родители"""
+        self.pending_expand = set(self.expanded_paths)
+        if self.tree_model.root.loaded:
+            self.expand_pending(self.project_path)
     
     def handle_tree_click(self, index):
         """Обработчик клика по элементу дерева"""
-        item = self.tree.itemFromIndex(index)
-        if item and index.column() == 0:
-            path = item.data(0, Qt.ItemDataRole.UserRole)
-            if path and os.path.isdir(path):
-                if item.isExpanded():
-                    self.tree.collapseItem(item)
-                else:
-                    self.tree.expandItem(item)
+        if index.isValid() and index.column() == 0 and self.tree_model.is_dir(index):
+            if self.tree.isExpanded(index):
+                self.tree.collapse(index)
+            else:
+                self.tree.expand(index)
     
     def create_folder(self, parent_path):
         """Создание новой папки"""
@@ -727,7 +627,7 @@ class ProjectWindow(QMainWindow):
                     return
                 
                 os.makedirs(new_folder_path)
-                self.load_project_files()
+                self.apply_file_changes(created=[new_folder_path])
             except Exception as e:
                 QMessageBox.critical(self, "Ошибка", f"Не удалось создать папку:\n{str(e)}")
 
@@ -741,17 +641,18 @@ class ProjectWindow(QMainWindow):
     def handleDropEvent(self, event):
         """Обработка перетаскивания файлов из системы"""
         # Получаем целевую папку
-        drop_item = self.tree.itemAt(self.tree.viewport().mapFrom(self, event.position().toPoint()))
+        drop_index = self.tree.indexAt(self.tree.viewport().mapFrom(self, event.position().toPoint()))
         target_path = self.project_path
         
-        if drop_item:
-            item_path = drop_item.data(0, Qt.ItemDataRole.UserRole)
+        if drop_index.isValid():
+            item_path = self.tree_model.path(drop_index)
             if os.path.isdir(item_path):
                 target_path = item_path
             else:
                 target_path = os.path.dirname(item_path)
         
         # Копируем файлы
+        created = []
         for url in event.mimeData().urls():
             file_path = url.toLocalFile()
             if os.path.exists(file_path):
@@ -770,6 +671,7 @@ class ProjectWindow(QMainWindow):
                             dest_path = os.path.join(target_path, f"{base}_{counter}{ext}")
                         
                         shutil.copy2(file_path, dest_path)
+                        created.append(dest_path)
                         
                 except Exception as e:
                     QMessageBox.warning(
@@ -779,8 +681,8 @@ class ProjectWindow(QMainWindow):
                         QMessageBox.StandardButton.Ok
                     )
         
-        # Обновляем отображение файлов
-        self.load_project_files()
+        # Добавляем скопированные файлы в дерево
+        self.apply_file_changes(created=created)
 
     def add_files_to_folder(self, folder_path):
         """Добавляет файлы в указанную папку проекта"""
@@ -801,6 +703,7 @@ class ProjectWindow(QMainWindow):
                 return
                 
             # Копируем каждый выбранный файл
+            created = []
             for source_path in files:
                 try:
                     # Получаем имя файла
@@ -817,6 +720,7 @@ class ProjectWindow(QMainWindow):
                     
                     # Копируем файл
                     shutil.copy2(source_path, dest_path)
+                    created.append(dest_path)
                     
                 except Exception as e:
                     QMessageBox.warning(
@@ -826,8 +730,8 @@ class ProjectWindow(QMainWindow):
                         QMessageBox.StandardButton.Ok
                     )
             
-            # Обновляем отображение файлов
-            self.load_project_files()
+            # Добавляем скопированные файлы в дерево
+            self.apply_file_changes(created=created)
             
         except Exception as e:
             QMessageBox.critical(
@@ -857,13 +761,10 @@ class ProjectWindow(QMainWindow):
             # Копируем изображение
             preview_path = os.path.join(previews_dir, 'preview.png')
             
-            # Открываем и сохраняем изображение с помощью PIL
-            with Image.open(image_path) as img:
-                # Изменяем размер с сохранением пропорций
-                max_size = (800, 800)
-                img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                # Сохраняем в PNG
-                img.save(preview_path, 'PNG')
+            # Открываем уменьшенным (без полноразмерного декодирования, где это возможно)
+            # и сохраняем в PNG с сохранением пропорций
+            img, _ = open_reduced(image_path, 800)
+            img.save(preview_path, 'PNG')
             
             QMessageBox.information(self, "Успешно", "Превью проекта успешно установлено")
             
@@ -0,0 +1,50 @@
+"""
+Общие ресурсы интерфейса: иконки, изображения и таблица стилей.
+
+Иконки и картинки из папки icons загружаются с диска один раз на процесс
+и переиспользуются всеми карточками, делегатами и элементами дерева.
+Стили карточек и попапов групп собраны в styles.APP_STYLE и
+устанавливаются на приложение целиком, поэтому создание виджета не
+разбирает отдельную таблицу стилей.
+
+Функции работают с QPixmap и должны вызываться из GUI-потока.
+"""
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QIcon, QPixmap
+from PyQt6.QtWidgets import QApplication
+from styles import APP_STYLE
+
+_icons = {}    # {путь: QIcon}
+_pixmaps = {}  # {(путь, ширина, высота): QPixmap}
+
+
+def icon(path):
+    """QIcon из файла (загружается при первом запросе)"""
+    cached = _icons.get(path)
+    if cached is None:
+        cached = _icons[path] = QIcon(path)
+    return cached
+
+
+def pixmap(path, width=None, height=None):
+    """QPixmap из файла, вписанный в width x height с сохранением пропорций.
+
+    Без размеров возвращается исходное изображение. Если файла нет,
+    возвращается пустой QPixmap (isNull()).
+    """
+    key = (path, width, height)
+    cached = _pixmaps.get(key)
+    if cached is None:
+        cached = QPixmap(path)
+        if width and height and not cached.isNull():
+            cached = cached.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                                   Qt.TransformationMode.SmoothTransformation)
+        _pixmaps[key] = cached
+    return cached
+
+
+def apply_app_style(app=None):
+    """Устанавливает общую таблицу стилей на приложение (повторный вызов ничего не меняет)"""
+    app = app or QApplication.instance()
+    if app is not None and app.styleSheet() != APP_STYLE:
+        app.setStyleSheet(APP_STYLE)
@@ -0,0 +1,273 @@
+"""
+Поисковый индекс проектов.
+
+Триграммный индекс в памяти по названию, тегам, описанию проекта и
+названию его группы. Поиск по подстроке сводится к пересечению множеств
+проектов для триграмм запроса; если точных совпадений нет, проекты
+отбираются по доле совпавших триграмм (поиск с опечатками). Индекс
+обновляется по одному проекту при изменении метаданных.
+"""
+import re
+import math
+from collections import Counter
+
+# Вес совпадения в каждом поле при ранжировании
+FIELD_WEIGHTS = {
+    "name": 4.0,
+    "tags": 2.0,
+    "group": 2.0,
+    "description": 1.0,
+}
+
+# Доля триграмм слова запроса, которая должна совпасть при нечетком поиске
+FUZZY_THRESHOLD = 0.5
+
+# Сколько найденных проектов ранжируются по всем полям; при большем числе
+# (короткий запрос) достаточно порядка по названию
+FULL_RANK_LIMIT = 300
+
+_WORD_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize_text(text):
+    """Приводит текст к виду для поиска: нижний регистр, ё -> е, слова через пробел"""
+    text = str(text).casefold().replace("ё", "е")
+    return " ".join(_WORD_SEPARATORS.split(text)).strip()
+
+
+def _word_trigrams(word):
+    # Два пробела в начале дают триграммы начала слова, пробел в конце - конца
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def text_trigrams(text):
+    grams = set()
+    for word in text.split():
+        grams |= _word_trigrams(word)
+    return grams
+
+
+def query_trigrams(word):
+    """Триграммы слова запроса для поиска по подстроке.
+
+    Короткие слова (1-2 символа) ищутся как начало слова, длинные - как
+    подстрока в любом месте.
+    """
+    if len(word) < 3:
+        padded = f"  {word}"
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def _fuzzy_trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """Индекс проектов по пути проекта"""
+
+    def __init__(self):
+        self.fields = {}    # {путь: {поле: нормализованный текст}}
+        self.grams = {}     # {путь: множество триграмм}
+        self.postings = {}  # {триграмма: множество путей}
+        self.groups = {}    # {путь: название группы}
+        self._last = None   # (запрос, результат) для уточнения при наборе
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __contains__(self, path):
+        return self._key(path) in self.fields
+
+    @staticmethod
+    def _key(project):
+        path = project["path"] if isinstance(project, dict) else project
+        return path.replace("\\", "/")
+
+    # ============= ОБНОВЛЕНИЕ =============
+
+    def add(self, project_info):
+        """Индексирует проект (повторный вызов обновляет его запись)"""
+        path = self._key(project_info)
+        tags = project_info.get("tags") or []
+        if isinstance(tags, str):
+            tags = [tags]
+        fields = {
+            "name": normalize_text(project_info.get("name", "")),
+            "tags": normalize_text(" ".join(str(tag) for tag in tags)),
+            "description": normalize_text(project_info.get("description", "") or ""),
+            "group": normalize_text(self.groups.get(path, "")),
+        }
+        self._store(path, fields)
+
+    def set_group(self, project, group_name):
+        """Запоминает группу проекта (None - проект вне группы)"""
+        path = self._key(project)
+        if self.groups.get(path) == (group_name or None):
+            return
+        if group_name:
+            self.groups[path] = group_name
+        else:
+            self.groups.pop(path, None)
+        fields = self.fields.get(path)
+        if fields is not None:
+            fields = dict(fields, group=normalize_text(group_name or ""))
+            self._store(path, fields)
+
+    def remove(self, project):
+        path = self._key(project)
+        self.groups.pop(path, None)
+        self.fields.pop(path, None)
+        for gram in self.grams.pop(path, ()):
+            paths = self.postings.get(gram)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self.postings[gram]
+        self._last = None
+
+    def clear(self):
+        self.fields.clear()
+        self.grams.clear()
+        self.postings.clear()
+        self.groups.clear()
+        self._last = None
+
+    def _store(self, path, fields):
+        new_grams = set()
+        for text in fields.values():
+            new_grams |= text_trigrams(text)
+        old_grams = self.grams.get(path, set())
+        for gram in old_grams - new_grams:
+            paths = self.postings.get(gram)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self.postings[gram]
+        for gram in new_grams - old_grams:
+            self.postings.setdefault(gram, set()).add(path)
+        self.fields[path] = fields
+        self.grams[path] = new_grams
+        self._last = None
+
+    # ============= ПОИСК =============
+
+    def _contains(self, path, word):
+        """Есть ли слово запроса в полях проекта: длинное - подстрокой, короткое - началом слова"""
+        if len(word) < 3:
+            word = " " + word
+            return any(word in " " + text for text in self.fields[path].values())
+        return any(word in text for text in self.fields[path].values())
+
+    def _exact(self, words, within=None):
+        """Проекты, содержащие все слова запроса.
+
+        Триграммы отбирают кандидатов, каждый из которых затем проверяется
+        поиском подстроки: триграммы слова могут встретиться и порознь.
+        """
+        result = within
+        for word in words:
+            grams = query_trigrams(word)
+            # Сначала самые редкие триграммы: пересечение быстрее сужается
+            for gram in sorted(grams, key=lambda g: len(self.postings.get(g, ()))):
+                paths = self.postings.get(gram)
+                if not paths:
+                    return set()
+                result = set(paths) if result is None else result & paths
+                if not result:
+                    return result
+        if result is None:
+            return set(self.fields)
+        return {path for path in result if all(self._contains(path, word) for word in words)}
+
+    def _fuzzy(self, words):
+        """Проекты, в которых совпадает достаточная доля триграмм каждого слова"""
+        result = None
+        for word in words:
+            grams = _fuzzy_trigrams(word)
+            need = max(1, math.ceil(len(grams) * FUZZY_THRESHOLD))
+            counts = Counter()
+            for gram in grams:
+                counts.update(self.postings.get(gram, ()))
+            matched = {path for path, count in counts.items() if count >= need}
+            result = matched if result is None else result & matched
+            if not result:
+                break
+        return result or set()
+
+    def matches(self, query):
+        """Возвращает множество путей проектов, подходящих под запрос"""
+        words = normalize_text(query).split()
+        if not words:
+            return set(self.fields)
+        key = " ".join(words)
+        if self._last is not None:
+            last_key, last_result, last_exact = self._last
+            if key == last_key:
+                return last_result
+            # Запрос дописали: точные совпадения могут только сузиться
+            if last_exact and last_result and key.startswith(last_key) and " " not in key[len(last_key):]:
+                result = self._exact(words, within=last_result)
+                if result:
+                    self._last = (key, result, True)
+                    return result
+        result = self._exact(words)
+        exact = bool(result)
+        if not result:
+            result = self._fuzzy(words)
+        self._last = (key, result, exact)
+        return result
+
+    def score(self, path, words):
+        """Оценка совпадения проекта с запросом: чем больше, тем выше в выдаче"""
+        fields = self.fields[path]
+        phrase = " ".join(words)
+        total = 0.0
+        name = fields["name"]
+        if name == phrase:
+            total += 20
+        elif name.startswith(phrase):
+            total += 12
+        for word in words:
+            found = False
+            for field, text in fields.items():
+                position = text.find(word)
+                if position < 0:
+                    continue
+                found = True
+                if position == 0 or text[position - 1] == " ":
+                    total += FIELD_WEIGHTS[field] * 2  # с начала слова
+                else:
+                    total += FIELD_WEIGHTS[field]
+            if not found:
+                # Совпадение только по триграммам (опечатка)
+                grams = _fuzzy_trigrams(word)
+                total += len(grams & self.grams[path]) / len(grams)
+        # При равной оценке короткие названия выше
+        return total - len(name) * 0.001
+
+    def _name_score(self, path, words):
+        """Быстрая оценка только по названию"""
+        name = self.fields[path]["name"]
+        phrase = " ".join(words)
+        if name.startswith(phrase):
+            return 12 - len(name) * 0.001
+        if phrase in name:
+            return 4 - len(name) * 0.001
+        return -len(name) * 0.001
+
+    def search(self, query, limit=None):
+        """Возвращает [(путь, оценка)] по убыванию оценки"""
+        words = normalize_text(query).split()
+        paths = self.matches(query)
+        if not words:
+            return [(path, 0.0) for path in paths]
+        if len(paths) > FULL_RANK_LIMIT:
+            score = self._name_score
+        else:
+            score = self.score
+        ranked = sorted(((path, score(path, words)) for path in paths),
+                        key=lambda item: item[1], reverse=True)
+        return ranked[:limit] if limit else ranked
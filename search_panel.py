@@ -1,16 +1,25 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                             QLineEdit, QComboBox, QCheckBox, QDateEdit,
                             QPushButton, QFileDialog)
-from PyQt6.QtCore import Qt, pyqtSignal, QDate
+from PyQt6.QtCore import Qt, pyqtSignal, QDate, QTimer
 import os
 from styles import SEARCH_PANEL_STYLE
 
+# Пауза после последнего изменения, после которой отправляется запрос (мс)
+SEARCH_DEBOUNCE_MS = 150
+
 class SearchPanel(QWidget):
     searchRequested = pyqtSignal(dict)  # Сигнал с параметрами поиска
     
-    def __init__(self):
+    def __init__(self, debounce_ms=SEARCH_DEBOUNCE_MS):
         super().__init__()
         self.setStyleSheet(SEARCH_PANEL_STYLE)
+        # Запрос уходит один раз после паузы в наборе, а не на каждый символ
+        self.debounce_ms = debounce_ms
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.timeout.connect(self.emit_search)
+        self.last_params = None
         self.setup_ui()
         
     def setup_ui(self):
@@ -87,4 +96,12 @@ class SearchPanel(QWidget):
         }
         
     def trigger_search(self):
-        self.searchRequested.emit(self.get_search_params()) 
\ No newline at end of file
+        self.search_timer.start(self.debounce_ms)
+        
+    def emit_search(self):
+        params = self.get_search_params()
+        # Текст дописали и стерли обратно - повторять тот же запрос незачем
+        if params == self.last_params:
+            return
+        self.last_params = params
+        self.searchRequested.emit(params) 
\ No newline at end of file
@@ -95,14 +95,22 @@ class SettingsDialog(QDialog):
             print(f"Error loading settings: {e}")
     
     def save_settings(self):
-        settings = {
+        settings = {}
+        settings_path = os.path.join(self.app_root, 'settings.json')
+        # Сохраняем параметры, которых нет в диалоге (например, io_workers)
+        try:
+            if os.path.exists(settings_path):
+                with open(settings_path, 'r') as f:
+                    settings = json.load(f)
+        except Exception as e:
+            print(f"Error loading settings: {e}")
+        settings.update({
             'projects_path': self.projects_path.text(),
             'blender_path': self.blender_path.text(),
             'substance_path': self.substance_path.text()
-        }
+        })
         
         try:
-            settings_path = os.path.join(self.app_root, 'settings.json')
             with open(settings_path, 'w') as f:
                 json.dump(settings, f, indent=4)
             self.settings_changed.emit(settings)  # Испускаем сигнал с новыми настройками
@@ -225,6 +225,10 @@ SCROLL_AREA_STYLE = f"""
     QWidget#scrollAreaWidgetContents {{
         background: {COLORS['projects_block']};
     }}
+    QListView {{
+        border: none;
+        background: {COLORS['projects_block']};
+    }}
     QScrollBar:vertical {{
         border: none;
         background: {COLORS['scrollbar_bg']};
@@ -247,41 +251,41 @@ SCROLL_AREA_STYLE = f"""
     }}
 """
 
-# Стили для карточки проекта
-PROJECT_CARD_STYLES = {
-    'main': f"""
-        QFrame#project_card {{
-            background-color: {COLORS['card_background']};
-            border-radius: {SIZES['radius_large']};
-            border: 1px solid {COLORS['input_border']};
-        }}
-        QFrame#project_card:hover {{
-            border: 1px solid {COLORS['accent']};
-            background-color: {COLORS['card_hover']};
-        }}
-    """,
-    'image_placeholder': f"""
+# Карточка проекта (ProjectCard): дочерние виджеты различаются по objectName
+CARD_STYLE = f"""
+    QFrame#project_card {{
+        background-color: {COLORS['card_background']};
+        border-radius: {SIZES['radius_large']};
+        border: 1px solid {COLORS['input_border']};
+    }}
+    QFrame#project_card:hover {{
+        border: 1px solid {COLORS['accent']};
+        background-color: {COLORS['card_hover']};
+    }}
+    QLabel#card_preview {{
         background-color: {COLORS['placeholder_bg']};
         border-radius: {SIZES['radius_medium']};
         padding: {SIZES['padding_medium']};
-    """,
-    'name_label': f"""
+    }}
+    QLabel#card_title {{
         color: {COLORS['text_primary']};
         font-size: {SIZES['font_large']};
         font-weight: bold;
-    """,
-    'date_label': f"""
-        QLabel {{
-            color: {COLORS['secondary_text']};
-            font-size: {SIZES['font_small']};
-            padding: {SIZES['padding_small']};
-        }}
-    """,
-    'files_label': f"""
+    }}
+    QLabel#card_date {{
+        color: {COLORS['secondary_text']};
+        font-size: {SIZES['font_small']};
+        padding: {SIZES['padding_small']};
+    }}
+    QLabel#card_files {{
         color: {COLORS['text_secondary']};
         font-size: {SIZES['font_small']};
-    """
-}
+    }}
+    QPushButton#card_app_button {{
+        border: none;
+        background: transparent;
+    }}
+"""
 
 # Стили для карточек в группе
 GROUP_CARD_STYLES = {
@@ -310,4 +314,76 @@ GROUP_CARD_STYLES = {
         color: {COLORS['text_secondary']};
         font-size: 14px;
     """
-} 
\ No newline at end of file
+} 
+
+# Плитка группы в сетке проектов
+GROUP_TILE_STYLE = f"""
+    QFrame#content_frame {{
+        background-color: {COLORS['card_background']};
+        border-radius: 16px;
+        border: 1px solid {COLORS['input_border']};
+    }}
+    QFrame#content_frame:hover {{
+        border: 1px solid {COLORS['primary']};
+        background-color: {COLORS['card_hover']};
+    }}
+    QLabel#group_title {{
+        color: {COLORS['text_primary']};
+        font-size: 16px;
+        font-weight: bold;
+        margin-bottom: 4px;
+    }}
+    QLabel#group_count {{
+        color: {COLORS['text_secondary']};
+        font-size: 14px;
+        margin-bottom: 8px;
+    }}
+"""
+
+# Попап группы
+GROUP_POPUP_STYLE = f"""
+    GroupPopup {{
+        background: transparent;
+    }}
+    QFrame#popup_background {{
+        background: {COLORS['background']};
+        border-radius: {SIZES['radius_large']};
+        border: 1px solid {COLORS['text_light']};
+    }}
+    QLineEdit#popup_title {{
+        color: {COLORS['text_light']};
+        font-size: 24px;
+        font-weight: bold;
+        background: transparent;
+        border: none;
+        border-radius: 8px;
+        padding: 4px 8px;
+    }}
+    QLineEdit#popup_title:hover, QLineEdit#popup_title:focus {{
+        background: rgba(255, 255, 255, 0.1);
+    }}
+    QPushButton#popup_close {{
+        background: rgba(255, 255, 255, 0.1);
+        color: {COLORS['text_light']};
+        font-size: 24px;
+        border: none;
+        border-radius: 16px;
+        margin: 0px;
+        padding: 0px;
+        text-align: center;
+        line-height: 32px;
+    }}
+    QPushButton#popup_close:hover {{
+        background: rgba(255, 255, 255, 0.2);
+    }}
+"""
+
+# ============= ОБЩАЯ ТАБЛИЦА СТИЛЕЙ =============
+# Устанавливается один раз на QApplication (resources.apply_app_style):
+# карточкам и попапам не нужны собственные setStyleSheet
+APP_STYLE = CARD_STYLE + GROUP_TILE_STYLE + GROUP_POPUP_STYLE
+
+# Плитки групп находятся внутри главного окна, а таблица стилей виджета
+# всегда важнее таблицы приложения: без этих правил общее правило QLabel
+# главного окна перекрыло бы цвета подписей плиток
+MAIN_WINDOW_STYLE += GROUP_TILE_STYLE
@@ -0,0 +1,288 @@
+"""
+Кэш миниатюр превью для карточек проектов.
+
+Аддон Blender сохраняет preview.png размером 1280x720, а карточке нужно
+264x148. Миниатюра масштабируется один раз и сохраняется в папку кэша
+библиотеки; имя файла строится из пути, mtime и размера исходного превью,
+поэтому измененное превью получает новую миниатюру. Поверх дискового кэша
+работает QPixmapCache (LRU в памяти), так что повторная отрисовка карточки
+не обращается к диску.
+
+ThumbnailLoader читает миниатюры в фоне для карточек, которые видны или
+скоро станут видны; запросы ушедших из вида карточек отменяются.
+"""
+import os
+import hashlib
+from PyQt6.QtCore import Qt, QSize, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap, QPixmapCache
+from project_catalog import CACHE_DIR, library_key, normalize_path
+
+PREVIEW_FILE_NAME = "preview.png"
+
+# Размер превью на карточке
+THUMBNAIL_SIZE = QSize(264, 148)
+
+THUMBNAIL_FORMAT = "JPG"
+THUMBNAIL_QUALITY = 90
+
+# Лимит QPixmapCache (КБ): миниатюра занимает ~150 КБ, около 400 карточек в памяти
+PIXMAP_CACHE_LIMIT_KB = 64 * 1024
+
+# Потоков фоновой загрузки миниатюр
+LOADER_THREADS = 2
+
+_shared_loader = None
+
+
+def shared_loader():
+    """Возвращает общий загрузчик миниатюр (None, пока он не создан)"""
+    return _shared_loader
+
+
+def set_shared_loader(loader):
+    """Делает загрузчик общим для карточек, которые создаются без ссылки на окно"""
+    global _shared_loader
+    _shared_loader = loader
+
+
+class ThumbnailCache:
+    """Миниатюры превью одной библиотеки: на диске и в QPixmapCache"""
+
+    _instances = {}
+
+    def __init__(self, projects_dir, cache_dir=None):
+        self.projects_dir = normalize_path(projects_dir)
+        self.cache_dir = cache_dir or os.path.join(CACHE_DIR, f"thumbs_{library_key(projects_dir)}")
+        # {путь превью: ключ QPixmapCache или None, если превью нет}
+        self.keys = {}
+        if QPixmapCache.cacheLimit() < PIXMAP_CACHE_LIMIT_KB:
+            QPixmapCache.setCacheLimit(PIXMAP_CACHE_LIMIT_KB)
+
+    @classmethod
+    def for_library(cls, projects_dir):
+        """Возвращает кэш миниатюр библиотеки (один на папку проектов)"""
+        projects_dir = normalize_path(projects_dir)
+        cache = cls._instances.get(projects_dir)
+        if cache is None:
+            cache = cls._instances[projects_dir] = cls(projects_dir)
+        return cache
+
+    @staticmethod
+    def source_key(source_path, stat):
+        return f"{normalize_path(source_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+
+    def _file_prefix(self, source_path):
+        return hashlib.sha1(normalize_path(source_path).encode('utf-8')).hexdigest()[:20]
+
+    def _file_path(self, source_path, stat):
+        return os.path.join(self.cache_dir,
+                            f"{self._file_prefix(source_path)}_{stat.st_mtime_ns:x}_{stat.st_size:x}.jpg")
+
+    def load_image(self, source_path, stat=None):
+        """Возвращает (ключ, QImage миниатюры) или (None, None), если превью нет.
+
+        Не использует QPixmap, поэтому может вызываться не из GUI-потока.
+        """
+        try:
+            if stat is None:
+                stat = os.stat(source_path)
+        except OSError:
+            return None, None
+
+        key = self.source_key(source_path, stat)
+        thumb_path = self._file_path(source_path, stat)
+        image = QImage(thumb_path)
+        if not image.isNull():
+            return key, image
+
+        source = QImage(source_path)
+        if source.isNull():
+            return None, None
+        image = source.scaled(THUMBNAIL_SIZE, Qt.AspectRatioMode.IgnoreAspectRatio,
+                              Qt.TransformationMode.SmoothTransformation)
+        self._store(source_path, thumb_path, image)
+        return key, image
+
+    def _store(self, source_path, thumb_path, image):
+        """Сохраняет миниатюру и удаляет миниатюры прежних версий превью"""
+        temp_path = f"{thumb_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            prefix = self._file_prefix(source_path) + "_"
+            with os.scandir(self.cache_dir) as entries:
+                stale = [entry.path for entry in entries
+                         if entry.name.startswith(prefix) and entry.path != thumb_path]
+            for path in stale:
+                os.remove(path)
+            if image.save(temp_path, THUMBNAIL_FORMAT, THUMBNAIL_QUALITY):
+                os.replace(temp_path, thumb_path)
+        except OSError as e:
+            print(f"Ошибка сохранения миниатюры {thumb_path}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def cached(self, source_path):
+        """Возвращает (известно ли превью, QPixmap или None) без обращения к диску"""
+        source_path = normalize_path(source_path)
+        if source_path not in self.keys:
+            return False, None
+        key = self.keys[source_path]
+        if key is None:
+            return True, None
+        pixmap = QPixmapCache.find(key)
+        if pixmap is None:
+            # Вытеснена из памяти - при следующем запросе прочитаем с диска
+            del self.keys[source_path]
+            return False, None
+        return True, pixmap
+
+    def put(self, source_path, key, image):
+        """Запоминает миниатюру, прочитанную load_image (только в GUI-потоке)"""
+        self.keys[normalize_path(source_path)] = key
+        if image is None:
+            return None
+        pixmap = QPixmap.fromImage(image)
+        QPixmapCache.insert(key, pixmap)
+        return pixmap
+
+    def thumbnail(self, source_path):
+        """Возвращает QPixmap миниатюры или None, если превью нет"""
+        known, pixmap = self.cached(source_path)
+        if known:
+            return pixmap
+        key, image = self.load_image(source_path)
+        return self.put(source_path, key, image)
+
+    def invalidate(self, source_path):
+        """Забывает миниатюру: при следующем запросе превью будет проверено заново"""
+        key = self.keys.pop(normalize_path(source_path), None)
+        if key is not None:
+            QPixmapCache.remove(key)
+
+
+def _preview_of(project_path):
+    """Возвращает (кэш библиотеки проекта, путь к preview.png)"""
+    project_path = normalize_path(project_path)
+    return (ThumbnailCache.for_library(os.path.dirname(project_path)),
+            f"{project_path}/{PREVIEW_FILE_NAME}")
+
+
+def project_thumbnail(project_path):
+    """Миниатюра preview.png проекта для карточки или None (читает с диска при промахе)"""
+    cache, source_path = _preview_of(project_path)
+    return cache.thumbnail(source_path)
+
+
+def cached_project_thumbnail(project_path):
+    """Возвращает (известно ли превью, QPixmap или None) без обращения к диску"""
+    cache, source_path = _preview_of(project_path)
+    return cache.cached(source_path)
+
+
+def invalidate_project_thumbnail(project_path):
+    """Сбрасывает миниатюру проекта после изменения preview.png"""
+    cache, source_path = _preview_of(project_path)
+    cache.invalidate(source_path)
+    if _shared_loader is not None:
+        _shared_loader.invalidate(project_path)
+
+
+class _LoadSignals(QObject):
+    loaded = pyqtSignal(int, str, object, object)  # номер запроса, путь проекта, ключ, QImage
+
+
+class _LoadTask(QRunnable):
+    def __init__(self, cache, project_path, token, priority, signals):
+        super().__init__()
+        self.cache = cache
+        self.project_path = project_path
+        self.token = token
+        self.priority = priority
+        self.signals = signals
+        self.cancelled = False
+        self.started = False
+
+    def run(self):
+        if self.cancelled:
+            return
+        self.started = True
+        key, image = None, None
+        try:
+            key, image = self.cache.load_image(f"{self.project_path}/{PREVIEW_FILE_NAME}")
+        except Exception as e:
+            print(f"Ошибка загрузки миниатюры {self.project_path}: {e}")
+        if not self.cancelled:
+            self.signals.loaded.emit(self.token, self.project_path, key, image)
+
+
+class ThumbnailLoader(QObject):
+    """Фоновая загрузка миниатюр с приоритетами и отменой.
+
+    Приоритет - целое число, больше - раньше (карточки ближе к видимой
+    области получают больший приоритет). Повторный запрос с другим
+    приоритетом переставляет задачу в очереди.
+    """
+    thumbnail_ready = pyqtSignal(str)  # путь проекта
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tasks = {}  # {путь проекта: задача в очереди или в работе}
+        self.next_token = 0
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(LOADER_THREADS)
+        self.signals = _LoadSignals()
+        self.signals.loaded.connect(self._on_loaded)
+
+    def request(self, project_path, priority=0):
+        """Ставит загрузку миниатюры в очередь, если ее нет в памяти"""
+        project_path = normalize_path(project_path)
+        task = self.tasks.get(project_path)
+        if task is not None:
+            if task.priority == priority or task.started:
+                return
+            task.cancelled = True
+        cache, source_path = _preview_of(project_path)
+        if task is None and cache.cached(source_path)[0]:
+            return
+        self.next_token += 1
+        task = _LoadTask(cache, project_path, self.next_token, priority, self.signals)
+        self.tasks[project_path] = task
+        self.pool.start(task, priority)
+
+    def invalidate(self, project_path):
+        """preview.png изменился: идущая загрузка могла прочитать старый файл.
+
+        Ожидаемая загрузка перезапускается с новым номером, поэтому ответ
+        уже начатой задачи будет проигнорирован.
+        """
+        project_path = normalize_path(project_path)
+        task = self.tasks.pop(project_path, None)
+        if task is None:
+            return
+        task.cancelled = True
+        self.request(project_path, task.priority)
+
+    def cancel(self, project_path):
+        """Отменяет загрузку, если она еще не началась"""
+        task = self.tasks.pop(normalize_path(project_path), None)
+        if task is not None:
+            task.cancelled = True
+
+    def is_pending(self, project_path):
+        return normalize_path(project_path) in self.tasks
+
+    def clear(self):
+        for task in self.tasks.values():
+            task.cancelled = True
+        self.tasks.clear()
+
+    def _on_loaded(self, token, project_path, key, image):
+        task = self.tasks.get(project_path)
+        if task is None or task.token != token:
+            return
+        del self.tasks[project_path]
+        cache, source_path = _preview_of(project_path)
+        cache.put(source_path, key, image)
+        self.thumbnail_ready.emit(project_path)